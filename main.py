@@ -3,29 +3,52 @@ AI Game Bot - 主程序入口
 AI Game Bot - Main Entry Point
 """
 
-import argparse
 import time
+
+# 启动计时起点 (--profile-startup 统计模块导入耗时)
+_STARTUP_START = time.perf_counter()
+
+import argparse
 import yaml
 import cv2
 from pathlib import Path
 
 from src.capture.screen_capture import CaptureManager
-from src.detector.yolo_detector import YOLODetector
+from src.capture.frame_pool import FramePool
+from src.capture.transform import CaptureProfile
+from src.capture.change_gate import FrameChangeGate
+from src.capture.supervisor import CaptureSupervisor
+from src.detector.yolo_detector import YOLODetector, model_source
+from src.detector.tracker import DetectionTracker, TrackingDetector
+from src.detector.flow import OpticalFlowDetector
+from src.detector.cache import CachedDetector
+from src.detector.template import TemplateDetector
+from src.detector.memo import StaticUIMemo
+from src.detector.cascade import CascadeDetector
+from src.detector.qos import ResolutionController
+from src.detector.schedule import ScheduledDetector
+from src.detector.server import RemoteDetector, load_authkey
 from src.controller.game_controller import ControllerManager
-from src.strategy.base_strategy import SimpleStrategy
+from src.strategy.base_strategy import SimpleStrategy, GameState
 from src.utils.logger import setup_logger
+from src.utils.profiler import StartupProfiler
 
 
 class GameBot:
     """游戏机器人主类"""
 
-    def __init__(self, config_path: str = "config/default_config.yaml"):
+    def __init__(self, config_path: str = "config/default_config.yaml", profile_startup: bool = False):
         """
         初始化游戏机器人
 
         Args:
             config_path: 配置文件路径
+            profile_startup: 处理完第一帧后打印启动耗时分解并退出
         """
+        self.profile_startup = profile_startup
+        self.profiler = StartupProfiler(_STARTUP_START) if profile_startup else None
+        self._mark("导入模块")
+
         # 加载配置
         self.config = self._load_config(config_path)
 
@@ -43,10 +66,36 @@ class GameBot:
         self.detector = None
         self.controller = None
         self.strategy = None
+        self.frame_pool = None
+        self.change_gate = None
+        self.capture_supervisor = None
+        self.detection_cache = None
+        self.cascade = None
+        self.qos = None
+        self.scheduler = None
+        self.template = None
+        self.static_ui = None
+        self.flow = None
+        self.tracking = None
+        self.remote = None
+
+        # 上一次检测结果 (静态画面时复用)
+        self.last_detections = []
+
+        # 可视化复用缓冲区
+        self._viz_buffer = None
 
         self.is_running = False
         self.frame_count = 0
         self.fps = 0
+        self.start_time = None
+
+        self._mark("加载配置")
+
+    def _mark(self, phase: str):
+        """记录启动阶段 (只在--profile-startup时计时)"""
+        if self.profiler is not None:
+            self.profiler.mark(phase)
 
     def _load_config(self, config_path: str) -> dict:
         """加载配置文件"""
@@ -61,31 +110,206 @@ class GameBot:
             self.logger.info("初始化屏幕捕获...")
             platform = self.config['device']['platform']
             device_id = self.config['device']['device_id']
+            capture_config = self.config.get('capture', {})
+
+            pool_config = capture_config.get('frame_pool', {})
+            if pool_config.get('enabled', False):
+                self.frame_pool = FramePool(
+                    max_free_per_shape=pool_config.get('max_free_per_shape', 4)
+                )
 
             self.capture_manager = CaptureManager(
                 platform=platform,
-                device_id=device_id
+                device_id=device_id,
+                mode=capture_config.get('mode', 'screenshot'),
+                stream_port=capture_config.get('stream_port', 1313),
+                threaded=capture_config.get('threaded', False),
+                buffer_size=capture_config.get('buffer_size', 2),
+                drop_policy=capture_config.get('drop_policy', 'latest'),
+                max_frame_age=capture_config.get('max_frame_age', 0),
+                frame_pool=self.frame_pool,
+                profile=CaptureProfile.from_config(capture_config.get('profile')),
+                replay=self.config.get('replay'),
+                wda_port=self.config['device'].get('wda_port', 8100),
+                mjpeg_port=capture_config.get('mjpeg_port', 9100)
             )
 
+            gate_config = capture_config.get('change_gate', {})
+            if gate_config.get('enabled', False):
+                self.change_gate = FrameChangeGate(
+                    method=gate_config.get('method', 'diff'),
+                    threshold=gate_config.get('threshold', 2.0),
+                    max_skip=gate_config.get('max_skip', 30),
+                    max_skip_time=gate_config.get('max_skip_time', 2.0)
+                )
+
             if not self.capture_manager.connect():
                 self.logger.error("设备连接失败")
                 return False
+            self._mark("连接设备")
 
             # 初始化YOLO检测器
             self.logger.info("初始化YOLO检测器...")
-            model_path = self.config['model']['path']
-
-            if not Path(model_path).exists():
-                self.logger.error(f"模型文件不存在: {model_path}")
-                self.logger.info("请先训练模型或下载预训练模型")
-                return False
-
-            self.detector = YOLODetector(
-                model_path=model_path,
-                conf_threshold=self.config['model']['conf_threshold'],
-                iou_threshold=self.config['model']['iou_threshold'],
-                use_gpu=self.config['model']['use_gpu']
-            )
+            server_config = self.config['model'].get('server', {})
+            if server_config.get('enabled', False):
+                # 检测服务: 模型由独立进程加载, 画面经共享内存传给服务端
+                self.detector = RemoteDetector(
+                    server_config.get('address', '127.0.0.1:6010'),
+                    authkey=load_authkey(server_config.get('authkey'), server_config.get('key_file')),
+                    name=server_config.get('client_name') or device_id or None
+                )
+                self.remote = self.detector
+                detectors = [self.detector]
+            else:
+                model_path, backend = model_source(self.config['model'])
+
+                if not Path(model_path).exists():
+                    self.logger.error(f"模型文件不存在: {model_path}")
+                    self.logger.info("请先训练模型或下载预训练模型")
+                    return False
+
+                cascade_config = self.config['model'].get('cascade', {})
+                conf_threshold = self.config['model']['conf_threshold']
+                if cascade_config.get('enabled', False):
+                    # 小模型要能看到不确定区间内的候选框
+                    conf_threshold = min(conf_threshold, cascade_config.get('uncertain_band', [0.25, 0.5])[0])
+
+                self.detector = YOLODetector(
+                    model_path=model_path,
+                    conf_threshold=conf_threshold,
+                    iou_threshold=self.config['model']['iou_threshold'],
+                    use_gpu=self.config['model']['use_gpu'],
+                    class_names=self.config.get('classes'),
+                    optimized_cache=self.config['model'].get('optimized_cache', True),
+                    backend=backend,
+                    num_threads=self.config['model'].get('cpu_threads', 0)
+                )
+                detectors = [self.detector]
+
+                # 两级级联: 小模型逐帧检测, 不确定时再运行大模型
+                if cascade_config.get('enabled', False):
+                    full_model_path = cascade_config['full_model']
+                    if not Path(full_model_path).exists():
+                        self.logger.error(f"大模型文件不存在: {full_model_path}")
+                        return False
+                    full_detector = YOLODetector(
+                        model_path=full_model_path,
+                        conf_threshold=self.config['model']['conf_threshold'],
+                        iou_threshold=self.config['model']['iou_threshold'],
+                        use_gpu=self.config['model']['use_gpu'],
+                        class_names=self.config.get('classes'),
+                        optimized_cache=self.config['model'].get('optimized_cache', True),
+                        backend=backend,
+                        num_threads=self.config['model'].get('cpu_threads', 0)
+                    )
+                    detectors.append(full_detector)
+                    self.cascade = CascadeDetector(
+                        self.detector, full_detector,
+                        uncertain_band=tuple(cascade_config.get('uncertain_band', [0.25, 0.5])),
+                        critical_classes=cascade_config.get('critical_classes', []),
+                        full_interval=cascade_config.get('full_interval', 30)
+                    )
+                    self.detector = self.cascade
+            self._mark("加载模型")
+
+            # 分辨率QoS: 帧耗时超出FPS预算时降低推理分辨率, 有余量时再升回
+            qos_config = self.config.get('qos', {})
+            if qos_config.get('enabled', False):
+                fps_limit = self.config['runtime']['fps_limit']
+                self.qos = ResolutionController(
+                    detectors,
+                    budget=1.0 / fps_limit if fps_limit else 0.0,
+                    sizes=qos_config.get('sizes', [640, 480, 320]),
+                    high_water=qos_config.get('high_water', 0.9),
+                    low_water=qos_config.get('low_water', 0.5),
+                    window=qos_config.get('window', 15),
+                    cooldown=qos_config.get('cooldown', 30),
+                    min_sizes=qos_config.get('min_sizes', {})
+                )
+                if not self.qos.enabled:
+                    self.logger.warning("分辨率QoS未生效: 需要fps_limit、多个尺寸以及支持动态输入尺寸的模型")
+                    self.qos = None
+
+            # 预热: 用实际画面尺寸跑一次推理, 第一帧不再承担图初始化开销
+            warmup_runs = self.config['model'].get('warmup', 1)
+            if warmup_runs:
+                screen_width, screen_height = self.capture_manager.get_screen_size()
+                for detector in detectors:
+                    # 启用QoS时每个输入尺寸都预热, 切换分辨率时不会卡顿
+                    for size in (self.qos.sizes[::-1] if self.qos else [None]):
+                        if size is not None:
+                            detector.set_input_size(size)
+                        detector.warmup(warmup_runs, (screen_height, screen_width))
+                self._mark("模型预热")
+
+            # 检测结果缓存: 重复出现的菜单/结算/加载画面直接复用结果
+            cache_config = self.config.get('detection_cache', {})
+            if cache_config.get('enabled', False):
+                self.detection_cache = CachedDetector(
+                    self.detector,
+                    max_entries=cache_config.get('max_entries', 128),
+                    max_age=cache_config.get('max_age', 10.0),
+                    threshold=cache_config.get('threshold', 2.0),
+                    max_hamming=cache_config.get('max_hamming', 0)
+                )
+                self.detector = self.detection_cache
+
+            # 固定UI元素: 模板匹配, YOLO只在回退或需要动态类别时运行
+            template_config = self.config.get('template_matching', {})
+            if template_config.get('enabled', False):
+                self.template = TemplateDetector(
+                    self.detector,
+                    template_classes=template_config.get('classes', []),
+                    scale=template_config.get('scale', 0.5),
+                    match_threshold=template_config.get('match_threshold', 0.8),
+                    learn_confidence=template_config.get('learn_confidence', 0.7),
+                    search_margin=template_config.get('search_margin', 0.5),
+                    max_templates=template_config.get('max_templates', 4),
+                    fallback_interval=template_config.get('fallback_interval', 10),
+                    refresh_interval=template_config.get('refresh_interval', 60)
+                )
+                self.detector = self.template
+
+            # 固定UI位置记忆: 像素校验通过的按钮直接返回
+            static_config = self.config.get('static_ui', {})
+            if static_config.get('enabled', False):
+                self.static_ui = StaticUIMemo(
+                    self.detector,
+                    class_config=static_config.get('classes', {}),
+                    min_confidence=static_config.get('min_confidence', 0.6),
+                    refresh_interval=static_config.get('refresh_interval', 120)
+                )
+                self.detector = self.static_ui
+
+            # 关键帧检测: 中间帧用光流传播检测框
+            flow_config = self.config.get('optical_flow', {})
+            if flow_config.get('enabled', False):
+                self.flow = OpticalFlowDetector(
+                    self.detector,
+                    keyframe_interval=flow_config.get('keyframe_interval', 5),
+                    min_confidence=flow_config.get('min_confidence', 0.25),
+                    scale=flow_config.get('scale', 0.5),
+                    fb_threshold=flow_config.get('fb_threshold', 1.0),
+                    min_track_ratio=flow_config.get('min_track_ratio', 0.5),
+                    max_shift=flow_config.get('max_shift', 0.5),
+                    class_intervals=flow_config.get('class_intervals')
+                )
+                self.detector = self.flow
+
+            # 隔帧检测: 中间帧由跟踪器外推目标位置
+            tracking_config = self.config.get('tracking', {})
+            if tracking_config.get('enabled', False):
+                tracker = DetectionTracker(
+                    max_frames=tracking_config.get('max_frames', 30),
+                    iou_threshold=tracking_config.get('iou_threshold', 0.3),
+                    assignment=tracking_config.get('assignment', 'greedy'),
+                    center_gate=tracking_config.get('center_gate', 0.5)
+                )
+                self.tracking = TrackingDetector(
+                    self.detector, tracker,
+                    detect_interval=tracking_config.get('detect_interval', 3)
+                )
+                self.detector = self.tracking
 
             # 初始化控制器
             self.logger.info("初始化游戏控制器...")
@@ -96,11 +320,37 @@ class GameBot:
             screen_width, screen_height = self.capture_manager.get_screen_size()
             self.controller.set_screen_size(screen_width, screen_height)
 
+            # 采集会话监控: 断线后后台重连, 重连后控制器改用新的设备对象
+            supervisor_config = capture_config.get('supervisor', {})
+            if supervisor_config.get('enabled', False):
+                self.capture_supervisor = CaptureSupervisor(
+                    self.capture_manager,
+                    window=supervisor_config.get('window', 30),
+                    max_consecutive_errors=supervisor_config.get('max_consecutive_errors', 3),
+                    max_error_rate=supervisor_config.get('max_error_rate', 0.5),
+                    latency_threshold=supervisor_config.get('latency_threshold', 1.0),
+                    backoff_initial=supervisor_config.get('backoff_initial', 0.5),
+                    backoff_max=supervisor_config.get('backoff_max', 30.0),
+                    max_attempts=supervisor_config.get('max_attempts', 0),
+                    outage_mode=supervisor_config.get('outage_mode', 'last_frame'),
+                    max_stale_age=supervisor_config.get('max_stale_age', 10.0),
+                    on_reconnect=lambda: self.controller.set_device(self.capture_manager.capture.device)
+                )
+
             # 初始化策略
             self.logger.info("初始化游戏策略...")
             self.strategy = SimpleStrategy()
             self.strategy.action_cooldown = self.config['strategy']['action_cooldown']
 
+            # 按状态调度检测: 只检测策略当前状态需要的类别, 并按各类别的轮询频率降低推理频率
+            schedule_config = self.config['strategy'].get('detection_schedule', {})
+            if schedule_config.get('enabled', True):
+                for state, rates in (schedule_config.get('states') or {}).items():
+                    self.strategy.detection_schedule[GameState(state)] = rates
+                self.scheduler = ScheduledDetector(self.detector)
+                self.detector = self.scheduler
+            self._mark("初始化控制器/策略")
+
             self.logger.info("✓ 所有组件初始化完成\n")
             return True
 
@@ -119,31 +369,66 @@ class GameBot:
         self.logger.info("按 Ctrl+C 停止\n")
 
         fps_limit = self.config['runtime']['fps_limit']
-        frame_time = 1.0 / fps_limit
+        frame_time = 1.0 / fps_limit if fps_limit else 0.0
 
         enable_viz = self.config['runtime']['enable_visualization']
         save_screenshots = self.config['runtime']['save_screenshots']
         screenshot_interval = self.config['runtime']['screenshot_interval']
 
         last_time = time.time()
+        self.start_time = last_time
 
         try:
             while self.is_running:
                 loop_start = time.time()
 
                 # 获取游戏画面
-                frame = self.capture_manager.get_frame()
-
-                if frame is None:
+                if self.capture_supervisor:
+                    frame_info = self.capture_supervisor.get_frame_info()
+                else:
+                    frame_info = self.capture_manager.get_frame_info()
+
+                if frame_info is None:
+                    if self.capture_manager.is_finished():
+                        self.logger.info("回放结束")
+                        break
+                    if self.capture_supervisor:
+                        if self.capture_supervisor.is_failed:
+                            self.logger.error("采集设备无法恢复，退出")
+                            break
+                        # 监控器内部已等待重连, 不再额外休眠
+                        continue
                     self.logger.warning("获取画面失败")
                     time.sleep(0.5)
                     continue
 
-                # YOLO检测
-                detections = self.detector.detect(frame)
-
-                # 策略决策
-                decision = self.strategy.update(frame, detections)
+                frame = frame_info.image
+                first_frame = self.frame_count == 0
+                if first_frame:
+                    self._mark("首帧采集")
+
+                # ROI/缩放采集时, 控制器把帧坐标映射回屏幕物理坐标
+                self.controller.set_transform(frame_info.transform)
+
+                if frame_info.stale:
+                    # 采集中断期间的旧画面: 不检测, 也不执行操作
+                    detections = self.last_detections
+                    decision = None
+                else:
+                    # YOLO检测
+                    detections = self._detect(frame)
+                    if first_frame:
+                        self._mark("首次检测")
+
+                    # 策略决策
+                    decision = self.strategy.update(frame, detections)
+                    if first_frame:
+                        self._mark("首次决策")
+
+                if first_frame and self.profiler is not None:
+                    self.logger.info(self.profiler.report())
+                    if self.profile_startup:
+                        self.is_running = False
 
                 # 执行操作
                 if decision:
@@ -151,7 +436,8 @@ class GameBot:
 
                 # 可视化
                 if enable_viz:
-                    viz_frame = self.detector.draw_detections(frame, detections)
+                    viz_frame = self.detector.draw_detections(frame, detections, out=self._viz_buffer)
+                    self._viz_buffer = viz_frame
 
                     # 显示FPS和状态信息
                     info_text = [
@@ -180,6 +466,9 @@ class GameBot:
                     screenshot_path = screenshot_dir / f"frame_{self.frame_count:06d}.jpg"
                     cv2.imwrite(str(screenshot_path), frame)
 
+                # 归还帧缓冲区
+                frame_info.release()
+
                 # 计算FPS
                 self.frame_count += 1
                 current_time = time.time()
@@ -191,11 +480,98 @@ class GameBot:
                     self.logger.info(
                         f"Frame {self.frame_count} | FPS: {self.fps:.1f} | "
                         f"Detections: {len(detections)} | "
-                        f"State: {self.strategy.current_state.value}"
+                        f"State: {self.strategy.current_state.value} | "
+                        f"Frame age: {frame_info.age * 1000:.0f}ms"
                     )
+                    if self.change_gate:
+                        gate_stats = self.change_gate.get_stats()
+                        self.logger.info(
+                            f"Change gate | processed: {gate_stats['processed']} | "
+                            f"skipped: {gate_stats['skipped']} ({gate_stats['skip_ratio']:.1%})"
+                        )
+                    if self.cascade:
+                        cascade_stats = self.cascade.get_stats()
+                        self.logger.info(
+                            f"Cascade | escalation: {cascade_stats['escalation_rate']:.1%} "
+                            f"{cascade_stats['reasons']} | "
+                            f"p50: {cascade_stats['latency_p50_ms']:.1f}ms | "
+                            f"p95: {cascade_stats['latency_p95_ms']:.1f}ms"
+                        )
+                    if self.qos:
+                        qos_stats = self.qos.get_stats()
+                        self.logger.info(
+                            f"QoS | size: {qos_stats['size']} | load: {qos_stats['load']:.0%} | "
+                            f"down: {qos_stats['step_downs']} | up: {qos_stats['step_ups']}"
+                        )
+                    if self.remote:
+                        remote_stats = self.remote.get_stats()
+                        self.logger.info(
+                            f"Detector server | requests: {remote_stats['requests']} | "
+                            f"p50: {remote_stats['latency_p50_ms']:.1f}ms | "
+                            f"p95: {remote_stats['latency_p95_ms']:.1f}ms"
+                        )
+                    if self.scheduler:
+                        schedule_stats = self.scheduler.get_stats()
+                        self.logger.info(
+                            f"Schedule | inference: {schedule_stats['inference_frames']} | "
+                            f"skipped: {schedule_stats['skipped_frames']} ({schedule_stats['skip_ratio']:.1%})"
+                        )
+                    if self.detection_cache:
+                        cache_stats = self.detection_cache.get_stats()
+                        self.logger.info(
+                            f"Detection cache | hit rate: {cache_stats['hit_rate']:.1%} | "
+                            f"entries: {cache_stats['entries']} | "
+                            f"evictions: {cache_stats['evictions']}"
+                        )
+                    if self.template:
+                        template_stats = self.template.get_stats()
+                        self.logger.info(
+                            f"Template match | templates: {template_stats['templates']} | "
+                            f"no inference: {template_stats['template_frames']} ({template_stats['template_ratio']:.1%}) | "
+                            f"fallbacks: {template_stats['fallbacks']}"
+                        )
+                    if self.static_ui:
+                        memo_stats = self.static_ui.get_stats()
+                        self.logger.info(
+                            f"Static UI | entries: {memo_stats['entries']} | "
+                            f"no inference: {memo_stats['memo_frames']} ({memo_stats['memo_ratio']:.1%}) | "
+                            f"invalidated: {memo_stats['invalidated']}"
+                        )
+                    if self.flow:
+                        flow_stats = self.flow.get_stats()
+                        self.logger.info(
+                            f"Optical flow | keyframes: {flow_stats['keyframes']} | "
+                            f"propagated: {flow_stats['propagated']} ({flow_stats['saved_ratio']:.1%}) | "
+                            f"drift: {flow_stats['drift_redetects']} | "
+                            f"low conf: {flow_stats['confidence_redetects']}"
+                        )
+                    if self.tracking:
+                        track_stats = self.tracking.get_stats()
+                        self.logger.info(
+                            f"Tracking | tracks: {track_stats['active_tracks']} | "
+                            f"inference: {track_stats['inference_calls']} | "
+                            f"saved: {track_stats['inferences_saved']} ({track_stats['saved_ratio']:.1%})"
+                        )
+                    if self.capture_supervisor:
+                        health = self.capture_supervisor.get_stats()
+                        self.logger.info(
+                            f"Capture health | {health['state']} | "
+                            f"errors: {health['error_rate']:.1%} | "
+                            f"latency p95: {health['latency_p95_ms']:.0f}ms | "
+                            f"reconnects: {health['reconnects']} | "
+                            f"outage: {health['outage_time']:.1f}s"
+                        )
+                    if self.frame_pool:
+                        pool_stats = self.frame_pool.get_stats()
+                        self.logger.info(
+                            f"Frame pool | hit rate: {pool_stats['hit_rate']:.1%} | "
+                            f"peak: {pool_stats['peak_mb']:.1f}MB"
+                        )
 
                 # FPS限制
                 elapsed = time.time() - loop_start
+                if self.qos and not frame_info.stale:
+                    self.qos.update(elapsed, self.strategy.current_state.value)
                 if elapsed < frame_time:
                     time.sleep(frame_time - elapsed)
 
@@ -205,6 +581,16 @@ class GameBot:
         finally:
             self.stop()
 
+    def _detect(self, frame) -> list:
+        """目标检测 - 画面无明显变化时复用上一次的检测结果"""
+        if self.change_gate and not self.change_gate.has_changed(frame):
+            return self.last_detections
+
+        if self.scheduler:
+            self.scheduler.set_schedule(self.strategy.get_detection_schedule())
+        self.last_detections = self.detector.detect(frame)
+        return self.last_detections
+
     def _execute_action(self, decision: dict):
         """执行决策动作"""
         action = decision.get('action')
@@ -237,12 +623,21 @@ class GameBot:
         self.is_running = False
         self.logger.info("\n停止游戏机器人...")
 
+        if self.capture_supervisor:
+            self.capture_supervisor.stop()
+
         if self.capture_manager:
             self.capture_manager.disconnect()
 
+        if self.remote:
+            self.remote.close()
+
         cv2.destroyAllWindows()
 
         self.logger.info(f"总运行帧数: {self.frame_count}")
+        if self.start_time and self.frame_count:
+            elapsed = time.time() - self.start_time
+            self.logger.info(f"平均FPS: {self.frame_count / elapsed:.2f} ({elapsed:.1f}秒)")
         self.logger.info("程序已退出")
 
 
@@ -255,11 +650,16 @@ def main():
         default='config/default_config.yaml',
         help='配置文件路径 (默认: config/default_config.yaml)'
     )
+    parser.add_argument(
+        '--profile-startup',
+        action='store_true',
+        help='处理完第一帧后打印启动耗时分解 (导入/连接/加载模型/预热/首帧) 并退出'
+    )
 
     args = parser.parse_args()
 
     # 创建并运行机器人
-    bot = GameBot(config_path=args.config)
+    bot = GameBot(config_path=args.config, profile_startup=args.profile_startup)
     bot.run()
 
 
@@ -1,3 +1,25 @@
 from .screen_capture import CaptureManager, AndroidCapture, IOSCapture
+from .stream_capture import MinicapStream, LatestFrameSlot
+from .threaded_capture import CaptureThread, CapturedFrame
+from .raw_capture import RawFramebufferParser, RawScreencapReader
+from .frame_pool import FramePool
+from .transform import CaptureProfile, CoordinateTransform
+from .change_gate import FrameChangeGate
+from .replay_capture import ReplayCapture, save_frame_archive
+from .wda_async import AsyncWDASession
+from .mjpeg_capture import MjpegStream, MultipartJpegParser
+from .supervisor import CaptureSupervisor, CaptureHealth
 
-__all__ = ['CaptureManager', 'AndroidCapture', 'IOSCapture']
+__all__ = [
+    'CaptureManager', 'AndroidCapture', 'IOSCapture',
+    'MinicapStream', 'LatestFrameSlot',
+    'CaptureThread', 'CapturedFrame',
+    'RawFramebufferParser', 'RawScreencapReader',
+    'FramePool',
+    'CaptureProfile', 'CoordinateTransform',
+    'FrameChangeGate',
+    'ReplayCapture', 'save_frame_archive',
+    'AsyncWDASession',
+    'MjpegStream', 'MultipartJpegParser',
+    'CaptureSupervisor', 'CaptureHealth',
+]
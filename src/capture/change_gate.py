@@ -0,0 +1,134 @@
+"""
+画面变化检测 - 静态画面跳过目标检测
+Frame Change Gate - Skip detection on static frames
+"""
+
+import time
+
+import numpy as np
+import cv2
+
+
+class FrameChangeGate:
+    """
+    帧变化门控
+
+    把帧缩小为灰度缩略图后与上一次"放行"的帧比较:
+        diff:  缩略图按 tiles 分块, 各分块平均绝对差的最大值 (0-255)
+        dhash: 由缩略图计算的 16x16 差值哈希的汉明距离 (0-256)
+    整图平均差会把小目标的移动平均掉 (例如2400x1080画面中80x80的目标), 分块取最大值后
+    目标所在分块的差值仍然明显。
+    变化低于阈值时判定为静态画面, 调用方可以复用上一帧的检测结果。
+    始终与最后一次放行的帧比较, 缓慢变化会累积到阈值而不会被一直跳过。
+    """
+
+    METHODS = ("diff", "dhash")
+
+    def __init__(
+        self,
+        method: str = "diff",
+        threshold: float = 2.0,
+        thumb_size: tuple = (64, 36),
+        tiles: tuple = (32, 18),
+        max_skip: int = 30,
+        max_skip_time: float = 2.0
+    ):
+        """
+        Args:
+            method: 比较方法 "diff" 或 "dhash"
+            threshold: 变化阈值 (diff为分块平均灰度差的最大值, dhash为汉明距离)
+            thumb_size: 缩略图尺寸 (width, height)
+            tiles: diff方法的分块数 (列数, 行数)
+            max_skip: 最多连续跳过的帧数 (0表示不限制)
+            max_skip_time: 最长连续跳过时间(秒) (0表示不限制)
+        """
+        if method not in self.METHODS:
+            raise ValueError(f"不支持的比较方法: {method}")
+
+        self.method = method
+        self.threshold = threshold
+        self.thumb_size = tuple(thumb_size)
+        self.tiles = tuple(tiles)
+        self.max_skip = max_skip
+        self.max_skip_time = max_skip_time
+
+        self._reference = None
+        self._reference_time = 0.0
+        self._consecutive_skips = 0
+
+        # 统计信息
+        self.processed = 0
+        self.skipped = 0
+        self.last_score = 0.0
+
+    def _signature(self, image: np.ndarray):
+        """计算帧签名"""
+        # 先隔行隔列抽样到缩略图的约4倍, 不对整帧做颜色转换和缩放
+        step = max(1, min(image.shape[1] // (self.thumb_size[0] * 4), image.shape[0] // (self.thumb_size[1] * 4)))
+        thumb = cv2.resize(image[::step, ::step], self.thumb_size, interpolation=cv2.INTER_AREA)
+        if thumb.ndim == 3:
+            thumb = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY)
+
+        if self.method == "dhash":
+            small = cv2.resize(thumb, (17, 16), interpolation=cv2.INTER_AREA)
+            return np.packbits(small[:, 1:] > small[:, :-1])
+        return thumb
+
+    def _score(self, signature) -> float:
+        """与参考帧的差异分数"""
+        if self.method == "dhash":
+            return float(np.unpackbits(np.bitwise_xor(signature, self._reference)).sum())
+        # 分块平均差 (INTER_AREA缩放到分块数即每块的均值)
+        tile_diff = cv2.resize(cv2.absdiff(signature, self._reference), self.tiles, interpolation=cv2.INTER_AREA)
+        return float(tile_diff.max())
+
+    def has_changed(self, image: np.ndarray) -> bool:
+        """
+        判断画面是否有明显变化
+
+        Args:
+            image: BGR图像
+
+        Returns:
+            True表示需要重新检测, False表示可以复用上一次的检测结果
+        """
+        signature = self._signature(image)
+        now = time.time()
+
+        changed = True
+        if self._reference is not None and self._reference.shape == signature.shape:
+            self.last_score = self._score(signature)
+            changed = self.last_score > self.threshold
+
+            # 防止长时间跳过
+            if not changed:
+                if self.max_skip and self._consecutive_skips >= self.max_skip:
+                    changed = True
+                elif self.max_skip_time and now - self._reference_time >= self.max_skip_time:
+                    changed = True
+
+        if changed:
+            self._reference = signature
+            self._reference_time = now
+            self._consecutive_skips = 0
+            self.processed += 1
+        else:
+            self._consecutive_skips += 1
+            self.skipped += 1
+
+        return changed
+
+    def reset(self):
+        """清除参考帧 (下一帧一定会放行)"""
+        self._reference = None
+        self._consecutive_skips = 0
+
+    def get_stats(self) -> dict:
+        """获取门控统计"""
+        total = self.processed + self.skipped
+        return {
+            'processed': self.processed,
+            'skipped': self.skipped,
+            'skip_ratio': self.skipped / total if total else 0.0,
+            'last_score': self.last_score,
+        }
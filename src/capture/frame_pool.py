@@ -0,0 +1,186 @@
+"""
+帧缓冲池 - 复用全分辨率图像缓冲区
+Frame Pool - Reusable, reference-counted full-resolution frame buffers
+"""
+
+import threading
+import weakref
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import cv2
+
+
+def _imdecode_supports_dst() -> bool:
+    """检测当前OpenCV的imdecode是否支持dst参数"""
+    probe = cv2.imencode('.png', np.zeros((1, 1, 3), dtype=np.uint8))[1]
+    try:
+        cv2.imdecode(probe, cv2.IMREAD_COLOR, np.empty((1, 1, 3), dtype=np.uint8))
+        return True
+    except (TypeError, cv2.error):
+        return False
+
+
+class FramePool:
+    """
+    帧缓冲池
+
+    acquire() 返回的ndarray引用计数为1, 使用完后调用 release() 归还;
+    需要共享时先 retain()。未归还就被丢弃的缓冲区会在GC时从池中注销,
+    不会泄漏, 只是无法复用 (计为未命中)。
+    """
+
+    def __init__(self, max_free_per_shape: int = 4):
+        """
+        Args:
+            max_free_per_shape: 每种尺寸最多保留的空闲缓冲区数
+        """
+        self.max_free_per_shape = max_free_per_shape
+
+        # GC回调可能在持锁时触发, 使用可重入锁
+        self._lock = threading.RLock()
+        self._free: Dict[Tuple, List[np.ndarray]] = defaultdict(list)
+        # id(array) -> [weakref, refcount, key]
+        self._in_use: Dict[int, list] = {}
+
+        self._decode_dst: Optional[bool] = None
+        self._last_shape: Optional[Tuple[int, ...]] = None
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.current_bytes = 0
+        self.peak_bytes = 0
+
+    @staticmethod
+    def _key(shape: Tuple[int, ...], dtype) -> Tuple:
+        return tuple(shape), np.dtype(dtype).str
+
+    def acquire(self, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        """
+        获取指定尺寸的缓冲区 (内容未初始化)
+
+        Args:
+            shape: 数组形状
+            dtype: 数据类型
+
+        Returns:
+            引用计数为1的缓冲区
+        """
+        key = self._key(shape, dtype)
+
+        with self._lock:
+            free = self._free[key]
+            if free:
+                array = free.pop()
+                self.hits += 1
+            else:
+                array = np.empty(shape, dtype=dtype)
+                self.misses += 1
+                self.current_bytes += array.nbytes
+                self.peak_bytes = max(self.peak_bytes, self.current_bytes)
+
+            self._in_use[id(array)] = [weakref.ref(array, self._make_finalizer(id(array), array.nbytes)), 1, key]
+
+        return array
+
+    def _make_finalizer(self, array_id: int, nbytes: int):
+        """调用方未归还就丢弃缓冲区时, 从池中注销"""
+        def _finalize(_ref):
+            with self._lock:
+                entry = self._in_use.get(array_id)
+                if entry is not None and entry[0] is _ref:
+                    del self._in_use[array_id]
+                    self.current_bytes -= nbytes
+        return _finalize
+
+    def owns(self, array: Optional[np.ndarray]) -> bool:
+        """检查数组是否由本池分配且尚未归还"""
+        if array is None:
+            return False
+        entry = self._in_use.get(id(array))
+        return entry is not None and entry[0]() is array
+
+    def retain(self, array: np.ndarray) -> np.ndarray:
+        """增加引用计数"""
+        with self._lock:
+            entry = self._in_use.get(id(array))
+            if entry is not None and entry[0]() is array:
+                entry[1] += 1
+        return array
+
+    def release(self, array: Optional[np.ndarray]):
+        """减少引用计数, 归零时放回空闲列表"""
+        if array is None:
+            return
+
+        with self._lock:
+            entry = self._in_use.get(id(array))
+            if entry is None or entry[0]() is not array:
+                return
+
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+
+            del self._in_use[id(array)]
+            free = self._free[entry[2]]
+            if len(free) < self.max_free_per_shape:
+                free.append(array)
+            else:
+                self.current_bytes -= array.nbytes
+
+    def decode_into(self, data, flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+        """
+        解码压缩图像 (JPEG/PNG) 到池中的缓冲区
+
+        Args:
+            data: 压缩图像数据
+            flags: imdecode标志
+
+        Returns:
+            池缓冲区中的图像, 解码失败返回None
+        """
+        buf = np.frombuffer(data, dtype=np.uint8)
+
+        if self._decode_dst is None:
+            self._decode_dst = _imdecode_supports_dst()
+
+        if self._decode_dst:
+            # 尺寸由上一帧推断, 不匹配时OpenCV会重新分配, 此时改为拷贝进池
+            shape = self._last_shape
+            if shape is not None:
+                out = self.acquire(shape)
+                decoded = cv2.imdecode(buf, flags, out)
+                if decoded is not None and decoded.shape == shape and decoded.ctypes.data == out.ctypes.data:
+                    return out
+                self.release(out)
+            else:
+                decoded = cv2.imdecode(buf, flags)
+        else:
+            decoded = cv2.imdecode(buf, flags)
+
+        if decoded is None:
+            return None
+
+        self._last_shape = decoded.shape
+        out = self.acquire(decoded.shape, decoded.dtype)
+        np.copyto(out, decoded)
+        return out
+
+    def get_stats(self) -> dict:
+        """获取缓冲池统计"""
+        total = self.hits + self.misses
+        with self._lock:
+            free_count = sum(len(v) for v in self._free.values())
+            in_use = len(self._in_use)
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'in_use': in_use,
+            'free': free_count,
+            'current_mb': self.current_bytes / 1024 / 1024,
+            'peak_mb': self.peak_bytes / 1024 / 1024,
+        }
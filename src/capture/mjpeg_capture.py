@@ -0,0 +1,257 @@
+"""
+MJPEG流捕获模块 - 订阅WebDriverAgent的MJPEG推流
+MJPEG Stream Capture Module - Subscribe to WebDriverAgent's MJPEG stream
+"""
+
+import socket
+import time
+from typing import List, Optional
+
+from .stream_capture import MinicapStream
+from .frame_pool import FramePool
+
+
+# 响应头/分段头的最大长度, 超过则认为流已错位
+MAX_HEADER_SIZE = 64 * 1024
+# 单帧JPEG的最大长度
+MAX_PART_SIZE = 16 * 1024 * 1024
+
+
+def parse_boundary(content_type: str) -> Optional[bytes]:
+    """从Content-Type中解析multipart分隔符"""
+    for param in content_type.split(';')[1:]:
+        key, _, value = param.strip().partition('=')
+        if key.lower() == 'boundary' and value:
+            return value.strip('"').encode('latin-1')
+    return None
+
+
+class MultipartJpegParser:
+    """
+    multipart/x-mixed-replace 增量解析器
+
+    feed() 接收任意切分的字节块, 返回其中已完整的JPEG分段。
+    分段带 Content-Length 时按长度截取, 否则扫描到下一个分隔符为止。
+    WDA声明的 boundary 自带 "--" 前缀而分段行只有一组 "--",
+    因此分隔符统一按去掉前导 "-" 后的 boundary 匹配。
+    """
+
+    def __init__(self, boundary: Optional[bytes] = None):
+        """
+        Args:
+            boundary: 分隔符 (None表示从第一条以"--"开头的行中学习)
+        """
+        self._delimiter = b"--" + boundary.lstrip(b"-") if boundary else None
+        self._buffer = bytearray()
+        self._state = "boundary"
+        self._length: Optional[int] = None
+
+        # 统计信息
+        self.parts = 0
+        self.resyncs = 0
+
+    def _learn_boundary(self) -> bool:
+        """从缓冲区中找出分隔符行"""
+        start = self._buffer.find(b"--")
+        if start < 0:
+            return False
+        end = self._buffer.find(b"\r\n", start)
+        if end < 0:
+            return False
+        self._delimiter = b"--" + bytes(self._buffer[start:end]).lstrip(b"-")
+        return True
+
+    def _resync(self):
+        """流错位时丢弃缓冲数据, 等待下一个分隔符"""
+        self._buffer.clear()
+        self._state = "boundary"
+        self._length = None
+        self.resyncs += 1
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """
+        输入数据块
+
+        Args:
+            data: 从连接读取的字节块
+
+        Returns:
+            本次解析出的完整JPEG数据列表 (按到达顺序)
+        """
+        self._buffer += data
+        parts = []
+
+        while True:
+            if self._state == "boundary":
+                if self._delimiter is None and not self._learn_boundary():
+                    if len(self._buffer) > MAX_HEADER_SIZE:
+                        self._resync()
+                    break
+
+                index = self._buffer.find(self._delimiter)
+                if index < 0:
+                    # 保留可能是分隔符前缀的尾部
+                    keep = len(self._delimiter) - 1
+                    if len(self._buffer) > keep:
+                        del self._buffer[:len(self._buffer) - keep]
+                    break
+                del self._buffer[:index + len(self._delimiter)]
+                self._state = "headers"
+
+            elif self._state == "headers":
+                end = self._buffer.find(b"\r\n\r\n")
+                if end < 0:
+                    if len(self._buffer) > MAX_HEADER_SIZE:
+                        self._resync()
+                    break
+
+                self._length = None
+                for line in bytes(self._buffer[:end]).split(b"\r\n"):
+                    key, _, value = line.partition(b":")
+                    if key.strip().lower() == b"content-length":
+                        try:
+                            self._length = int(value.strip())
+                        except ValueError:
+                            pass
+                del self._buffer[:end + 4]
+
+                if self._length is not None and self._length > MAX_PART_SIZE:
+                    self._resync()
+                    break
+                self._state = "body"
+
+            else:
+                if self._length is not None:
+                    if len(self._buffer) < self._length:
+                        break
+                    payload = bytes(self._buffer[:self._length])
+                    del self._buffer[:self._length]
+                else:
+                    index = self._buffer.find(self._delimiter)
+                    if index < 0:
+                        if len(self._buffer) > MAX_PART_SIZE:
+                            self._resync()
+                        break
+                    # 去掉分隔符前的换行及多余的 "-"
+                    payload = bytes(self._buffer[:index]).rstrip(b"-").rstrip(b"\r\n")
+                    del self._buffer[:index]
+
+                self._state = "boundary"
+                if payload:
+                    self.parts += 1
+                    parts.append(payload)
+
+        return parts
+
+
+class MjpegStream(MinicapStream):
+    """
+    HTTP MJPEG流客户端 (WebDriverAgent的MJPEG服务默认在9100端口)
+
+    读取线程增量解析multipart数据, 只保留最新的一帧JPEG;
+    解码与读取接口与minicap流相同, read() 始终返回最新解码帧且不阻塞。
+    """
+
+    name = "mjpeg"
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 9100,
+        path: str = "/",
+        connect_timeout: float = 5.0,
+        frame_pool: Optional[FramePool] = None
+    ):
+        """
+        Args:
+            host: MJPEG服务地址 (通常是iproxy转发后的本地地址)
+            port: MJPEG服务端口
+            path: 请求路径
+            connect_timeout: 连接超时(秒)
+            frame_pool: 帧缓冲池 (可选), 设置后read()返回的帧需由调用方release()
+        """
+        super().__init__(host, port, connect_timeout, frame_pool)
+        self.path = path
+        self.parser: Optional[MultipartJpegParser] = None
+        self._initial = b""
+
+    def _handshake(self, sock: socket.socket):
+        """发送HTTP请求并解析响应头"""
+        request = (
+            f"GET {self.path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            f"Accept: multipart/x-mixed-replace\r\n"
+            f"Connection: close\r\n\r\n"
+        )
+        sock.sendall(request.encode('latin-1'))
+
+        data = bytearray()
+        while b"\r\n\r\n" not in data:
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise ConnectionError("MJPEG服务未返回响应头")
+            data += chunk
+            if len(data) > MAX_HEADER_SIZE:
+                raise ValueError("MJPEG响应头过长")
+
+        head, _, rest = bytes(data).partition(b"\r\n\r\n")
+        lines = head.decode('latin-1').split("\r\n")
+        status = lines[0].split()
+        if len(status) < 2 or status[1] != "200":
+            raise ValueError(f"MJPEG服务返回 {lines[0]}")
+
+        headers = {}
+        for line in lines[1:]:
+            key, _, value = line.partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        content_type = headers.get('content-type', '')
+        if 'multipart' not in content_type.lower():
+            raise ValueError(f"不是MJPEG流: {content_type}")
+
+        self.parser = MultipartJpegParser(parse_boundary(content_type))
+        self.banner = {'content_type': content_type}
+        # 响应头之后已读到的数据留给读取线程
+        self._initial = rest
+
+    def _read_loop(self):
+        """读取线程 - 增量解析multipart分段"""
+        buf = bytearray(256 * 1024)
+        view = memoryview(buf)
+        try:
+            pending = self._initial
+            self._initial = b""
+            while self._running:
+                if pending:
+                    chunk, pending = pending, b""
+                else:
+                    n = self._sock.recv_into(view)
+                    if n == 0:
+                        raise ConnectionError("流连接已关闭")
+                    chunk = view[:n]
+
+                self.bytes_received += len(chunk)
+                parts = self.parser.feed(chunk)
+                if not parts:
+                    continue
+
+                # 同一批中只有最后一帧有意义, 其余直接计为丢弃
+                timestamp = time.time()
+                self.frames_received += len(parts) - 1
+                self.frames_dropped += len(parts) - 1
+                self._submit(parts[-1], timestamp)
+
+        except (OSError, ConnectionError, AttributeError) as e:
+            if self._running:
+                self.error = str(e)
+                print(f"✗ 流读取中断: {e}")
+        finally:
+            self._running = False
+            self._pending_event.set()
+
+    def get_stats(self) -> dict:
+        """获取流统计信息"""
+        stats = super().get_stats()
+        if self.parser is not None:
+            stats['resyncs'] = self.parser.resyncs
+        return stats
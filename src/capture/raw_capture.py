@@ -0,0 +1,299 @@
+"""
+原始帧缓冲捕获 - adb exec-out screencap 零拷贝解析
+Raw Framebuffer Capture - Zero-copy parsing of adb exec-out screencap output
+"""
+
+import struct
+import subprocess
+from typing import BinaryIO, List, Optional, Tuple
+
+import numpy as np
+import cv2
+
+
+# screencap像素格式 (android PixelFormat)
+PIXEL_FORMAT_RGBA_8888 = 1
+PIXEL_FORMAT_RGBX_8888 = 2
+PIXEL_FORMAT_RGB_888 = 3
+PIXEL_FORMAT_BGRA_8888 = 5
+
+# 格式 -> (每像素字节数, 转BGR的cvtColor代码)
+_FORMATS = {
+    PIXEL_FORMAT_RGBA_8888: (4, cv2.COLOR_RGBA2BGR),
+    PIXEL_FORMAT_RGBX_8888: (4, cv2.COLOR_RGBA2BGR),
+    PIXEL_FORMAT_RGB_888: (3, cv2.COLOR_RGB2BGR),
+    PIXEL_FORMAT_BGRA_8888: (4, cv2.COLOR_BGRA2BGR),
+}
+
+# 基础头: width, height, format (Android 9+ 额外有4字节colorspace)
+RAW_HEADER_SIZE = 12
+RAW_HEADER_SIZE_V2 = 16
+
+
+class RawFramebufferParser:
+    """
+    screencap原始输出解析器
+
+    原始数据读入预分配的bytearray, 用np.frombuffer直接映射像素区(不拷贝),
+    再用cvtColor写入预分配的BGR输出缓冲区。输出缓冲区按轮转方式复用,
+    调用方持有的帧在 num_buffers-1 次读取之后才会被覆盖。
+    """
+
+    def __init__(self, num_buffers: int = 3):
+        """
+        Args:
+            num_buffers: BGR输出缓冲区数量 (轮转复用)
+        """
+        self.num_buffers = max(1, num_buffers)
+
+        self.width = 0
+        self.height = 0
+        self.pixel_format = 0
+        self.header_size = 0
+
+        self._raw: Optional[bytearray] = None
+        self._outputs: List[np.ndarray] = []
+        self._next_output = 0
+
+        # 统计信息
+        self.frames_parsed = 0
+        self.allocations = 0
+
+    @staticmethod
+    def parse_header(data, total_size: int) -> Tuple[int, int, int, int]:
+        """
+        解析screencap头
+
+        Args:
+            data: 至少包含12字节头的数据
+            total_size: 整个输出的字节数 (用于区分12/16字节头)
+
+        Returns:
+            (width, height, pixel_format, header_size)
+        """
+        width, height, pixel_format = struct.unpack_from('<III', data, 0)
+        if pixel_format not in _FORMATS:
+            raise ValueError(f"不支持的像素格式: {pixel_format}")
+
+        bpp = _FORMATS[pixel_format][0]
+        payload = width * height * bpp
+
+        if total_size == RAW_HEADER_SIZE + payload:
+            header_size = RAW_HEADER_SIZE
+        elif total_size >= RAW_HEADER_SIZE_V2 + payload:
+            header_size = RAW_HEADER_SIZE_V2
+        else:
+            raise ValueError(f"数据长度不匹配: {total_size} (需要 {payload} 字节像素数据)")
+
+        return width, height, pixel_format, header_size
+
+    def _ensure_buffers(self, width: int, height: int, pixel_format: int):
+        """分辨率或格式变化时重新分配缓冲区"""
+        if (width, height, pixel_format) == (self.width, self.height, self.pixel_format) and self._outputs:
+            return
+
+        self.width, self.height, self.pixel_format = width, height, pixel_format
+        self._outputs = [
+            np.empty((height, width, 3), dtype=np.uint8) for _ in range(self.num_buffers)
+        ]
+        self._next_output = 0
+        self.allocations += self.num_buffers
+
+    def _raw_buffer(self, size: int) -> bytearray:
+        """获取至少size字节的原始数据缓冲区"""
+        if self._raw is None or len(self._raw) < size:
+            self._raw = bytearray(size)
+            self.allocations += 1
+        return self._raw
+
+    def decode(self, data, total_size: Optional[int] = None, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        把原始数据转换为BGR图像
+
+        Args:
+            data: 原始screencap数据 (bytes/bytearray/memoryview)
+            total_size: 有效数据长度 (默认为len(data))
+            out: 输出缓冲区 (默认使用内部轮转缓冲区)
+
+        Returns:
+            BGR图像
+        """
+        pixels, code = self.map_pixels(data, total_size)
+
+        if out is None:
+            self._ensure_buffers(self.width, self.height, self.pixel_format)
+            out = self._outputs[self._next_output]
+            self._next_output = (self._next_output + 1) % self.num_buffers
+
+        cv2.cvtColor(pixels, code, dst=out)
+        return out
+
+    def map_pixels(self, data, total_size: Optional[int] = None) -> Tuple[np.ndarray, int]:
+        """
+        零拷贝映射像素区 (不做颜色转换)
+
+        Args:
+            data: 原始screencap数据
+            total_size: 有效数据长度 (默认为len(data))
+
+        Returns:
+            (HxWxC像素视图, 转BGR的cvtColor代码)
+        """
+        if total_size is None:
+            total_size = len(data)
+
+        width, height, pixel_format, header_size = self.parse_header(data, total_size)
+        bpp, code = _FORMATS[pixel_format]
+
+        pixels = np.frombuffer(
+            data, dtype=np.uint8, count=width * height * bpp, offset=header_size
+        ).reshape(height, width, bpp)
+
+        if (width, height, pixel_format) != (self.width, self.height, self.pixel_format):
+            self._outputs = []
+            self.width, self.height, self.pixel_format = width, height, pixel_format
+        self.header_size = header_size
+        self.frames_parsed += 1
+        return pixels, code
+
+    def read_from(self, stream: BinaryIO, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """
+        从流中读取一帧 (读到EOF为止) 并解析
+
+        Args:
+            stream: 二进制流 (如adb exec-out的stdout)
+            out: 输出缓冲区 (可选)
+
+        Returns:
+            BGR图像, 数据不完整时返回None
+        """
+        raw = self._read_raw(stream)
+        if raw is None:
+            return None
+
+        try:
+            return self.decode(raw, len(raw), out=out)
+        except ValueError as e:
+            print(f"✗ 原始帧解析失败: {e}")
+            return None
+
+    def read_pixels(self, stream: BinaryIO) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        从流中读取一帧, 只映射像素不做颜色转换 (用于ROI裁剪后再转换)
+
+        Returns:
+            (像素视图, cvtColor代码), 数据不完整时返回None
+        """
+        raw = self._read_raw(stream)
+        if raw is None:
+            return None
+
+        try:
+            return self.map_pixels(raw, len(raw))
+        except ValueError as e:
+            print(f"✗ 原始帧解析失败: {e}")
+            return None
+
+    def _read_raw(self, stream: BinaryIO) -> Optional[memoryview]:
+        """把一帧原始数据读入复用缓冲区"""
+        # 先读固定头得到尺寸, 再把剩余数据readinto到复用缓冲区
+        header = stream.read(RAW_HEADER_SIZE)
+        if not header or len(header) < RAW_HEADER_SIZE:
+            return None
+
+        width, height, pixel_format = struct.unpack('<III', header)
+        if pixel_format not in _FORMATS:
+            raise ValueError(f"不支持的像素格式: {pixel_format}")
+
+        max_size = RAW_HEADER_SIZE_V2 + width * height * _FORMATS[pixel_format][0]
+        buf = self._raw_buffer(max_size)
+        view = memoryview(buf)
+        view[:RAW_HEADER_SIZE] = header
+
+        received = RAW_HEADER_SIZE
+        while received < max_size:
+            n = stream.readinto(view[received:max_size])
+            if not n:
+                break
+            received += n
+
+        return view[:received]
+
+
+class RawScreencapReader:
+    """通过 adb exec-out screencap 读取原始帧缓冲"""
+
+    def __init__(
+        self,
+        device_id: Optional[str] = None,
+        adb_path: str = "adb",
+        num_buffers: int = 3,
+        timeout: float = 5.0
+    ):
+        """
+        Args:
+            device_id: 设备序列号 (可选)
+            adb_path: adb可执行文件路径
+            num_buffers: BGR输出缓冲区数量
+            timeout: 单帧超时(秒)
+        """
+        self.cmd = [adb_path]
+        if device_id:
+            self.cmd += ['-s', device_id]
+        self.cmd += ['exec-out', 'screencap']
+
+        self.timeout = timeout
+        self.parser = RawFramebufferParser(num_buffers=num_buffers)
+
+    def read(self, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """读取一帧BGR图像"""
+        return self._run(lambda stdout: self.parser.read_from(stdout, out=out))
+
+    def read_pixels(self) -> Optional[Tuple[np.ndarray, int]]:
+        """读取一帧未转换颜色的像素视图 - 返回 (pixels, cvtColor代码)"""
+        return self._run(self.parser.read_pixels)
+
+    def _run(self, reader):
+        """执行screencap并用reader解析stdout"""
+        proc = subprocess.Popen(self.cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=0)
+        try:
+            result = reader(proc.stdout)
+            proc.wait(timeout=self.timeout)
+            return result
+        except subprocess.TimeoutExpired:
+            print("✗ screencap超时")
+            return None
+        finally:
+            # 解析出错或超时时进程可能仍在运行, 结束并回收, 避免残留僵尸进程
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+
+
+def make_raw_dump(image_bgr: np.ndarray, pixel_format: int = PIXEL_FORMAT_RGBA_8888, colorspace: Optional[int] = 1) -> bytes:
+    """
+    把BGR图像编码为screencap原始格式 (用于生成测试数据)
+
+    Args:
+        image_bgr: BGR图像
+        pixel_format: 像素格式
+        colorspace: Android 9+ 的colorspace字段, None表示旧版12字节头
+
+    Returns:
+        原始dump数据
+    """
+    height, width = image_bgr.shape[:2]
+    if pixel_format in (PIXEL_FORMAT_RGBA_8888, PIXEL_FORMAT_RGBX_8888):
+        pixels = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGBA)
+    elif pixel_format == PIXEL_FORMAT_BGRA_8888:
+        pixels = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2BGRA)
+    elif pixel_format == PIXEL_FORMAT_RGB_888:
+        pixels = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
+    else:
+        raise ValueError(f"不支持的像素格式: {pixel_format}")
+
+    header = struct.pack('<III', width, height, pixel_format)
+    if colorspace is not None:
+        header += struct.pack('<I', colorspace)
+    return header + np.ascontiguousarray(pixels).tobytes()
@@ -0,0 +1,220 @@
+"""
+回放捕获 - 从录制的视频或帧归档中读取画面
+Replay Capture - Stream frames from a recorded video or a memory-mapped frame archive
+"""
+
+import time
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import cv2
+
+from .screen_capture import BaseCapture
+
+
+TIMING_MODES = ("original", "fixed", "max")
+
+
+def timestamps_path(archive_path: Path) -> Path:
+    """帧归档对应的时间戳文件路径"""
+    return archive_path.with_name(archive_path.stem + "_timestamps.npy")
+
+
+def save_frame_archive(
+    path: str,
+    frames: Sequence[np.ndarray],
+    timestamps: Optional[Sequence[float]] = None
+):
+    """
+    保存帧归档 (.npy, 形状 N x H x W x 3)
+
+    Args:
+        path: 输出路径
+        frames: 同尺寸BGR帧序列
+        timestamps: 每帧采集时间 (可选, 用于按原始节奏回放)
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    first = frames[0]
+    archive = np.lib.format.open_memmap(
+        str(path), mode='w+', dtype=np.uint8, shape=(len(frames),) + first.shape
+    )
+    for i, frame in enumerate(frames):
+        archive[i] = frame
+    archive.flush()
+    del archive
+
+    if timestamps is not None:
+        np.save(str(timestamps_path(path)), np.asarray(timestamps, dtype=np.float64))
+
+
+class ReplayCapture(BaseCapture):
+    """
+    回放捕获
+
+    支持视频文件 (cv2.VideoCapture) 和 .npy 帧归档 (np.load mmap_mode='r')。
+    timing:
+        original: 按录制时的节奏回放 (视频按容器帧率, 归档按_timestamps.npy)
+        fixed:    按固定FPS回放
+        max:      尽可能快
+    """
+
+    def __init__(
+        self,
+        path: str,
+        timing: str = "max",
+        fps: float = 30.0,
+        loop: bool = False
+    ):
+        """
+        Args:
+            path: 视频文件或.npy帧归档路径
+            timing: 回放节奏 original / fixed / max
+            fps: fixed模式的帧率, 也是original模式缺少时间戳时的默认帧率
+            loop: 播放结束后是否从头循环
+        """
+        super().__init__(device_id=None)
+
+        if timing not in TIMING_MODES:
+            raise ValueError(f"不支持的回放节奏: {timing}")
+
+        self.path = Path(path)
+        self.timing = timing
+        self.fps = fps
+        self.loop = loop
+
+        # 回放没有真实设备, 控制器使用空操作实现
+        self.device = None
+
+        self._video: Optional[cv2.VideoCapture] = None
+        self._archive: Optional[np.ndarray] = None
+        self._timestamps: Optional[np.ndarray] = None
+        self._index = 0
+        self._start_time = 0.0
+        self._offset = 0.0
+
+        # 统计信息
+        self.frames_read = 0
+
+    @property
+    def is_archive(self) -> bool:
+        return self.path.suffix.lower() == '.npy'
+
+    def connect(self) -> bool:
+        """打开回放源"""
+        if not self.path.exists():
+            print(f"✗ 回放文件不存在: {self.path}")
+            return False
+
+        if self.is_archive:
+            self._archive = np.load(str(self.path), mmap_mode='r')
+            if self._archive.ndim != 4:
+                print(f"✗ 帧归档形状应为 N x H x W x C: {self._archive.shape}")
+                return False
+            ts_path = timestamps_path(self.path)
+            if ts_path.exists():
+                self._timestamps = np.load(str(ts_path))
+            frame_count = len(self._archive)
+        else:
+            self._video = cv2.VideoCapture(str(self.path))
+            if not self._video.isOpened():
+                print(f"✗ 视频打开失败: {self.path}")
+                return False
+            video_fps = self._video.get(cv2.CAP_PROP_FPS)
+            if self.timing == "original" and video_fps > 0:
+                self.fps = video_fps
+            frame_count = int(self._video.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        self.is_connected = True
+        self.finished = False
+        self._index = 0
+        self._start_time = time.time()
+        self._offset = 0.0
+        self.screen_size = self.get_screen_size()
+
+        print(f"✓ 回放源已打开: {self.path.name}")
+        print(f"  帧数: {frame_count}  尺寸: {self.screen_size}  节奏: {self.timing}")
+        return True
+
+    def disconnect(self):
+        """关闭回放源"""
+        if self._video is not None:
+            self._video.release()
+            self._video = None
+        self._archive = None
+        self.is_connected = False
+        print("✓ 回放已停止")
+
+    def _frame_time(self, index: int) -> float:
+        """第index帧相对回放开始的时间(秒)"""
+        if self.timing == "original":
+            if self._timestamps is not None and index < len(self._timestamps):
+                return float(self._timestamps[index] - self._timestamps[0])
+        return index / self.fps if self.fps > 0 else 0.0
+
+    def _rewind(self) -> bool:
+        """回到开头, 返回是否成功"""
+        if not self.loop:
+            self.finished = True
+            return False
+
+        # 新一轮的时间基准接在上一轮之后
+        self._offset = time.time() - self._start_time
+        self._index = 0
+        if self._video is not None:
+            self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return True
+
+    def _read_next(self) -> Optional[np.ndarray]:
+        """按顺序读取下一帧"""
+        if self._archive is not None:
+            if self._index >= len(self._archive) and not self._rewind():
+                return None
+            frame = self._archive[self._index]
+            if self.frame_pool:
+                out = self.frame_pool.acquire(frame.shape, frame.dtype)
+                np.copyto(out, frame)
+                return out
+            return frame
+
+        ok, frame = self._video.read()
+        if not ok:
+            if not self._rewind():
+                return None
+            ok, frame = self._video.read()
+            if not ok:
+                self.finished = True
+                return None
+        return frame
+
+    def get_screenshot(self) -> Optional[np.ndarray]:
+        """读取下一帧, 按回放节奏等待"""
+        if not self.is_connected or self.finished:
+            return None
+
+        frame = self._read_next()
+        if frame is None:
+            return None
+
+        if self.timing != "max":
+            due = self._start_time + self._offset + self._frame_time(self._index)
+            delay = due - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+        self._index += 1
+        self.frames_read += 1
+        return frame
+
+    def get_screen_size(self) -> Tuple[int, int]:
+        """获取帧尺寸 (width, height)"""
+        if self._archive is not None:
+            return (self._archive.shape[2], self._archive.shape[1])
+        if self._video is not None:
+            return (
+                int(self._video.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                int(self._video.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            )
+        return (0, 0)
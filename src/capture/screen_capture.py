@@ -4,11 +4,20 @@ Screen Capture Module - Support for Android and iOS devices
 """
 
 import time
+import asyncio
 import numpy as np
 from abc import ABC, abstractmethod
 from typing import Optional, Tuple
 import cv2
 
+from .stream_capture import MinicapStream
+from .mjpeg_capture import MjpegStream
+from .raw_capture import RawScreencapReader
+from .threaded_capture import CaptureThread, CapturedFrame
+from .frame_pool import FramePool
+from .transform import CaptureProfile
+from .wda_async import AsyncWDASession
+
 
 class BaseCapture(ABC):
     """屏幕捕获基类"""
@@ -17,6 +26,10 @@ class BaseCapture(ABC):
         self.device_id = device_id
         self.is_connected = False
         self.screen_size: Optional[Tuple[int, int]] = None
+        # 画面源已结束 (仅回放等有限源会置为True)
+        self.finished = False
+        # 帧缓冲池 (可选), 设置后截图解码到池中的复用缓冲区
+        self.frame_pool: Optional[FramePool] = None
 
     @abstractmethod
     def connect(self) -> bool:
@@ -38,13 +51,47 @@ class BaseCapture(ABC):
         """获取屏幕尺寸"""
         pass
 
+    async def get_screenshot_async(self) -> Optional[np.ndarray]:
+        """异步截图 - 默认在线程池中执行同步截图"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get_screenshot)
+
+    async def close_async(self):
+        """释放异步资源 (默认无)"""
+        pass
+
 
 class AndroidCapture(BaseCapture):
     """Android设备屏幕捕获"""
 
-    def __init__(self, device_id: Optional[str] = None):
+    def __init__(
+        self,
+        device_id: Optional[str] = None,
+        mode: str = "screenshot",
+        stream_port: int = 1313,
+        minicap_dir: str = "/data/local/tmp",
+        stream_scale: float = 1.0
+    ):
+        """
+        Args:
+            device_id: 设备ID (可选)
+            mode: 截图模式 "screenshot" (uiautomator2截图), "stream" (minicap流)
+                  或 "raw" (adb exec-out screencap原始帧缓冲)
+            stream_port: minicap转发到本地的端口
+            minicap_dir: 设备上minicap及minicap.so所在目录
+            stream_scale: minicap在设备端的缩放比例 (0, 1]
+        """
         super().__init__(device_id)
         self.device = None
+        self.mode = mode
+        self.stream_port = stream_port
+        self.minicap_dir = minicap_dir
+        self.stream_scale = stream_scale
+
+        self.stream: Optional[MinicapStream] = None
+        self.raw_reader: Optional[RawScreencapReader] = None
+        self._adb_device = None
+        self._minicap_conn = None
 
     def connect(self) -> bool:
         """连接Android设备"""
@@ -60,6 +107,13 @@ class AndroidCapture(BaseCapture):
             self.screen_size = self.get_screen_size()
             print(f"✓ Android设备已连接: {self.device.device_info.get('productName', 'Unknown')}")
             print(f"  屏幕尺寸: {self.screen_size}")
+
+            if self.mode == "stream" and not self._start_stream():
+                print("  minicap流启动失败，回退到普通截图")
+            elif self.mode == "raw":
+                # 双缓冲 + 消费者持有 + 正在写入, 共需4个输出缓冲区
+                self.raw_reader = RawScreencapReader(self.device_id, num_buffers=4)
+
             return True
 
         except Exception as e:
@@ -69,11 +123,62 @@ class AndroidCapture(BaseCapture):
 
     def disconnect(self):
         """断开连接"""
+        self._stop_stream()
+        self.raw_reader = None
         if self.device:
             self.device = None
         self.is_connected = False
         print("✓ 设备已断开")
 
+    def _start_stream(self) -> bool:
+        """在设备上启动minicap, 转发端口并建立持久连接"""
+        try:
+            import adbutils
+
+            self._adb_device = adbutils.adb.device(serial=self.device_id)
+
+            # 设备端按stream_scale缩放, 减少编码与传输量
+            width, height = self.screen_size
+            virtual_width = max(1, int(round(width * self.stream_scale)))
+            virtual_height = max(1, int(round(height * self.stream_scale)))
+            cmd = (
+                f"LD_LIBRARY_PATH={self.minicap_dir} {self.minicap_dir}/minicap "
+                f"-P {width}x{height}@{virtual_width}x{virtual_height}/0"
+            )
+            self._minicap_conn = self._adb_device.shell(cmd, stream=True)
+            self._adb_device.forward(f"tcp:{self.stream_port}", "localabstract:minicap")
+
+        except ImportError:
+            print("✗ 请安装adbutils: pip install adbutils")
+            return False
+        except Exception as e:
+            print(f"✗ minicap启动失败: {e}")
+            return False
+
+        # minicap启动需要一点时间, 重试连接
+        self.stream = MinicapStream(port=self.stream_port, frame_pool=self.frame_pool)
+        for _ in range(10):
+            if self.stream.start():
+                banner = self.stream.banner
+                print(f"✓ minicap流已连接: {banner['virtual_width']}x{banner['virtual_height']}")
+                return True
+            time.sleep(0.3)
+
+        self._stop_stream()
+        return False
+
+    def _stop_stream(self):
+        """停止minicap流"""
+        if self.stream:
+            self.stream.stop()
+            self.stream = None
+        if self._minicap_conn:
+            try:
+                self._minicap_conn.close()
+            except Exception:
+                pass
+            self._minicap_conn = None
+
     def get_screenshot(self) -> Optional[np.ndarray]:
         """获取屏幕截图 - 返回BGR格式的numpy数组"""
         if not self.is_connected or not self.device:
@@ -82,6 +187,10 @@ class AndroidCapture(BaseCapture):
 
         try:
             # 使用uiautomator2截图
+            if self.frame_pool:
+                data = self.device.screenshot(format='raw')
+                return self.frame_pool.decode_into(data)
+
             screenshot = self.device.screenshot(format='opencv')
             return screenshot
 
@@ -97,27 +206,103 @@ class AndroidCapture(BaseCapture):
         return (0, 0)
 
     def get_screenshot_fast(self) -> Optional[np.ndarray]:
-        """快速截图 - 使用minicap (需要额外配置)"""
-        # TODO: 实现minicap快速截图
+        """快速截图 - 读取minicap流的最新帧 (不阻塞), 流不可用时回退到普通截图"""
+        if self.stream and self.stream.is_running:
+            frame = self.stream.read()
+            if frame is not None:
+                return frame
         return self.get_screenshot()
 
+    def get_screenshot_raw(self) -> Optional[np.ndarray]:
+        """
+        原始帧缓冲截图 - 跳过设备端PNG编码
+
+        返回的图像位于轮转复用的缓冲区中, 需要长期保存时请自行copy()
+        """
+        if not self.is_connected or not self.raw_reader:
+            print("✗ 设备未连接")
+            return None
+
+        try:
+            if self.frame_pool:
+                parser = self.raw_reader.parser
+                if parser.width and parser.height:
+                    out = self.frame_pool.acquire((parser.height, parser.width, 3))
+                    frame = self.raw_reader.read(out=out)
+                    if frame is None:
+                        self.frame_pool.release(out)
+                    return frame
+
+            return self.raw_reader.read()
+        except Exception as e:
+            print(f"✗ 原始截图失败: {e}")
+            return None
+
+    def get_raw_pixels(self) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        读取未转换颜色的原始像素视图, 供ROI裁剪后只转换所需区域
+
+        Returns:
+            (像素视图, cvtColor代码), 失败返回None
+        """
+        if not self.is_connected or not self.raw_reader:
+            print("✗ 设备未连接")
+            return None
+
+        try:
+            return self.raw_reader.read_pixels()
+        except Exception as e:
+            print(f"✗ 原始截图失败: {e}")
+            return None
+
 
 class IOSCapture(BaseCapture):
     """iOS设备屏幕捕获 (需要WebDriverAgent)"""
 
-    def __init__(self, device_id: Optional[str] = None, wda_port: int = 8100):
+    def __init__(
+        self,
+        device_id: Optional[str] = None,
+        wda_port: int = 8100,
+        wda_host: str = "localhost",
+        max_in_flight: int = 4,
+        mode: str = "screenshot",
+        mjpeg_port: int = 9100,
+        mjpeg_scale: float = 1.0,
+        mjpeg_fps: int = 0
+    ):
+        """
+        Args:
+            device_id: 设备ID (可选)
+            wda_port: WDA端口
+            wda_host: WDA地址
+            max_in_flight: 异步截图的最大并发请求数
+            mode: 截图模式 "screenshot" (WDA截图接口) 或 "mjpeg" (WDA的MJPEG推流)
+            mjpeg_port: MJPEG服务端口 (需用iproxy转发到本地)
+            mjpeg_scale: MJPEG在设备端的缩放比例 (0, 1]
+            mjpeg_fps: MJPEG推流帧率 (0表示使用WDA当前设置)
+        """
         super().__init__(device_id)
         self.wda_port = wda_port
+        self.wda_host = wda_host
+        self.wda_url = f"http://{wda_host}:{wda_port}"
         self.client = None
 
+        self.mode = mode
+        self.mjpeg_port = mjpeg_port
+        self.mjpeg_scale = mjpeg_scale
+        self.mjpeg_fps = mjpeg_fps
+        self.stream: Optional[MjpegStream] = None
+
+        # 异步keep-alive会话 (首次异步调用时在事件循环内创建)
+        self.async_session = AsyncWDASession(self.wda_url, max_in_flight=max_in_flight)
+
     def connect(self) -> bool:
         """连接iOS设备"""
         try:
             import wda
 
             # 连接到WebDriverAgent
-            wda_url = f"http://localhost:{self.wda_port}"
-            self.client = wda.Client(wda_url)
+            self.client = wda.Client(self.wda_url)
 
             # 测试连接
             status = self.client.status()
@@ -126,6 +311,10 @@ class IOSCapture(BaseCapture):
             self.screen_size = self.get_screen_size()
             print(f"✓ iOS设备已连接")
             print(f"  屏幕尺寸: {self.screen_size}")
+
+            if self.mode == "mjpeg" and not self._start_mjpeg():
+                print("  MJPEG流启动失败，回退到普通截图")
+
             return True
 
         except Exception as e:
@@ -136,11 +325,45 @@ class IOSCapture(BaseCapture):
 
     def disconnect(self):
         """断开连接"""
+        self._stop_mjpeg()
         if self.client:
             self.client = None
         self.is_connected = False
         print("✓ 设备已断开")
 
+    def _start_mjpeg(self) -> bool:
+        """配置WDA的MJPEG推流参数并建立持久连接"""
+        settings = {'mjpegScalingFactor': int(round(self.mjpeg_scale * 100))}
+        if self.mjpeg_fps:
+            settings['mjpegServerFramerate'] = int(self.mjpeg_fps)
+        if self.client is not None:
+            try:
+                self.client.appium_settings(settings)
+            except Exception as e:
+                print(f"  MJPEG参数设置失败, 使用WDA默认值: {e}")
+
+        self.stream = MjpegStream(host=self.wda_host, port=self.mjpeg_port, frame_pool=self.frame_pool)
+        if self.stream.start():
+            print(f"✓ MJPEG流已连接: {self.wda_host}:{self.mjpeg_port}")
+            return True
+
+        self.stream = None
+        return False
+
+    def _stop_mjpeg(self):
+        """停止MJPEG流"""
+        if self.stream:
+            self.stream.stop()
+            self.stream = None
+
+    def get_screenshot_fast(self) -> Optional[np.ndarray]:
+        """快速截图 - 读取MJPEG流的最新帧 (不阻塞), 流不可用时回退到普通截图"""
+        if self.stream and self.stream.is_running:
+            frame = self.stream.read()
+            if frame is not None:
+                return frame
+        return self.get_screenshot()
+
     def get_screenshot(self) -> Optional[np.ndarray]:
         """获取屏幕截图"""
         if not self.is_connected or not self.client:
@@ -148,6 +371,10 @@ class IOSCapture(BaseCapture):
             return None
 
         try:
+            if self.frame_pool:
+                data = self.client.screenshot(format='raw')
+                return self.frame_pool.decode_into(data)
+
             # 获取截图 (PIL Image)
             screenshot = self.client.screenshot(format='opencv')
             return screenshot
@@ -161,43 +388,313 @@ class IOSCapture(BaseCapture):
         if self.client:
             window_size = self.client.window_size()
             return (window_size.width, window_size.height)
+        if self.screen_size:
+            return self.screen_size
         return (0, 0)
 
+    async def connect_async(self) -> bool:
+        """仅通过异步会话连接 (不依赖facebook-wda, 只支持截图)"""
+        try:
+            await self.async_session.status()
+            self.screen_size = await self.async_session.window_size()
+            self.is_connected = True
+            print("✓ iOS设备已连接 (异步会话)")
+            print(f"  屏幕尺寸: {self.screen_size}")
+
+            if self.mode == "mjpeg":
+                loop = asyncio.get_running_loop()
+                if not await loop.run_in_executor(None, self._start_mjpeg):
+                    print("  MJPEG流启动失败，回退到普通截图")
+
+            return True
+
+        except Exception as e:
+            print(f"✗ iOS设备连接失败: {e}")
+            print("  提示: 确保WebDriverAgent已启动")
+            self.is_connected = False
+            return False
+
+    async def get_screenshot_async(self) -> Optional[np.ndarray]:
+        """异步截图 - 复用keep-alive连接池, 解码在线程池中执行"""
+        if not self.is_connected:
+            print("✗ 设备未连接")
+            return None
+
+        # MJPEG流已在后台解码, 直接取最新帧
+        if self.stream and self.stream.is_running:
+            frame = self.stream.read(wait_first=0)
+            if frame is not None:
+                return frame
+
+        try:
+            data = await self.async_session.screenshot_bytes()
+            if data is None:
+                return None
+
+            loop = asyncio.get_running_loop()
+            if self.frame_pool:
+                return await loop.run_in_executor(None, self.frame_pool.decode_into, data)
+            return await loop.run_in_executor(
+                None, cv2.imdecode, np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR
+            )
+
+        except Exception as e:
+            print(f"✗ 异步截图失败: {e}")
+            return None
+
+    async def close_async(self):
+        """关闭异步会话"""
+        self._stop_mjpeg()
+        await self.async_session.close()
+
 
 class CaptureManager:
     """屏幕捕获管理器 - 统一接口"""
 
-    def __init__(self, platform: str = "android", device_id: Optional[str] = None):
+    def __init__(
+        self,
+        platform: str = "android",
+        device_id: Optional[str] = None,
+        mode: str = "screenshot",
+        stream_port: int = 1313,
+        threaded: bool = False,
+        buffer_size: int = 2,
+        drop_policy: str = "latest",
+        max_frame_age: float = 0.0,
+        frame_pool: Optional[FramePool] = None,
+        profile: Optional[CaptureProfile] = None,
+        replay: Optional[dict] = None,
+        wda_port: int = 8100,
+        mjpeg_port: int = 9100
+    ):
         """
         初始化捕获管理器
 
         Args:
-            platform: 平台类型 "android" 或 "ios"
+            platform: 平台类型 "android", "ios" 或 "replay" (回放录制的画面)
             device_id: 设备ID (可选)
+            mode: 截图模式 "screenshot", "stream" / "raw" (仅Android) 或 "mjpeg" (仅iOS)
+            stream_port: minicap流本地端口 (仅Android)
+            threaded: 是否启用后台采集线程
+            buffer_size: 后台采集缓冲区大小 (2为双缓冲)
+            drop_policy: 丢帧策略 latest / oldest / block
+            max_frame_age: 帧最大年龄(秒), 0表示不限制
+            frame_pool: 帧缓冲池 (可选), 启用后需对get_frame_info()的结果调用release()
+            profile: 默认采集配置 (ROI/缩放), None表示全屏原尺寸
+            replay: 回放配置 (仅replay平台) {path, timing, fps, loop}
+            wda_port: WebDriverAgent端口 (仅iOS)
+            mjpeg_port: WebDriverAgent的MJPEG服务端口 (仅iOS)
         """
         self.platform = platform.lower()
+        self.mode = mode
+        self.profile = profile
         self.capture: Optional[BaseCapture] = None
 
+        self.threaded = threaded
+        self.capture_thread: Optional[CaptureThread] = None
+        if threaded:
+            self.capture_thread = CaptureThread(
+                lambda: self._capture(self.profile),
+                buffer_size=buffer_size,
+                drop_policy=drop_policy,
+                max_frame_age=max_frame_age
+            )
+        self._seq = 0
+        self._profile_warned = False
+
         if self.platform == "android":
-            self.capture = AndroidCapture(device_id)
+            # minicap支持在设备端缩放
+            stream_scale = profile.scale if profile else 1.0
+            self.capture = AndroidCapture(
+                device_id, mode=mode, stream_port=stream_port, stream_scale=stream_scale
+            )
         elif self.platform == "ios":
-            self.capture = IOSCapture(device_id)
+            # MJPEG支持在设备端缩放
+            mjpeg_scale = profile.scale if profile else 1.0
+            self.capture = IOSCapture(
+                device_id, wda_port=wda_port, mode=mode, mjpeg_port=mjpeg_port, mjpeg_scale=mjpeg_scale
+            )
+        elif self.platform == "replay":
+            from .replay_capture import ReplayCapture
+            replay_config = replay or {}
+            self.capture = ReplayCapture(
+                path=replay_config.get('path', ''),
+                timing=replay_config.get('timing', 'max'),
+                fps=replay_config.get('fps', 30.0),
+                loop=replay_config.get('loop', False)
+            )
         else:
             raise ValueError(f"不支持的平台: {platform}")
 
+        self.frame_pool = frame_pool
+        self.capture.frame_pool = frame_pool
+
     def connect(self) -> bool:
         """连接设备"""
-        return self.capture.connect()
+        if not self.capture.connect():
+            return False
+        if self.capture_thread:
+            self.capture_thread.start()
+        return True
 
     def disconnect(self):
         """断开设备"""
+        if self.capture_thread:
+            self.capture_thread.stop()
         if self.capture:
             self.capture.disconnect()
 
-    def get_frame(self) -> Optional[np.ndarray]:
-        """获取单帧画面"""
+    def _grab(self) -> Optional[np.ndarray]:
+        """从后端采集一帧"""
+        if isinstance(self.capture, AndroidCapture):
+            if self.mode == "stream":
+                return self.capture.get_screenshot_fast()
+            if self.mode == "raw":
+                return self.capture.get_screenshot_raw()
+        elif isinstance(self.capture, IOSCapture) and self.mode == "mjpeg":
+            return self.capture.get_screenshot_fast()
         return self.capture.get_screenshot()
 
+    def _capture(self, profile: Optional[CaptureProfile]) -> Optional[CapturedFrame]:
+        """采集一帧并尽早应用ROI/缩放 (序号由调用方填写)"""
+        if profile is None:
+            image = self._grab()
+            if image is None:
+                return None
+            return CapturedFrame(image, 0, time.time(), pool=self.frame_pool)
+
+        screen_size = self.capture.screen_size
+
+        # 原始帧缓冲: 在颜色转换之前裁剪, 只转换ROI内的像素
+        if self.mode == "raw" and isinstance(self.capture, AndroidCapture):
+            raw = self.capture.get_raw_pixels()
+            if raw is None:
+                return None
+            pixels, code = raw
+            image, transform = profile.apply(pixels, screen_size, color_code=code)
+            return CapturedFrame(image, 0, time.time(), transform=transform)
+
+        return self._apply_profile(self._grab(), profile)
+
+    def _apply_profile(
+        self,
+        source: Optional[np.ndarray],
+        profile: Optional[CaptureProfile]
+    ) -> Optional[CapturedFrame]:
+        """把采集到的图像包装为CapturedFrame, 按需应用ROI/缩放"""
+        if source is None:
+            return None
+        if profile is None:
+            return CapturedFrame(source, 0, time.time(), pool=self.frame_pool)
+
+        image, transform = profile.apply(source, self.capture.screen_size)
+        if np.shares_memory(image, source):
+            # 裁剪结果是原缓冲区的视图, 原缓冲区随帧一起归还
+            return CapturedFrame(image, 0, time.time(), pool=self.frame_pool, transform=transform, buffer=source)
+
+        if self.frame_pool:
+            self.frame_pool.release(source)
+        return CapturedFrame(image, 0, time.time(), transform=transform)
+
+    def get_frame(self, profile: Optional[CaptureProfile] = None) -> Optional[np.ndarray]:
+        """
+        获取单帧画面
+
+        Args:
+            profile: 采集配置 (ROI/缩放), 默认使用构造时的配置
+        """
+        info = self.get_frame_info(profile=profile)
+        return info.image if info is not None else None
+
+    def get_frame_info(
+        self,
+        timeout: float = 1.0,
+        profile: Optional[CaptureProfile] = None
+    ) -> Optional[CapturedFrame]:
+        """
+        获取单帧画面及其元数据 (序号、采集时间、坐标变换)
+
+        Args:
+            timeout: 后台采集模式下等待新帧的最长时间(秒)
+            profile: 采集配置 (ROI/缩放), 默认使用构造时的配置;
+                后台采集模式下仅在默认配置为全屏原尺寸时生效
+
+        Returns:
+            采集帧或None
+        """
+        if self.capture_thread:
+            frame = self.capture_thread.get(timeout)
+            if frame is None or profile is None or profile is self.profile:
+                return frame
+            if self.profile is not None and not self.profile.is_full_frame:
+                # 帧已按默认配置裁剪/缩放, 无法再按屏幕坐标应用临时配置, 退回默认配置的帧
+                if not self._profile_warned:
+                    print("✗ 后台采集已应用默认采集配置, 忽略临时采集配置")
+                    self._profile_warned = True
+                return frame
+
+            # 后台线程采集全屏原尺寸, 临时配置在消费端应用
+            image, transform = profile.apply(frame.image, self.capture.screen_size)
+            if not np.shares_memory(image, frame.image):
+                frame.release()
+                return CapturedFrame(image, frame.seq, frame.timestamp, transform=transform)
+            frame.image, frame.transform = image, transform
+            return frame
+
+        frame = self._capture(profile if profile is not None else self.profile)
+        if frame is None:
+            return None
+        self._seq += 1
+        frame.seq = self._seq
+        return frame
+
+    async def get_frame_async(
+        self,
+        timeout: float = 1.0,
+        profile: Optional[CaptureProfile] = None
+    ) -> Optional[CapturedFrame]:
+        """
+        异步获取单帧画面 - 一个事件循环中可同时有多个采集在途
+
+        Args:
+            timeout: 后台采集模式下等待新帧的最长时间(秒)
+            profile: 采集配置 (ROI/缩放), 默认使用构造时的配置
+
+        Returns:
+            采集帧或None
+        """
+        loop = asyncio.get_running_loop()
+
+        if self.capture_thread:
+            return await loop.run_in_executor(None, self.get_frame_info, timeout, profile)
+
+        profile = profile if profile is not None else self.profile
+
+        if isinstance(self.capture, IOSCapture):
+            image = await self.capture.get_screenshot_async()
+            frame = self._apply_profile(image, profile)
+        else:
+            frame = await loop.run_in_executor(None, self._capture, profile)
+
+        if frame is None:
+            return None
+        self._seq += 1
+        frame.seq = self._seq
+        return frame
+
+    async def disconnect_async(self):
+        """断开设备并关闭异步会话"""
+        if self.capture:
+            await self.capture.close_async()
+        self.disconnect()
+
+    def get_stats(self) -> dict:
+        """获取采集统计"""
+        stats = self.capture_thread.get_stats() if self.capture_thread else {}
+        if self.frame_pool:
+            stats['pool'] = self.frame_pool.get_stats()
+        return stats
+
     def get_screen_size(self) -> Tuple[int, int]:
         """获取屏幕尺寸"""
         return self.capture.get_screen_size()
@@ -206,6 +703,10 @@ class CaptureManager:
         """检查连接状态"""
         return self.capture.is_connected if self.capture else False
 
+    def is_finished(self) -> bool:
+        """画面源是否已结束 (回放播放完毕)"""
+        return self.capture.finished if self.capture else False
+
 
 # 测试代码
 if __name__ == "__main__":
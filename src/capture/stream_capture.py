@@ -0,0 +1,319 @@
+"""
+流式屏幕捕获模块 - 基于minicap协议的持久连接
+Stream Capture Module - Persistent socket capture using the minicap protocol
+"""
+
+import socket
+import struct
+import threading
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+import cv2
+
+from .frame_pool import FramePool
+
+
+# minicap banner固定为24字节
+MINICAP_BANNER_SIZE = 24
+
+
+class LatestFrameSlot:
+    """
+    最新帧槽位 - 只保留最新一帧, 读取不阻塞
+
+    使用帧缓冲池时, 槽位持有当前帧的一个引用, 被覆盖时归还;
+    get(retain=True) 在锁内为调用方增加引用, 调用方用完后需release()。
+    """
+
+    def __init__(self, frame_pool: Optional[FramePool] = None):
+        """
+        Args:
+            frame_pool: 帧缓冲池 (可选)
+        """
+        self.frame_pool = frame_pool
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._frame: Optional[np.ndarray] = None
+        self._seq = 0
+        self._timestamp = 0.0
+
+    def put(self, frame: np.ndarray, timestamp: Optional[float] = None):
+        """写入新帧 (覆盖旧帧)"""
+        with self._cond:
+            if self.frame_pool is not None:
+                self.frame_pool.release(self._frame)
+            self._frame = frame
+            self._seq += 1
+            self._timestamp = timestamp if timestamp is not None else time.time()
+            self._cond.notify_all()
+
+    def get(self, retain: bool = False) -> Tuple[Optional[np.ndarray], int, float]:
+        """读取最新帧 - 返回 (frame, seq, timestamp), 不阻塞"""
+        with self._lock:
+            if retain and self.frame_pool is not None and self._frame is not None:
+                self.frame_pool.retain(self._frame)
+            return self._frame, self._seq, self._timestamp
+
+    def wait_newer(
+        self,
+        seq: int,
+        timeout: float = 1.0,
+        retain: bool = False
+    ) -> Tuple[Optional[np.ndarray], int, float]:
+        """等待比seq更新的帧, 超时返回当前帧"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > seq, timeout=timeout)
+            if retain and self.frame_pool is not None and self._frame is not None:
+                self.frame_pool.retain(self._frame)
+            return self._frame, self._seq, self._timestamp
+
+    def clear(self):
+        """清空槽位"""
+        with self._lock:
+            if self.frame_pool is not None:
+                self.frame_pool.release(self._frame)
+            self._frame = None
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+
+def parse_minicap_banner(data: bytes) -> dict:
+    """
+    解析minicap banner
+
+    Args:
+        data: 24字节banner数据
+
+    Returns:
+        banner字段字典
+    """
+    if len(data) < MINICAP_BANNER_SIZE:
+        raise ValueError(f"banner长度不足: {len(data)}")
+
+    (version, length, pid, real_width, real_height,
+     virtual_width, virtual_height, orientation, quirks) = struct.unpack(
+        '<BBIIIIIBB', data[:MINICAP_BANNER_SIZE]
+    )
+
+    return {
+        'version': version,
+        'length': length,
+        'pid': pid,
+        'real_width': real_width,
+        'real_height': real_height,
+        'virtual_width': virtual_width,
+        'virtual_height': virtual_height,
+        'orientation': orientation * 90,
+        'quirks': quirks,
+    }
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    """从socket读取固定长度数据"""
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], size - received)
+        if n == 0:
+            raise ConnectionError("流连接已关闭")
+        received += n
+    return bytes(buf)
+
+
+class MinicapStream:
+    """
+    minicap流客户端
+
+    读取线程负责从socket接收JPEG帧(只保留最新的一帧数据),
+    解码线程负责把最新数据解码到LatestFrameSlot, 来不及解码的帧直接丢弃。
+    其他JPEG流协议只需重写 _handshake 和 _read_loop。
+    """
+
+    name = "minicap"
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 1313,
+        connect_timeout: float = 5.0,
+        frame_pool: Optional[FramePool] = None
+    ):
+        """
+        Args:
+            host: 流服务地址 (通常是adb forward后的本地地址)
+            port: 流服务端口
+            connect_timeout: 连接超时(秒)
+            frame_pool: 帧缓冲池 (可选), 设置后read()返回的帧需由调用方release()
+        """
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.frame_pool = frame_pool
+
+        self.banner: Optional[dict] = None
+        self.slot = LatestFrameSlot(frame_pool)
+
+        self._sock: Optional[socket.socket] = None
+        self._running = False
+        self._reader_thread: Optional[threading.Thread] = None
+        self._decoder_thread: Optional[threading.Thread] = None
+
+        # 待解码的最新JPEG数据
+        self._pending_lock = threading.Lock()
+        self._pending_event = threading.Event()
+        self._pending: Optional[Tuple[bytes, float]] = None
+
+        # 统计信息
+        self.frames_received = 0
+        self.frames_decoded = 0
+        self.frames_dropped = 0
+        self.decode_errors = 0
+        self.bytes_received = 0
+        self.error: Optional[str] = None
+        self._start_time = 0.0
+
+    def start(self) -> bool:
+        """连接流服务并启动后台线程"""
+        if self._running:
+            return True
+
+        sock = None
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+            sock.settimeout(None)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._handshake(sock)
+
+        except (OSError, ValueError) as e:
+            if sock is not None:
+                sock.close()
+            print(f"✗ 流连接失败 ({self.host}:{self.port}): {e}")
+            return False
+
+        self._sock = sock
+        self._running = True
+        self.error = None
+        self._start_time = time.time()
+
+        self._reader_thread = threading.Thread(target=self._read_loop, name=f"{self.name}-reader", daemon=True)
+        self._decoder_thread = threading.Thread(target=self._decode_loop, name=f"{self.name}-decoder", daemon=True)
+        self._reader_thread.start()
+        self._decoder_thread.start()
+        return True
+
+    def stop(self):
+        """停止后台线程并关闭连接"""
+        self._running = False
+        self._pending_event.set()
+
+        if self._sock:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
+            self._sock = None
+
+        for thread in (self._reader_thread, self._decoder_thread):
+            if thread and thread is not threading.current_thread():
+                thread.join(timeout=2.0)
+
+        self._reader_thread = None
+        self._decoder_thread = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def _handshake(self, sock: socket.socket):
+        """连接建立后读取minicap banner"""
+        self.banner = parse_minicap_banner(_recv_exact(sock, MINICAP_BANNER_SIZE))
+
+        # banner可能比24字节长, 跳过多余部分
+        extra = self.banner['length'] - MINICAP_BANNER_SIZE
+        if extra > 0:
+            _recv_exact(sock, extra)
+
+    def _submit(self, payload: bytes, timestamp: float):
+        """提交一帧JPEG数据等待解码 (覆盖尚未解码的旧帧)"""
+        self.frames_received += 1
+        with self._pending_lock:
+            if self._pending is not None:
+                self.frames_dropped += 1
+            self._pending = (payload, timestamp)
+        self._pending_event.set()
+
+    def _read_loop(self):
+        """读取线程 - 按 4字节长度 + JPEG 的格式接收帧"""
+        try:
+            while self._running:
+                header = _recv_exact(self._sock, 4)
+                (size,) = struct.unpack('<I', header)
+                payload = _recv_exact(self._sock, size)
+                self.bytes_received += size + 4
+                self._submit(payload, time.time())
+
+        except (OSError, ConnectionError, AttributeError) as e:
+            if self._running:
+                self.error = str(e)
+                print(f"✗ 流读取中断: {e}")
+        finally:
+            self._running = False
+            self._pending_event.set()
+
+    def _decode_loop(self):
+        """解码线程 - 只解码最新收到的帧"""
+        while self._running:
+            self._pending_event.wait()
+            with self._pending_lock:
+                item = self._pending
+                self._pending = None
+                self._pending_event.clear()
+
+            if item is None:
+                continue
+
+            payload, timestamp = item
+            if self.frame_pool is not None:
+                frame = self.frame_pool.decode_into(payload)
+            else:
+                frame = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if frame is None:
+                self.decode_errors += 1
+                continue
+
+            self.frames_decoded += 1
+            self.slot.put(frame, timestamp)
+
+    def read(self, wait_first: float = 1.0) -> Optional[np.ndarray]:
+        """
+        读取最新帧 (不阻塞)
+
+        Args:
+            wait_first: 尚未收到第一帧时的最长等待时间(秒)
+
+        Returns:
+            最新BGR帧, 无可用帧时返回None
+        """
+        frame, seq, _ = self.slot.get(retain=True)
+        if frame is None and seq == 0 and wait_first > 0 and self._running:
+            frame, _, _ = self.slot.wait_newer(0, timeout=wait_first, retain=True)
+        return frame
+
+    def get_stats(self) -> dict:
+        """获取流统计信息"""
+        elapsed = max(time.time() - self._start_time, 1e-6) if self._start_time else 0.0
+        return {
+            'frames_received': self.frames_received,
+            'frames_decoded': self.frames_decoded,
+            'frames_dropped': self.frames_dropped,
+            'decode_errors': self.decode_errors,
+            'bytes_received': self.bytes_received,
+            'decode_fps': self.frames_decoded / elapsed if elapsed else 0.0,
+            'receive_fps': self.frames_received / elapsed if elapsed else 0.0,
+        }
@@ -0,0 +1,338 @@
+"""
+采集会话监控 - 错误率/延迟统计与后台自动重连
+Capture Supervisor - Health tracking and non-blocking reconnect for capture sessions
+"""
+
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable, Optional
+
+import numpy as np
+
+from .threaded_capture import CapturedFrame
+
+
+class CaptureHealth(Enum):
+    """采集健康状态"""
+    HEALTHY = "healthy"              # 正常
+    DEGRADED = "degraded"            # 有错误或延迟偏高, 仍在采集
+    RECONNECTING = "reconnecting"    # 后台重连中
+    FAILED = "failed"                # 重连次数用尽
+
+
+OUTAGE_MODES = ("last_frame", "pause")
+
+
+class CaptureSupervisor:
+    """
+    采集会话监控
+
+    包装 CaptureManager.get_frame_info(), 在滑动窗口内统计错误率和采集延迟。
+    连续失败或错误率过高时判定会话中断, 在后台线程中按指数退避重连,
+    主循环不会被阻塞:
+        last_frame: 中断期间返回上一帧有效画面 (stale=True), 超过max_stale_age后暂停
+        pause:      中断期间等待重连结果, 超时返回None
+    """
+
+    def __init__(
+        self,
+        capture_manager,
+        window: int = 30,
+        max_consecutive_errors: int = 3,
+        max_error_rate: float = 0.5,
+        latency_threshold: float = 1.0,
+        backoff_initial: float = 0.5,
+        backoff_max: float = 30.0,
+        max_attempts: int = 0,
+        outage_mode: str = "last_frame",
+        max_stale_age: float = 10.0,
+        retry_delay: float = 0.1,
+        on_reconnect: Optional[Callable[[], None]] = None
+    ):
+        """
+        Args:
+            capture_manager: 被监控的CaptureManager
+            window: 统计窗口大小 (最近N次采集)
+            max_consecutive_errors: 连续失败多少次后重连
+            max_error_rate: 窗口内错误率超过该值后重连 (窗口填满后才判断)
+            latency_threshold: 采集延迟p95超过该值(秒)时标记为DEGRADED
+            backoff_initial: 首次重连失败后的等待时间(秒)
+            backoff_max: 重连等待时间上限(秒)
+            max_attempts: 最多重连次数 (0表示不限制), 用尽后进入FAILED
+            outage_mode: 中断期间的行为 last_frame / pause
+            max_stale_age: last_frame模式下旧画面的最长使用时间(秒)
+            retry_delay: 单次采集失败后的等待时间(秒)
+            on_reconnect: 重连成功后的回调 (在重连线程中调用)
+        """
+        if outage_mode not in OUTAGE_MODES:
+            raise ValueError(f"不支持的中断处理方式: {outage_mode}")
+
+        self.capture_manager = capture_manager
+        self.window = max(1, window)
+        self.max_consecutive_errors = max_consecutive_errors
+        self.max_error_rate = max_error_rate
+        self.latency_threshold = latency_threshold
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.max_attempts = max_attempts
+        self.outage_mode = outage_mode
+        self.max_stale_age = max_stale_age
+        self.retry_delay = retry_delay
+        self.on_reconnect = on_reconnect
+
+        self._lock = threading.Lock()
+        self._state = CaptureHealth.HEALTHY
+        self._results = deque(maxlen=self.window)    # True表示成功
+        self._latencies = deque(maxlen=self.window)  # 成功采集的耗时(秒)
+        self._consecutive_errors = 0
+
+        self._reconnect_thread: Optional[threading.Thread] = None
+        self._reconnected = threading.Event()
+        self._stop_event = threading.Event()
+        self._outage_start = 0.0
+
+        # 上一帧有效画面 (使用缓冲池时持有一个引用)
+        self._last_good: Optional[CapturedFrame] = None
+
+        # 统计信息
+        self.frames_ok = 0
+        self.frames_failed = 0
+        self.frames_stale = 0
+        self.reconnects = 0
+        self.reconnect_attempts = 0
+        self.outage_time = 0.0
+
+    @property
+    def state(self) -> CaptureHealth:
+        return self._state
+
+    @property
+    def is_failed(self) -> bool:
+        return self._state == CaptureHealth.FAILED
+
+    def _set_state(self, state: CaptureHealth):
+        if state != self._state:
+            print(f"  采集状态: {self._state.value} -> {state.value}")
+            self._state = state
+
+    def get_frame_info(self, timeout: float = 1.0) -> Optional[CapturedFrame]:
+        """
+        获取画面 (接口与CaptureManager.get_frame_info相同)
+
+        Args:
+            timeout: 等待新帧或重连结果的最长时间(秒)
+
+        Returns:
+            采集帧; 中断期间可能是标记为stale的旧画面; 无可用画面时返回None
+        """
+        state = self._state
+        if state == CaptureHealth.FAILED:
+            return None
+        if state == CaptureHealth.RECONNECTING:
+            return self._serve_outage(timeout)
+
+        start = time.time()
+        try:
+            frame = self.capture_manager.get_frame_info(timeout)
+        except Exception as e:
+            print(f"✗ 采集异常: {e}")
+            frame = None
+        latency = time.time() - start
+
+        if frame is not None:
+            self._record_success(frame, latency)
+            return frame
+
+        # 有限画面源 (回放) 播放完毕不算故障
+        if self.capture_manager.is_finished():
+            return None
+
+        if self._record_failure():
+            return self._serve_outage(timeout)
+
+        stale = self._stale_frame()
+        if stale is None:
+            time.sleep(self.retry_delay)
+        return stale
+
+    def _record_success(self, frame: CapturedFrame, latency: float):
+        """记录一次成功采集并更新上一帧有效画面"""
+        with self._lock:
+            self._results.append(True)
+            self._latencies.append(latency)
+            self._consecutive_errors = 0
+            self.frames_ok += 1
+
+            if self.outage_mode == "last_frame":
+                if frame.pool is not None:
+                    frame.pool.retain(frame.buffer)
+                previous = self._last_good
+                self._last_good = CapturedFrame(
+                    frame.image, frame.seq, frame.timestamp,
+                    pool=frame.pool, transform=frame.transform, buffer=frame.buffer
+                )
+                if previous is not None:
+                    previous.release()
+
+            self._set_state(CaptureHealth.DEGRADED if self._is_degraded() else CaptureHealth.HEALTHY)
+
+    def _record_failure(self) -> bool:
+        """记录一次失败, 返回是否已开始重连"""
+        with self._lock:
+            self._results.append(False)
+            self._consecutive_errors += 1
+            self.frames_failed += 1
+
+            error_rate = self._error_rate()
+            if (
+                self._consecutive_errors >= self.max_consecutive_errors
+                or (len(self._results) >= self.window and error_rate > self.max_error_rate)
+            ):
+                self._start_reconnect()
+                return True
+
+            self._set_state(CaptureHealth.DEGRADED)
+            return False
+
+    def _error_rate(self) -> float:
+        if not self._results:
+            return 0.0
+        return 1.0 - sum(self._results) / len(self._results)
+
+    def _latency_p95(self) -> float:
+        if not self._latencies:
+            return 0.0
+        return float(np.percentile(self._latencies, 95))
+
+    def _is_degraded(self) -> bool:
+        if self._error_rate() > 0:
+            return True
+        return bool(self.latency_threshold) and self._latency_p95() > self.latency_threshold
+
+    def _stale_frame(self) -> Optional[CapturedFrame]:
+        """返回上一帧有效画面的一个新引用 (标记为stale)"""
+        with self._lock:
+            last = self._last_good
+            if last is None:
+                return None
+            if self.max_stale_age and last.age > self.max_stale_age:
+                return None
+            if last.pool is not None:
+                last.pool.retain(last.buffer)
+            frame = CapturedFrame(
+                last.image, last.seq, last.timestamp,
+                pool=last.pool, transform=last.transform, buffer=last.buffer, stale=True
+            )
+            self.frames_stale += 1
+            return frame
+
+    def _serve_outage(self, timeout: float) -> Optional[CapturedFrame]:
+        """中断期间的取帧行为"""
+        if self.outage_mode == "last_frame":
+            frame = self._stale_frame()
+            if frame is not None:
+                # 按正常采集的节奏返回旧画面, 避免主循环空转
+                self._reconnected.wait(self.retry_delay)
+                return frame
+
+        # 暂停: 等待重连结果
+        self._reconnected.wait(timeout)
+        return None
+
+    def _start_reconnect(self):
+        """进入重连状态并启动后台重连线程 (调用方持有锁)"""
+        if self._reconnect_thread is not None and self._reconnect_thread.is_alive():
+            return
+
+        self._set_state(CaptureHealth.RECONNECTING)
+        self._outage_start = time.time()
+        self._reconnected.clear()
+        self._reconnect_thread = threading.Thread(
+            target=self._reconnect_loop, name="capture-reconnect", daemon=True
+        )
+        self._reconnect_thread.start()
+
+    def _reconnect_loop(self):
+        """后台重连 - 指数退避直到成功、次数用尽或停止"""
+        delay = self.backoff_initial
+        attempt = 0
+
+        while not self._stop_event.is_set():
+            attempt += 1
+            self.reconnect_attempts += 1
+            print(f"  正在重连采集设备 (第{attempt}次)...")
+
+            try:
+                self.capture_manager.disconnect()
+            except Exception as e:
+                print(f"✗ 断开连接失败: {e}")
+
+            try:
+                connected = self.capture_manager.connect()
+            except Exception as e:
+                print(f"✗ 重连失败: {e}")
+                connected = False
+
+            if connected:
+                if self.on_reconnect is not None:
+                    try:
+                        self.on_reconnect()
+                    except Exception as e:
+                        print(f"✗ 重连回调失败: {e}")
+
+                with self._lock:
+                    outage = time.time() - self._outage_start
+                    self.outage_time += outage
+                    self.reconnects += 1
+                    self._results.clear()
+                    self._latencies.clear()
+                    self._consecutive_errors = 0
+                    self._set_state(CaptureHealth.HEALTHY)
+                print(f"✓ 采集已恢复 (中断 {outage:.1f}秒)")
+                self._reconnected.set()
+                return
+
+            if self.max_attempts and attempt >= self.max_attempts:
+                with self._lock:
+                    self.outage_time += time.time() - self._outage_start
+                    self._set_state(CaptureHealth.FAILED)
+                print(f"✗ 重连{attempt}次失败, 放弃")
+                self._reconnected.set()
+                return
+
+            self._stop_event.wait(delay)
+            delay = min(delay * 2, self.backoff_max)
+
+    def stop(self):
+        """停止重连线程并归还持有的画面"""
+        self._stop_event.set()
+        self._reconnected.set()
+        if self._reconnect_thread is not None:
+            self._reconnect_thread.join(timeout=5.0)
+            self._reconnect_thread = None
+        with self._lock:
+            if self._last_good is not None:
+                self._last_good.release()
+                self._last_good = None
+
+    def get_stats(self) -> dict:
+        """获取健康统计"""
+        with self._lock:
+            latencies = list(self._latencies)
+            outage = self.outage_time
+            if self._state == CaptureHealth.RECONNECTING:
+                outage += time.time() - self._outage_start
+            return {
+                'state': self._state.value,
+                'error_rate': self._error_rate(),
+                'latency_p50_ms': float(np.percentile(latencies, 50)) * 1000 if latencies else 0.0,
+                'latency_p95_ms': float(np.percentile(latencies, 95)) * 1000 if latencies else 0.0,
+                'frames_ok': self.frames_ok,
+                'frames_failed': self.frames_failed,
+                'frames_stale': self.frames_stale,
+                'reconnects': self.reconnects,
+                'reconnect_attempts': self.reconnect_attempts,
+                'outage_time': outage,
+            }
@@ -0,0 +1,234 @@
+"""
+后台采集线程 - 采集与推理并行
+Threaded Capture - Overlap device I/O with inference
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from .frame_pool import FramePool
+from .transform import CoordinateTransform
+
+
+DROP_POLICIES = ("latest", "oldest", "block")
+
+
+class CapturedFrame:
+    """带元数据的采集帧"""
+
+    def __init__(
+        self,
+        image: np.ndarray,
+        seq: int,
+        timestamp: float,
+        pool: Optional[FramePool] = None,
+        transform: Optional[CoordinateTransform] = None,
+        buffer: Optional[np.ndarray] = None,
+        stale: bool = False
+    ):
+        """
+        Args:
+            image: BGR图像
+            seq: 帧序号 (单调递增)
+            timestamp: 采集完成时间 (time.time())
+            pool: 图像所属的帧缓冲池 (可选)
+            transform: 帧坐标到屏幕坐标的变换 (None表示帧即全屏原尺寸)
+            buffer: image所在的池缓冲区 (image是其视图时需要, 默认即image)
+            stale: 是否为采集中断期间重复提供的旧画面
+        """
+        self.image = image
+        self.seq = seq
+        self.timestamp = timestamp
+        self.pool = pool
+        self.transform = transform
+        self.buffer = buffer if buffer is not None else image
+        self.stale = stale
+
+    def release(self):
+        """把图像缓冲区归还给缓冲池 (之后不能再使用image)"""
+        if self.pool is not None and self.buffer is not None:
+            self.pool.release(self.buffer)
+        self.pool = None
+
+    def to_screen(self, x: float, y: float) -> Tuple[int, int]:
+        """帧坐标 -> 屏幕坐标"""
+        if self.transform is None:
+            return int(x), int(y)
+        return self.transform.to_screen(x, y)
+
+    @property
+    def age(self) -> float:
+        """帧年龄(秒)"""
+        return time.time() - self.timestamp
+
+    def __repr__(self):
+        shape = None if self.image is None else self.image.shape
+        stale = ", stale" if self.stale else ""
+        return f"CapturedFrame(seq={self.seq}, shape={shape}, age={self.age * 1000:.0f}ms{stale})"
+
+
+class CaptureThread:
+    """
+    后台采集线程
+
+    持续调用grab函数把采集帧写入环形缓冲区 (buffer_size=2 即双缓冲)。
+    drop_policy 决定缓冲区满时的行为:
+        latest: 消费者总是拿到最新帧, 未被消费的旧帧直接丢弃
+        oldest: 按顺序消费, 缓冲区满时丢弃最旧的帧
+        block:  缓冲区满时采集线程等待, 不丢帧
+    """
+
+    def __init__(
+        self,
+        grab: Callable[[], Optional[CapturedFrame]],
+        buffer_size: int = 2,
+        drop_policy: str = "latest",
+        max_frame_age: float = 0.0,
+        error_backoff: float = 0.1
+    ):
+        """
+        Args:
+            grab: 采集函数, 返回CapturedFrame或None (序号与时间戳由本线程填写)
+            buffer_size: 环形缓冲区大小
+            drop_policy: 丢帧策略 latest / oldest / block
+            max_frame_age: 帧最大年龄(秒), 超过视为过期丢弃 (0表示不限制)
+            error_backoff: 采集失败后的等待时间(秒)
+        """
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"不支持的丢帧策略: {drop_policy}")
+
+        self.grab = grab
+        self.buffer_size = max(1, buffer_size)
+        self.drop_policy = drop_policy
+        self.max_frame_age = max_frame_age
+        self.error_backoff = error_backoff
+
+        self._buffer = deque()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._seq = 0
+        self._last_consumed = 0
+
+        # 统计信息
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.frames_stale = 0
+        self.capture_errors = 0
+        self.last_capture_time = 0.0
+
+    def start(self):
+        """启动采集线程"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="capture-thread", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止采集线程"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self._discard_all()
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def _run(self):
+        while self._running:
+            start = time.time()
+            try:
+                frame = self.grab()
+            except Exception as e:
+                print(f"✗ 后台采集失败: {e}")
+                frame = None
+
+            if frame is None:
+                self.capture_errors += 1
+                time.sleep(self.error_backoff)
+                continue
+
+            self.last_capture_time = time.time() - start
+
+            with self._cond:
+                if self.drop_policy == "block":
+                    self._cond.wait_for(
+                        lambda: len(self._buffer) < self.buffer_size or not self._running
+                    )
+                elif self.drop_policy == "latest":
+                    self.frames_dropped += len(self._buffer)
+                    self._discard_all()
+                elif len(self._buffer) >= self.buffer_size:
+                    self._buffer.popleft().release()
+                    self.frames_dropped += 1
+
+                if not self._running:
+                    frame.release()
+                    break
+
+                self._seq += 1
+                frame.seq = self._seq
+                self._buffer.append(frame)
+                self.frames_captured += 1
+                self._cond.notify_all()
+
+    def get(self, timeout: float = 1.0) -> Optional[CapturedFrame]:
+        """
+        获取下一帧 (尚未被消费过的帧)
+
+        Args:
+            timeout: 最长等待时间(秒)
+
+        Returns:
+            采集帧, 超时返回None
+        """
+        deadline = time.time() + timeout
+
+        with self._cond:
+            while True:
+                # 丢弃过期帧
+                if self.max_frame_age > 0:
+                    now = time.time()
+                    while self._buffer and now - self._buffer[0].timestamp > self.max_frame_age:
+                        self._buffer.popleft().release()
+                        self.frames_stale += 1
+
+                if self._buffer:
+                    if self.drop_policy == "latest":
+                        frame = self._buffer.pop()
+                        self._discard_all()
+                    else:
+                        frame = self._buffer.popleft()
+                    self._last_consumed = frame.seq
+                    self._cond.notify_all()
+                    return frame
+
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self._running:
+                    return None
+                self._cond.wait(remaining)
+
+    def _discard_all(self):
+        """丢弃缓冲区中的所有帧"""
+        while self._buffer:
+            self._buffer.popleft().release()
+
+    def get_stats(self) -> dict:
+        """获取采集统计"""
+        return {
+            'frames_captured': self.frames_captured,
+            'frames_dropped': self.frames_dropped,
+            'frames_stale': self.frames_stale,
+            'capture_errors': self.capture_errors,
+            'last_capture_ms': self.last_capture_time * 1000,
+            'buffered': len(self._buffer),
+        }
@@ -0,0 +1,217 @@
+"""
+采集配置与坐标变换 - ROI裁剪/缩放及帧坐标到屏幕坐标的映射
+Capture Profile & Coordinate Transform - ROI cropping, downscaling and remapping
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import cv2
+
+
+class CoordinateTransform:
+    """
+    帧坐标 <-> 屏幕物理坐标变换
+
+    由若干个分块组成, 每个分块把屏幕上的一个矩形区域映射到帧中的一个矩形区域。
+    单一缩放时只有一个分块; 多ROI拼接时每个ROI一个分块。
+    """
+
+    def __init__(self, tiles: List[Tuple[Tuple[float, float, float, float], Tuple[float, float, float, float]]]):
+        """
+        Args:
+            tiles: [(屏幕矩形, 帧矩形), ...], 矩形格式为 (x, y, w, h)
+        """
+        self.tiles = tiles
+
+    @classmethod
+    def identity(cls, width: int, height: int) -> "CoordinateTransform":
+        """恒等变换"""
+        return cls([((0, 0, width, height), (0, 0, width, height))])
+
+    @property
+    def is_identity(self) -> bool:
+        return len(self.tiles) == 1 and self.tiles[0][0] == self.tiles[0][1]
+
+    def _find_tile(self, x: float, y: float, frame_side: bool = True) -> int:
+        """查找包含点的分块, 不在任何分块内时返回最近的分块"""
+        best, best_dist = 0, float('inf')
+        for i, tile in enumerate(self.tiles):
+            rx, ry, rw, rh = tile[1] if frame_side else tile[0]
+            dx = max(rx - x, 0, x - (rx + rw))
+            dy = max(ry - y, 0, y - (ry + rh))
+            dist = dx * dx + dy * dy
+            if dist == 0:
+                return i
+            if dist < best_dist:
+                best, best_dist = i, dist
+        return best
+
+    def to_screen(self, x: float, y: float) -> Tuple[int, int]:
+        """帧坐标 -> 屏幕坐标"""
+        (sx, sy, sw, sh), (fx, fy, fw, fh) = self.tiles[self._find_tile(x, y)]
+        return (
+            int(round(sx + (x - fx) * sw / fw)),
+            int(round(sy + (y - fy) * sh / fh)),
+        )
+
+    def to_frame(self, x: float, y: float) -> Tuple[int, int]:
+        """屏幕坐标 -> 帧坐标"""
+        (sx, sy, sw, sh), (fx, fy, fw, fh) = self.tiles[self._find_tile(x, y, frame_side=False)]
+        return (
+            int(round(fx + (x - sx) * fw / sw)),
+            int(round(fy + (y - sy) * fh / sh)),
+        )
+
+    def bbox_to_screen(self, bbox: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+        """帧中的边界框 -> 屏幕边界框"""
+        x1, y1 = self.to_screen(bbox[0], bbox[1])
+        x2, y2 = self.to_screen(bbox[2], bbox[3])
+        return (x1, y1, x2, y2)
+
+    def __repr__(self):
+        return f"CoordinateTransform(tiles={self.tiles})"
+
+
+class CaptureProfile:
+    """
+    采集配置 - ROI列表和/或缩放比例
+
+    ROI使用屏幕坐标 (x1, y1, x2, y2); 所有值都不超过1.0时按屏幕相对坐标处理。
+    多个ROI会按从上到下的顺序拼接成一张图。
+    """
+
+    def __init__(
+        self,
+        rois: Optional[Sequence[Sequence[float]]] = None,
+        scale: float = 1.0
+    ):
+        """
+        Args:
+            rois: ROI列表 [(x1, y1, x2, y2), ...], None或空表示全屏
+            scale: 相对屏幕分辨率的缩放比例 (0, 1]
+        """
+        if not 0 < scale <= 1.0:
+            raise ValueError(f"缩放比例必须在(0, 1]之间: {scale}")
+
+        self.rois = [tuple(r) for r in (rois or [])]
+        self.scale = scale
+        # 已提示过的屏幕外ROI, 每个只提示一次
+        self._warned = set()
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> Optional["CaptureProfile"]:
+        """从配置字典创建 (忽略无效的ROI), 配置为空或等价于全屏原尺寸时返回None"""
+        if not config:
+            return None
+        rois = []
+        for roi in config.get('rois') or []:
+            if len(roi) != 4 or roi[2] <= roi[0] or roi[3] <= roi[1] or max(roi[2], roi[3]) <= 0:
+                print(f"✗ 忽略无效ROI: {roi}")
+                continue
+            rois.append(roi)
+        profile = cls(rois=rois, scale=config.get('scale', 1.0))
+        return None if profile.is_full_frame else profile
+
+    @property
+    def is_full_frame(self) -> bool:
+        return not self.rois and self.scale == 1.0
+
+    def screen_rois(self, screen_size: Tuple[int, int]) -> List[Tuple[int, int, int, int]]:
+        """获取屏幕坐标下的ROI (已裁剪到屏幕范围, 忽略完全在屏幕外的, 全部无效时为全屏)"""
+        width, height = screen_size
+        if not self.rois:
+            return [(0, 0, width, height)]
+
+        result = []
+        for roi in self.rois:
+            x1, y1, x2, y2 = roi
+            if max(x1, y1, x2, y2) <= 1.0:
+                x1, x2 = x1 * width, x2 * width
+                y1, y2 = y1 * height, y2 * height
+            x1, x2 = int(max(0, min(x1, width))), int(max(0, min(x2, width)))
+            y1, y2 = int(max(0, min(y1, height))), int(max(0, min(y2, height)))
+            if x2 > x1 and y2 > y1:
+                result.append((x1, y1, x2, y2))
+            elif (roi, screen_size) not in self._warned:
+                self._warned.add((roi, screen_size))
+                print(f"✗ ROI不在屏幕范围内 {tuple(screen_size)}, 已忽略: {roi}")
+
+        if not result:
+            return [(0, 0, width, height)]
+        return result
+
+    def device_size(self, screen_size: Tuple[int, int]) -> Tuple[int, int]:
+        """设备端缩放时应输出的分辨率"""
+        width, height = screen_size
+        return max(1, int(round(width * self.scale))), max(1, int(round(height * self.scale)))
+
+    def apply(
+        self,
+        image: np.ndarray,
+        screen_size: Optional[Tuple[int, int]] = None,
+        color_code: Optional[int] = None
+    ) -> Tuple[np.ndarray, CoordinateTransform]:
+        """
+        对图像应用ROI裁剪与缩放
+
+        Args:
+            image: 输入图像 (可以已在设备端缩放过, 也可以是未转换颜色的原始像素)
+            screen_size: 屏幕物理尺寸 (width, height), 默认等于图像尺寸
+            color_code: 需要时对裁剪结果执行的cvtColor代码 (只转换ROI内的像素)
+
+        Returns:
+            (处理后的BGR图像, 坐标变换)
+        """
+        img_h, img_w = image.shape[:2]
+        if screen_size is None or not screen_size[0] or not screen_size[1]:
+            screen_size = (img_w, img_h)
+        screen_w, screen_h = screen_size
+
+        # 输入图像相对屏幕的比例 (设备端缩放时小于1)
+        in_fx, in_fy = img_w / screen_w, img_h / screen_h
+
+        tiles = []
+        crops = []
+        for x1, y1, x2, y2 in self.screen_rois(screen_size):
+            # 屏幕坐标 -> 输入图像坐标
+            ix1, iy1 = int(round(x1 * in_fx)), int(round(y1 * in_fy))
+            ix2, iy2 = int(round(x2 * in_fx)), int(round(y2 * in_fy))
+            crop = image[iy1:iy2, ix1:ix2]
+            if not crop.size:
+                # 设备端缩放后不足一个像素
+                continue
+
+            out_w = max(1, int(round((x2 - x1) * self.scale)))
+            out_h = max(1, int(round((y2 - y1) * self.scale)))
+            if (out_w, out_h) != (crop.shape[1], crop.shape[0]):
+                crop = cv2.resize(crop, (out_w, out_h), interpolation=cv2.INTER_AREA)
+            if color_code is not None:
+                crop = cv2.cvtColor(crop, color_code)
+
+            crops.append(crop)
+            tiles.append((x1, y1, x2 - x1, y2 - y1))
+
+        if not crops:
+            return CaptureProfile(scale=self.scale).apply(image, screen_size, color_code)
+        if len(crops) == 1:
+            result = crops[0]
+            frame_tiles = [(tiles[0], (0, 0, result.shape[1], result.shape[0]))]
+            return result, CoordinateTransform(frame_tiles)
+
+        # 多个ROI从上到下拼接
+        mosaic_w = max(c.shape[1] for c in crops)
+        mosaic_h = sum(c.shape[0] for c in crops)
+        channels = crops[0].shape[2] if crops[0].ndim == 3 else None
+        shape = (mosaic_h, mosaic_w, channels) if channels else (mosaic_h, mosaic_w)
+        mosaic = np.zeros(shape, dtype=crops[0].dtype)
+
+        frame_tiles = []
+        y = 0
+        for crop, screen_rect in zip(crops, tiles):
+            h, w = crop.shape[:2]
+            mosaic[y:y + h, :w] = crop
+            frame_tiles.append((screen_rect, (0, y, w, h)))
+            y += h
+
+        return mosaic, CoordinateTransform(frame_tiles)
@@ -0,0 +1,98 @@
+"""
+WebDriverAgent异步HTTP会话 - 连接池 + keep-alive
+Async WebDriverAgent Session - Pooled keep-alive HTTP connections
+"""
+
+import base64
+from typing import Optional, Tuple
+
+
+class AsyncWDASession:
+    """
+    基于aiohttp的WDA会话
+
+    所有请求复用同一个连接池 (HTTP keep-alive), 一个事件循环中可以同时有
+    max_in_flight 个截图请求在途。会话必须在事件循环内创建和关闭。
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8100",
+        max_in_flight: int = 4,
+        timeout: float = 10.0,
+        keepalive_timeout: float = 30.0
+    ):
+        """
+        Args:
+            base_url: WDA地址
+            max_in_flight: 最大并发连接数
+            timeout: 单次请求超时(秒)
+            keepalive_timeout: 空闲连接保持时间(秒)
+        """
+        self.base_url = base_url.rstrip('/')
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.keepalive_timeout = keepalive_timeout
+
+        self._session = None
+
+        # 统计信息
+        self.requests = 0
+        self.errors = 0
+
+    async def open(self):
+        """创建连接池 (重复调用无副作用)"""
+        if self._session is not None and not self._session.closed:
+            return
+
+        try:
+            import aiohttp
+        except ImportError:
+            raise ImportError("请安装aiohttp: pip install aiohttp")
+
+        connector = aiohttp.TCPConnector(
+            limit=self.max_in_flight,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+
+    async def close(self):
+        """关闭连接池"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._session is not None and not self._session.closed
+
+    async def _get_json(self, path: str) -> dict:
+        """GET请求并解析JSON"""
+        await self.open()
+        self.requests += 1
+        try:
+            async with self._session.get(self.base_url + path) as resp:
+                resp.raise_for_status()
+                return await resp.json(content_type=None)
+        except Exception:
+            self.errors += 1
+            raise
+
+    async def status(self) -> dict:
+        """WDA状态"""
+        return (await self._get_json('/status')).get('value', {})
+
+    async def window_size(self) -> Tuple[int, int]:
+        """屏幕尺寸 (width, height)"""
+        value = (await self._get_json('/window/size')).get('value', {})
+        return int(value.get('width', 0)), int(value.get('height', 0))
+
+    async def screenshot_bytes(self) -> Optional[bytes]:
+        """截图 - 返回PNG原始数据"""
+        value = (await self._get_json('/screenshot')).get('value')
+        if not value:
+            return None
+        return base64.b64decode(value)
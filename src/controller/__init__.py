@@ -1,3 +1,3 @@
-from .game_controller import ControllerManager, AndroidController, IOSController
+from .game_controller import ControllerManager, AndroidController, IOSController, NullController
 
-__all__ = ['ControllerManager', 'AndroidController', 'IOSController']
+__all__ = ['ControllerManager', 'AndroidController', 'IOSController', 'NullController']
@@ -217,26 +217,90 @@ class IOSController(BaseController):
             print(f"✗ 长按失败: {e}")
 
 
+class NullController(BaseController):
+    """空操作控制器 - 回放/离线测试时使用, 只记录操作"""
+
+    def __init__(self, device=None, verbose: bool = False):
+        """
+        Args:
+            device: 未使用 (保持接口一致)
+            verbose: 是否打印每个操作
+        """
+        super().__init__(device)
+        self.verbose = verbose
+        self.action_counts = {'tap': 0, 'swipe': 0, 'long_press': 0}
+
+    def tap(self, x: int, y: int, duration: float = 0.05):
+        """记录点击"""
+        self.action_counts['tap'] += 1
+        if self.verbose:
+            print(f"[replay] tap ({x}, {y})")
+
+    def swipe(
+        self,
+        start_x: int,
+        start_y: int,
+        end_x: int,
+        end_y: int,
+        duration: float = 0.5
+    ):
+        """记录滑动"""
+        self.action_counts['swipe'] += 1
+        if self.verbose:
+            print(f"[replay] swipe ({start_x}, {start_y}) -> ({end_x}, {end_y})")
+
+    def long_press(self, x: int, y: int, duration: float = 1.0):
+        """记录长按"""
+        self.action_counts['long_press'] += 1
+        if self.verbose:
+            print(f"[replay] long_press ({x}, {y})")
+
+
 class ControllerManager:
     """控制器管理器 - 统一接口"""
 
     def __init__(self, platform: str, device):
         """
         Args:
-            platform: 平台类型 "android" 或 "ios"
+            platform: 平台类型 "android", "ios" 或 "replay" (空操作)
             device: 设备对象
         """
         self.platform = platform.lower()
 
+        # 帧坐标 -> 屏幕坐标变换 (ROI/缩放采集时由主循环每帧设置)
+        self.transform = None
+
         if self.platform == "android":
             self.controller = AndroidController(device)
         elif self.platform == "ios":
             self.controller = IOSController(device)
+        elif self.platform == "replay":
+            self.controller = NullController(device)
         else:
             raise ValueError(f"不支持的平台: {platform}")
 
+    def set_device(self, device):
+        """更换设备对象 (采集会话重连后调用)"""
+        self.controller.device = device
+
+    def set_transform(self, transform):
+        """
+        设置帧坐标到屏幕坐标的变换
+
+        Args:
+            transform: CoordinateTransform, None表示帧坐标即屏幕坐标
+        """
+        self.transform = transform
+
+    def _to_screen(self, x: int, y: int) -> Tuple[int, int]:
+        """帧坐标 -> 屏幕物理坐标"""
+        if self.transform is None:
+            return x, y
+        return self.transform.to_screen(x, y)
+
     def tap(self, x: int, y: int, duration: float = 0.05):
-        """点击"""
+        """点击 (帧坐标)"""
+        x, y = self._to_screen(x, y)
         self.controller.tap(x, y, duration)
 
     def tap_random(self, x: int, y: int, radius: int = 5, duration: float = 0.05):
@@ -260,23 +324,29 @@ class ControllerManager:
         end_y: int,
         duration: float = 0.5
     ):
-        """滑动"""
+        """滑动 (帧坐标)"""
+        start_x, start_y = self._to_screen(start_x, start_y)
+        end_x, end_y = self._to_screen(end_x, end_y)
         self.controller.swipe(start_x, start_y, end_x, end_y, duration)
 
     def long_press(self, x: int, y: int, duration: float = 1.0):
-        """长按"""
+        """长按 (帧坐标)"""
+        x, y = self._to_screen(x, y)
         self.controller.long_press(x, y, duration)
 
     def swipe_smooth(self, start_x: int, start_y: int, end_x: int, end_y: int, duration: float = 0.5):
-        """平滑滑动 (仅Android)"""
+        """平滑滑动 (仅Android, 帧坐标)"""
         if isinstance(self.controller, AndroidController):
+            start_x, start_y = self._to_screen(start_x, start_y)
+            end_x, end_y = self._to_screen(end_x, end_y)
             self.controller.swipe_smooth(start_x, start_y, end_x, end_y, duration)
         else:
             self.swipe(start_x, start_y, end_x, end_y, duration)
 
     def multi_tap(self, positions: List[Tuple[int, int]], interval: float = 0.1):
-        """多点连续点击 (仅Android)"""
+        """多点连续点击 (仅Android, 帧坐标)"""
         if isinstance(self.controller, AndroidController):
+            positions = [self._to_screen(x, y) for x, y in positions]
             self.controller.multi_tap(positions, interval)
         else:
             for x, y in positions:
@@ -297,9 +367,10 @@ class ControllerManager:
             ry: 相对Y坐标 (0.0-1.0)
             duration: 点击持续时间
         """
+        # 相对屏幕坐标, 不经过帧坐标变换
         x = int(rx * self.controller.screen_width)
         y = int(ry * self.controller.screen_height)
-        self.tap(x, y, duration)
+        self.controller.tap(x, y, duration)
 
     def swipe_direction(self, direction: str, distance: int = 300, duration: float = 0.3):
         """
@@ -310,17 +381,19 @@ class ControllerManager:
             distance: 滑动距离(像素)
             duration: 持续时间
         """
+        # 屏幕坐标, 不经过帧坐标变换
         cx = self.controller.screen_width // 2
         cy = self.controller.screen_height // 2
+        swipe = self.controller.swipe
 
         if direction == "up":
-            self.swipe(cx, cy, cx, cy - distance, duration)
+            swipe(cx, cy, cx, cy - distance, duration)
         elif direction == "down":
-            self.swipe(cx, cy, cx, cy + distance, duration)
+            swipe(cx, cy, cx, cy + distance, duration)
         elif direction == "left":
-            self.swipe(cx, cy, cx - distance, cy, duration)
+            swipe(cx, cy, cx - distance, cy, duration)
         elif direction == "right":
-            self.swipe(cx, cy, cx + distance, cy, duration)
+            swipe(cx, cy, cx + distance, cy, duration)
         else:
             print(f"✗ 未知方向: {direction}")
 
@@ -1,3 +1,20 @@
-from .yolo_detector import YOLODetector, Detection, DetectionTracker
+from .yolo_detector import YOLODetector, Detection, DetectionSet, model_source
+from .wrapper import DetectorWrapper
+from .tracker import DetectionTracker, TrackingDetector
+from .flow import OpticalFlowDetector
+from .cache import CachedDetector
+from .template import TemplateDetector
+from .memo import StaticUIMemo
+from .cascade import CascadeDetector
+from .batcher import MicroBatcher
+from .qos import ResolutionController
+from .schedule import ScheduledDetector
+from .server import DetectorServer, RemoteDetector, load_authkey
 
-__all__ = ['YOLODetector', 'Detection', 'DetectionTracker']
+__all__ = [
+    'YOLODetector', 'Detection', 'DetectionSet', 'model_source', 'DetectorWrapper',
+    'DetectionTracker', 'TrackingDetector', 'OpticalFlowDetector',
+    'CachedDetector', 'TemplateDetector', 'StaticUIMemo',
+    'CascadeDetector', 'MicroBatcher', 'ResolutionController',
+    'ScheduledDetector', 'DetectorServer', 'RemoteDetector', 'load_authkey'
+]
@@ -0,0 +1,164 @@
+"""
+微批处理 - 合并多个设备的检测请求为一次批量推理
+Micro-Batcher - Merge detection requests from several producers into batched inference
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional
+
+import numpy as np
+
+from .yolo_detector import YOLODetector, DetectionSet
+
+
+class _Request:
+    """一次检测请求"""
+
+    __slots__ = ('image', 'filter_classes', 'future', 'submit_time')
+
+    def __init__(self, image: np.ndarray, filter_classes: Optional[List[str]]):
+        self.image = image
+        self.filter_classes = filter_classes
+        self.future: Future = Future()
+        self.submit_time = time.time()
+
+
+class MicroBatcher:
+    """
+    微批处理器
+
+    多个生产者 (例如每台手机一个线程) 调用 detect()/submit(), 后台线程收集请求:
+    凑满 max_batch 帧或第一帧等待超过 max_wait 秒后, 合并为一次 detect_batch 推理。
+    类别过滤在推理后按请求分别应用, 不同过滤条件的请求也能合并。
+    """
+
+    def __init__(
+        self,
+        detector: YOLODetector,
+        max_batch: int = 4,
+        max_wait: float = 0.01
+    ):
+        """
+        Args:
+            detector: 检测器 (需支持detect_batch)
+            max_batch: 单批最大帧数
+            max_wait: 第一帧到达后最长等待时间(秒)
+        """
+        self.detector = detector
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+
+        self._cond = threading.Condition()
+        self._queue: List[_Request] = []
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        # 统计信息
+        self.batches = 0
+        self.frames = 0
+        self.total_wait = 0.0
+        self.total_inference = 0.0
+
+    def start(self):
+        """启动后台批处理线程"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台线程, 未处理的请求以异常结束"""
+        with self._cond:
+            self._running = False
+            pending, self._queue = self._queue, []
+            self._cond.notify_all()
+        for request in pending:
+            request.future.set_exception(RuntimeError("批处理器已停止"))
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def submit(
+        self,
+        image: np.ndarray,
+        filter_classes: Optional[List[str]] = None
+    ) -> Future:
+        """
+        提交一帧 (不阻塞)
+
+        Returns:
+            Future, 结果为该帧的DetectionSet
+        """
+        request = _Request(image, filter_classes)
+        with self._cond:
+            if not self._running:
+                raise RuntimeError("批处理器未启动")
+            self._queue.append(request)
+            self._cond.notify_all()
+        return request.future
+
+    def detect(
+        self,
+        image: np.ndarray,
+        filter_classes: Optional[List[str]] = None,
+        timeout: Optional[float] = None
+    ) -> DetectionSet:
+        """提交一帧并等待结果 (接口与YOLODetector.detect相同)"""
+        return self.submit(image, filter_classes).result(timeout)
+
+    def _collect(self) -> List[_Request]:
+        """等待请求, 凑满一批或到达截止时间后返回"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._queue or not self._running)
+            if not self._running:
+                return []
+
+            deadline = self._queue[0].submit_time + self.max_wait
+            while len(self._queue) < self.max_batch and self._running:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch = self._queue[:self.max_batch]
+            del self._queue[:self.max_batch]
+            return batch
+
+    def _run(self):
+        while self._running:
+            batch = self._collect()
+            if not batch:
+                continue
+
+            # 过滤条件都相同时直接交给检测器 (解码阶段屏蔽其他类别), 否则推理后分别过滤
+            filters = {tuple(request.filter_classes or ()) for request in batch}
+            common = batch[0].filter_classes if len(filters) == 1 else None
+
+            start = time.time()
+            try:
+                results = self.detector.detect_batch([request.image for request in batch], common)
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            end = time.time()
+
+            self.batches += 1
+            self.frames += len(batch)
+            self.total_inference += end - start
+            for request, detections in zip(batch, results):
+                self.total_wait += start - request.submit_time
+                request.future.set_result(detections.filter_classes(request.filter_classes))
+
+    def get_stats(self) -> dict:
+        """获取批处理统计"""
+        return {
+            'batches': self.batches,
+            'frames': self.frames,
+            'avg_batch_size': self.frames / self.batches if self.batches else 0.0,
+            'avg_wait_ms': self.total_wait / self.frames * 1000 if self.frames else 0.0,
+            'avg_inference_ms': self.total_inference / self.batches * 1000 if self.batches else 0.0,
+        }
@@ -0,0 +1,193 @@
+"""
+检测结果缓存 - 按画面指纹复用重复画面的检测结果
+Detection Cache - LRU cache of detection results keyed by frame fingerprint
+"""
+
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from .wrapper import DetectorWrapper
+from .yolo_detector import DetectionSet
+
+
+class _CacheEntry:
+    """一条缓存记录"""
+
+    __slots__ = ('hash', 'thumb', 'detections', 'created')
+
+    def __init__(self, hash_bits: np.ndarray, thumb: np.ndarray, detections: DetectionSet):
+        self.hash = hash_bits
+        self.thumb = thumb
+        self.detections = detections
+        self.created = time.time()
+
+
+class CachedDetector(DetectorWrapper):
+    """
+    LRU检测缓存
+
+    每帧缩小为灰度缩略图 (thumb_size), 再由缩略图计算 16x16 差值哈希作为键:
+        1. 哈希完全相同且缩略图差不超过threshold -> 命中
+        2. 否则在同一过滤条件的记录中找汉明距离 <= max_hamming 且缩略图差不超过threshold的 -> 近似命中
+        3. 都没有则运行检测并写入缓存
+    缩略图差按 tiles 分块计算平均灰度差后取最大值, 小目标移动时所在分块的差值会超过阈值
+    (整图平均差看不出来)。超过max_entries时淘汰最久未使用的记录, 超过max_age秒的记录失效。
+    模型或阈值变化时整个缓存作废; 输入尺寸与过滤条件一起作为记录键的一部分,
+    分辨率QoS来回切换尺寸时各尺寸的记录互不影响, 也不会清空缓存。
+    只适用于没有运动的画面 (菜单/结算/加载), 战斗画面的目标每帧都在移动, 不应依赖缓存。
+    """
+
+    def __init__(
+        self,
+        detector,
+        max_entries: int = 128,
+        max_age: float = 10.0,
+        threshold: float = 2.0,
+        max_hamming: int = 0,
+        thumb_size: tuple = (64, 36),
+        tiles: tuple = (16, 9)
+    ):
+        """
+        Args:
+            detector: 被包装的检测器
+            max_entries: 最多缓存的画面数
+            max_age: 记录有效期(秒) (0表示不过期)
+            threshold: 缩略图分块平均灰度差阈值 (0-255), 任一分块超过即不命中
+            max_hamming: 近似命中允许的哈希汉明距离 (0表示只做精确匹配, 最大256)
+            thumb_size: 缩略图尺寸 (width, height)
+            tiles: 分块数 (列数, 行数)
+        """
+        super().__init__(detector)
+        self.max_entries = max(1, max_entries)
+        self.max_age = max_age
+        self.threshold = threshold
+        self.max_hamming = max_hamming
+        self.thumb_size = tuple(thumb_size)
+        self.tiles = tuple(tiles)
+
+        self._entries: "OrderedDict[tuple, _CacheEntry]" = OrderedDict()
+        self._model_key: Optional[tuple] = None
+
+        # 统计信息
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.invalidations = 0
+
+    def _fingerprint(self, image: np.ndarray):
+        """(哈希位 (32,) uint8, 缩略图)"""
+        # 先隔行隔列抽样到缩略图的约4倍, 整帧INTER_AREA缩放要慢一个数量级
+        step = max(1, min(image.shape[1] // (self.thumb_size[0] * 4), image.shape[0] // (self.thumb_size[1] * 4)))
+        thumb = cv2.resize(image[::step, ::step], self.thumb_size, interpolation=cv2.INTER_AREA)
+        if thumb.ndim == 3:
+            thumb = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(thumb, (17, 16), interpolation=cv2.INTER_AREA)
+        return np.packbits(small[:, 1:] > small[:, :-1]), thumb
+
+    def _current_model_key(self) -> tuple:
+        """影响检测结果的模型参数"""
+        detector = self.detector
+        class_names = getattr(detector, 'class_names', None)
+        return (
+            id(getattr(detector, 'model', None)),
+            getattr(detector, 'model_path', None),
+            getattr(detector, 'conf_threshold', None),
+            getattr(detector, 'iou_threshold', None),
+            tuple(class_names) if class_names else None,
+        )
+
+    def _matches(self, entry: _CacheEntry, thumb: np.ndarray) -> bool:
+        if entry.thumb.shape != thumb.shape:
+            return False
+        # 分块平均差 (INTER_AREA缩放到分块数即每块的均值)
+        tile_diff = cv2.resize(cv2.absdiff(entry.thumb, thumb), self.tiles, interpolation=cv2.INTER_AREA)
+        return float(tile_diff.max()) <= self.threshold
+
+    def _is_expired(self, entry: _CacheEntry, now: float) -> bool:
+        return bool(self.max_age) and now - entry.created > self.max_age
+
+    def _lookup(self, key: tuple, hash_bits: np.ndarray, thumb: np.ndarray) -> Optional[DetectionSet]:
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if self._is_expired(entry, now):
+                del self._entries[key]
+                self.expired += 1
+            elif self._matches(entry, thumb):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.detections
+
+        if not self.max_hamming:
+            return None
+
+        # 只在过滤条件和输入尺寸都相同的记录中查找
+        for other_key, entry in self._entries.items():
+            if other_key[1:] != key[1:]:
+                continue
+            distance = int(np.unpackbits(np.bitwise_xor(entry.hash, hash_bits)).sum())
+            if distance <= self.max_hamming and not self._is_expired(entry, now) and self._matches(entry, thumb):
+                self._entries.move_to_end(other_key)
+                self.near_hits += 1
+                return entry.detections
+        return None
+
+    def _store(self, key: tuple, hash_bits: np.ndarray, thumb: np.ndarray, detections: DetectionSet):
+        self._entries[key] = _CacheEntry(hash_bits, thumb, detections)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def detect(
+        self,
+        image: np.ndarray,
+        filter_classes: Optional[List[str]] = None
+    ) -> DetectionSet:
+        model_key = self._current_model_key()
+        if model_key != self._model_key:
+            if self._model_key is not None:
+                self.invalidate()
+            self._model_key = model_key
+
+        hash_bits, thumb = self._fingerprint(image)
+        key = (
+            hash_bits.tobytes(),
+            tuple(filter_classes) if filter_classes else None,
+            getattr(self.detector, 'imgsz', None),
+        )
+
+        detections = self._lookup(key, hash_bits, thumb)
+        if detections is not None:
+            return detections
+
+        self.misses += 1
+        detections = self.detector.detect(image, filter_classes)
+        self._store(key, hash_bits, thumb, detections)
+        return detections
+
+    def invalidate(self):
+        """清空缓存 (更换模型或修改阈值后调用, detect()也会自动检测)"""
+        if self._entries:
+            self._entries.clear()
+        self.invalidations += 1
+
+    def get_stats(self) -> dict:
+        """获取缓存统计"""
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'near_hits': self.near_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.near_hits) / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expired': self.expired,
+            'invalidations': self.invalidations,
+        }
@@ -0,0 +1,161 @@
+"""
+两级模型级联 - 小模型逐帧检测, 结果不确定时再运行大模型
+Model Cascade - Run the nano model every frame and escalate to the full model on ambiguity
+"""
+
+import time
+from collections import deque
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ops import nms
+from .wrapper import DetectorWrapper
+from .yolo_detector import DetectionSet
+
+
+class CascadeDetector(DetectorWrapper):
+    """
+    两级级联检测器
+
+    每帧先运行小模型 (fast_detector), 出现以下情况时再对同一帧运行大模型:
+        uncertain: 有检测结果的置信度落在不确定区间 [low, high)
+        critical:  请求的关键类别小模型一个都没检测到
+        interval:  距上次运行大模型已满full_interval帧
+    升级时以大模型结果为准, 再补上大模型没有覆盖到的小模型高置信度结果 (按类别NMS合并)。
+    小模型的置信度阈值应不高于区间下限, 否则看不到不确定的候选框。
+    """
+
+    def __init__(
+        self,
+        fast_detector,
+        full_detector,
+        uncertain_band: Tuple[float, float] = (0.25, 0.5),
+        critical_classes: Optional[List[str]] = None,
+        full_interval: int = 30,
+        merge_iou: float = 0.5,
+        window: int = 300
+    ):
+        """
+        Args:
+            fast_detector: 小模型检测器 (每帧运行)
+            full_detector: 大模型检测器 (按需运行)
+            uncertain_band: 不确定置信度区间 (low, high)
+            critical_classes: 关键类别, 小模型漏检时升级
+            full_interval: 每N帧至少运行一次大模型 (0表示不定期运行)
+            merge_iou: 合并两级结果时的NMS阈值
+            window: 延迟统计窗口 (最近N帧)
+        """
+        super().__init__(fast_detector)
+        self.full_detector = full_detector
+        self.uncertain_band = tuple(uncertain_band)
+        self.critical_classes = list(critical_classes or [])
+        self.full_interval = full_interval
+        self.merge_iou = merge_iou
+
+        self._class_map = self._build_class_map()
+        self._since_full = 0
+
+        # 统计信息
+        self.frames = 0
+        self.escalations = 0
+        self.reasons = {'uncertain': 0, 'critical': 0, 'interval': 0}
+        self._latencies = deque(maxlen=window)
+        self._escalated = deque(maxlen=window)
+
+    def _build_class_map(self) -> Optional[np.ndarray]:
+        """大模型类别ID -> 小模型类别ID (类别表相同时为None, 无对应类别为-1)"""
+        fast_names = list(self.detector.class_names)
+        full_names = list(self.full_detector.class_names)
+        if fast_names == full_names:
+            return None
+        index = {name: i for i, name in enumerate(fast_names)}
+        return np.array([index.get(name, -1) for name in full_names], dtype=np.int64)
+
+    def _to_fast_classes(self, detections: DetectionSet) -> DetectionSet:
+        if self._class_map is None or not len(detections):
+            return detections
+        class_ids = self._class_map[detections.class_ids]
+        keep = class_ids >= 0
+        return DetectionSet(
+            detections.boxes[keep], detections.scores[keep], class_ids[keep], self.detector.class_names
+        )
+
+    def _escalation_reason(self, fast: DetectionSet, requested: Sequence[str]) -> Optional[str]:
+        low, high = self.uncertain_band
+        if len(fast) and ((fast.scores >= low) & (fast.scores < high)).any():
+            return 'uncertain'
+        for name in self.critical_classes:
+            if name in requested and not fast.has_class(name):
+                return 'critical'
+        if self.full_interval and self._since_full >= self.full_interval:
+            return 'interval'
+        return None
+
+    def _merge(self, full: DetectionSet, fast: DetectionSet) -> DetectionSet:
+        """大模型结果优先, 补充小模型的高置信度结果"""
+        confident = fast[fast.scores >= self.uncertain_band[1]]
+        if not len(confident):
+            return full
+        if not len(full):
+            return confident
+
+        boxes = np.concatenate([full.boxes, confident.boxes])
+        class_ids = np.concatenate([full.class_ids, confident.class_ids])
+        scores = np.concatenate([full.scores, confident.scores])
+        # 排序键: 大模型的框整体排在前面
+        priority = np.concatenate([full.scores + 1.0, confident.scores])
+        keep = np.sort(nms(boxes, priority, self.merge_iou, class_ids))
+        return DetectionSet(boxes[keep], scores[keep], class_ids[keep], self.detector.class_names)
+
+    def detect(
+        self,
+        image: np.ndarray,
+        filter_classes: Optional[List[str]] = None
+    ) -> DetectionSet:
+        start = time.perf_counter()
+        self.frames += 1
+        self._since_full += 1
+
+        fast = self.detector.detect(image, filter_classes)
+        requested = filter_classes or self.detector.class_names
+        reason = self._escalation_reason(fast, requested)
+
+        if reason is None:
+            result = fast
+        else:
+            self.escalations += 1
+            self.reasons[reason] += 1
+            self._since_full = 0
+            full = self._to_fast_classes(self.full_detector.detect(image, filter_classes))
+            result = self._merge(full, fast)
+
+        self._latencies.append(time.perf_counter() - start)
+        self._escalated.append(reason is not None)
+        return result
+
+    def get_stats(self) -> dict:
+        """获取级联统计 (延迟为最近窗口内的分布)"""
+        latencies = np.array(self._latencies) * 1000
+        escalated = np.array(self._escalated, dtype=bool)
+
+        def percentiles(values):
+            if not len(values):
+                return 0.0, 0.0
+            return float(np.percentile(values, 50)), float(np.percentile(values, 95))
+
+        fast_p50, fast_p95 = percentiles(latencies[~escalated])
+        full_p50, full_p95 = percentiles(latencies[escalated])
+        all_p50, all_p95 = percentiles(latencies)
+        return {
+            'frames': self.frames,
+            'escalations': self.escalations,
+            'escalation_rate': self.escalations / self.frames if self.frames else 0.0,
+            'reasons': dict(self.reasons),
+            'latency_p50_ms': all_p50,
+            'latency_p95_ms': all_p95,
+            'fast_p50_ms': fast_p50,
+            'fast_p95_ms': fast_p95,
+            'escalated_p50_ms': full_p50,
+            'escalated_p95_ms': full_p95,
+        }
@@ -0,0 +1,210 @@
+"""
+关键帧检测 - 关键帧之间用稀疏光流传播检测框
+Keyframe Detection - Propagate boxes between keyframes with sparse optical flow
+"""
+
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from .wrapper import DetectorWrapper
+from .yolo_detector import DetectionSet
+
+
+class OpticalFlowDetector(DetectorWrapper):
+    """
+    光流关键帧检测器
+
+    关键帧运行完整检测; 其余帧在缩小的灰度图上对每个框内的网格点做金字塔LK光流
+    (cv2.calcOpticalFlowPyrLK), 取可靠点位移的中位数平移检测框。
+    出现以下情况时立即在当前帧重新检测:
+        - 距上个关键帧达到间隔 (按类别可设不同间隔, 取画面中类别的最小值)
+        - 某个框的前后向误差检查通过的点比例过低, 或单帧位移过大 (漂移)
+        - 传播后的置信度 (随可靠点比例衰减) 低于min_confidence
+        - 过滤类别发生变化
+    """
+
+    def __init__(
+        self,
+        detector,
+        keyframe_interval: int = 5,
+        min_confidence: float = 0.25,
+        scale: float = 0.5,
+        grid_size: int = 4,
+        fb_threshold: float = 1.0,
+        min_track_ratio: float = 0.5,
+        max_shift: float = 0.5,
+        class_intervals: Optional[Dict[str, int]] = None
+    ):
+        """
+        Args:
+            detector: 被包装的检测器
+            keyframe_interval: 每N帧运行一次完整检测
+            min_confidence: 传播置信度低于该值时重新检测
+            scale: 光流计算使用的缩放比例
+            grid_size: 每个框内采样 grid_size x grid_size 个点
+            fb_threshold: 前后向光流误差阈值 (缩放后的像素)
+            min_track_ratio: 可靠点比例低于该值视为漂移
+            max_shift: 单帧位移超过框尺寸的该比例视为漂移
+            class_intervals: 按类别覆盖关键帧间隔, 如 {"enemy": 2, "hp_bar": 10}
+        """
+        super().__init__(detector)
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.min_confidence = min_confidence
+        self.scale = scale
+        self.grid_size = max(1, grid_size)
+        self.fb_threshold = fb_threshold
+        self.min_track_ratio = min_track_ratio
+        self.max_shift = max_shift
+        self.class_intervals = dict(class_intervals or {})
+
+        self.lk_params = dict(
+            winSize=(15, 15),
+            maxLevel=2,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03)
+        )
+
+        self._prev_gray: Optional[np.ndarray] = None
+        self._detections: Optional[DetectionSet] = None
+        self._interval = self.keyframe_interval
+        self._since_keyframe = 0
+        self._filter_key: Optional[tuple] = None
+
+        # 统计信息
+        self.frames = 0
+        self.keyframes = 0
+        self.propagated = 0
+        self.drift_redetects = 0
+        self.confidence_redetects = 0
+
+    def _gray(self, image: np.ndarray) -> np.ndarray:
+        """缩小的灰度图"""
+        if self.scale != 1.0:
+            image = cv2.resize(image, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return image
+
+    def _keyframe_interval(self, detections: DetectionSet) -> int:
+        """画面中各类别间隔的最小值"""
+        if not self.class_intervals or not len(detections):
+            return self.keyframe_interval
+        names = detections.class_names
+        intervals = [
+            self.class_intervals.get(names[c] if c < len(names) else str(c), self.keyframe_interval)
+            for c in np.unique(detections.class_ids)
+        ]
+        return max(1, min(intervals))
+
+    def _grid_points(self, boxes: np.ndarray) -> np.ndarray:
+        """每个框内均匀采样的网格点 (N * g * g, 1, 2), 缩放后的坐标"""
+        g = self.grid_size
+        steps = (np.arange(g, dtype=np.float32) + 0.5) / g
+        scaled = boxes * self.scale
+        xs = scaled[:, 0, None] + (scaled[:, 2] - scaled[:, 0])[:, None] * steps
+        ys = scaled[:, 1, None] + (scaled[:, 3] - scaled[:, 1])[:, None] * steps
+        points = np.empty((len(boxes), g, g, 2), dtype=np.float32)
+        points[..., 0] = xs[:, None, :]
+        points[..., 1] = ys[:, :, None]
+        return points.reshape(-1, 1, 2)
+
+    def _keyframe(self, image: np.ndarray, gray: np.ndarray, filter_classes) -> DetectionSet:
+        detections = self.detector.detect(image, filter_classes)
+        self.keyframes += 1
+        self._since_keyframe = 0
+        self._detections = detections
+        self._interval = self._keyframe_interval(detections)
+        self._prev_gray = gray
+        return detections
+
+    def _propagate(self, gray: np.ndarray) -> Optional[DetectionSet]:
+        """
+        光流传播上一帧的检测框
+
+        Returns:
+            传播后的结果; 检测到漂移或置信度过低时返回None
+        """
+        previous = self._detections
+        if not len(previous):
+            return previous
+
+        count = len(previous)
+        points = self._grid_points(previous.boxes)
+        forward, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, points, None, **self.lk_params)
+        backward, status_back, _ = cv2.calcOpticalFlowPyrLK(gray, self._prev_gray, forward, None, **self.lk_params)
+
+        fb_error = np.linalg.norm((points - backward).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (status_back.ravel() == 1) & (fb_error < self.fb_threshold)
+        good = good.reshape(count, -1)
+        track_ratio = good.mean(axis=1)
+        if (track_ratio < self.min_track_ratio).any():
+            self.drift_redetects += 1
+            return None
+
+        # 每个框取可靠点位移的中位数
+        shifts = (forward - points).reshape(count, -1, 2)
+        shifts = np.where(good[:, :, None], shifts, np.nan)
+        shift = np.nanmedian(shifts, axis=1) / self.scale
+
+        sizes = previous.boxes[:, 2:] - previous.boxes[:, :2]
+        if (np.abs(shift) > self.max_shift * np.maximum(sizes, 1)).any():
+            self.drift_redetects += 1
+            return None
+
+        scores = previous.scores * track_ratio
+        if (scores < self.min_confidence).any():
+            self.confidence_redetects += 1
+            return None
+
+        boxes = previous.boxes + np.tile(shift, 2)
+        height, width = gray.shape[:2]
+        boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, width / self.scale)
+        boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, height / self.scale)
+        return DetectionSet(boxes, scores, previous.class_ids, previous.class_names, previous.track_ids)
+
+    def detect(
+        self,
+        image: np.ndarray,
+        filter_classes: Optional[List[str]] = None
+    ) -> DetectionSet:
+        self.frames += 1
+        gray = self._gray(image)
+        filter_key = tuple(filter_classes) if filter_classes else None
+
+        if (
+            self._detections is None
+            or filter_key != self._filter_key
+            or self._since_keyframe + 1 >= self._interval
+            or self._prev_gray.shape != gray.shape
+        ):
+            self._filter_key = filter_key
+            return self._keyframe(image, gray, filter_classes)
+
+        detections = self._propagate(gray)
+        if detections is None:
+            return self._keyframe(image, gray, filter_classes)
+
+        self.propagated += 1
+        self._since_keyframe += 1
+        self._detections = detections
+        self._prev_gray = gray
+        return detections
+
+    def reset(self):
+        """丢弃传播状态, 下一帧重新检测"""
+        self._detections = None
+        self._prev_gray = None
+
+    def get_stats(self) -> dict:
+        """获取关键帧统计"""
+        return {
+            'frames': self.frames,
+            'keyframes': self.keyframes,
+            'propagated': self.propagated,
+            'drift_redetects': self.drift_redetects,
+            'confidence_redetects': self.confidence_redetects,
+            'inference_calls': self.keyframes,
+            'inferences_saved': self.frames - self.keyframes,
+            'saved_ratio': (self.frames - self.keyframes) / self.frames if self.frames else 0.0,
+        }
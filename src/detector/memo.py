@@ -0,0 +1,167 @@
+"""
+固定UI位置记忆 - 用像素校验确认按钮仍在原位, 无需推理
+Static UI Memo - Remember static element boxes and re-verify them with pixel checksums
+"""
+
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from .wrapper import DetectorWrapper
+from .yolo_detector import DetectionSet
+
+
+class _MemoEntry:
+    """一个已确认位置的固定UI元素"""
+
+    __slots__ = ('box', 'score', 'class_id', 'checksum')
+
+    def __init__(self, box: np.ndarray, score: float, class_id: int, checksum: np.ndarray):
+        self.box = box
+        self.score = score
+        self.class_id = class_id
+        self.checksum = checksum
+
+
+class StaticUIMemo(DetectorWrapper):
+    """
+    固定UI位置记忆
+
+    检测器找到配置中的固定类别后, 记住其边界框和框内像素的校验值
+    (缩小为 checksum_size x checksum_size 的彩色缩略图)。之后每帧只重新计算校验值:
+    与记录的平均差不超过该类别的tolerance即视为仍在原位, 直接返回, 不做推理;
+    校验失败的记录立即删除。
+    检测器只检测其余类别 (非固定类别和校验失败的类别), 结果与通过校验的记录合并;
+    请求的类别全部通过校验时跳过推理。每refresh_interval帧对请求的全部类别运行一次检测器。
+    """
+
+    def __init__(
+        self,
+        detector,
+        class_config: Dict[str, dict],
+        min_confidence: float = 0.6,
+        checksum_size: int = 8,
+        refresh_interval: int = 120
+    ):
+        """
+        Args:
+            detector: 被包装的检测器
+            class_config: 类别配置 {类别名: {"tolerance": 允许的平均像素差(0-255)}}
+            min_confidence: 记住位置所需的最低检测置信度
+            checksum_size: 校验缩略图边长
+            refresh_interval: 最多连续多少帧不运行检测器 (0表示不限制)
+        """
+        super().__init__(detector)
+        self.class_config = {name: dict(options or {}) for name, options in class_config.items()}
+        self.min_confidence = min_confidence
+        self.checksum_size = checksum_size
+        self.refresh_interval = refresh_interval
+
+        self.entries: Dict[str, List[_MemoEntry]] = {}
+        self._since_inference = 0
+
+        # 统计信息
+        self.frames = 0
+        self.memo_frames = 0
+        self.verified = 0
+        self.invalidated = 0
+
+    def _tolerance(self, class_name: str) -> float:
+        return float(self.class_config[class_name].get('tolerance', 4.0))
+
+    def _checksum(self, image: np.ndarray, box: np.ndarray) -> Optional[np.ndarray]:
+        """框内像素的缩略图校验值"""
+        x1, y1, x2, y2 = box
+        crop = image[y1:y2, x1:x2]
+        if crop.shape[0] < 2 or crop.shape[1] < 2:
+            return None
+        step = max(1, min(crop.shape[0], crop.shape[1]) // (self.checksum_size * 4))
+        size = (self.checksum_size, self.checksum_size)
+        return cv2.resize(crop[::step, ::step], size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def _verify(self, image: np.ndarray, class_name: str) -> List[_MemoEntry]:
+        """校验该类别的所有记录, 删除失败的"""
+        tolerance = self._tolerance(class_name)
+        kept = []
+        for entry in self.entries.get(class_name, []):
+            checksum = self._checksum(image, entry.box)
+            if checksum is not None and float(np.abs(checksum - entry.checksum).mean()) <= tolerance:
+                kept.append(entry)
+                self.verified += 1
+            else:
+                self.invalidated += 1
+
+        if kept:
+            self.entries[class_name] = kept
+        else:
+            self.entries.pop(class_name, None)
+        return kept
+
+    def _remember(self, image: np.ndarray, detections: DetectionSet, requested: List[str]):
+        """用检测结果刷新请求过的类别的记录"""
+        for name in requested:
+            if name not in self.class_config:
+                continue
+            subset = detections.by_class(name)
+            subset = subset[subset.scores >= self.min_confidence]
+            entries = []
+            for box, score, class_id in zip(subset.int_boxes, subset.scores, subset.class_ids):
+                checksum = self._checksum(image, box)
+                if checksum is not None:
+                    entries.append(_MemoEntry(box, float(score), int(class_id), checksum))
+            if entries:
+                self.entries[name] = entries
+            else:
+                self.entries.pop(name, None)
+
+    def detect(
+        self,
+        image: np.ndarray,
+        filter_classes: Optional[List[str]] = None
+    ) -> DetectionSet:
+        self.frames += 1
+        self._since_inference += 1
+
+        requested = filter_classes or self.detector.class_names
+        refresh = self.refresh_interval and self._since_inference > self.refresh_interval
+
+        verified = []
+        rest = []
+        for name in requested:
+            entries = self._verify(image, name) if name in self.class_config and not refresh else []
+            if entries:
+                verified.extend(entries)
+            else:
+                rest.append(name)
+
+        memo = DetectionSet(
+            np.array([e.box for e in verified], dtype=np.float32).reshape(-1, 4),
+            [e.score for e in verified],
+            [e.class_id for e in verified],
+            self.detector.class_names
+        )
+        if not rest:
+            self.memo_frames += 1
+            return memo
+
+        if not verified:
+            self._since_inference = 0
+        detections = self.detector.detect(image, rest if verified else filter_classes)
+        self._remember(image, detections, rest)
+        return DetectionSet.concatenate([memo, detections], self.detector.class_names)
+
+    def reset(self):
+        """清除所有记录"""
+        self.entries.clear()
+
+    def get_stats(self) -> dict:
+        """获取记忆统计"""
+        return {
+            'frames': self.frames,
+            'memo_frames': self.memo_frames,
+            'memo_ratio': self.memo_frames / self.frames if self.frames else 0.0,
+            'entries': sum(len(e) for e in self.entries.values()),
+            'verified': self.verified,
+            'invalidated': self.invalidated,
+        }
@@ -0,0 +1,277 @@
+"""
+检测前后处理 - 向量化的letterbox、YOLOv8输出解码与NMS
+Detection Ops - Vectorized letterbox, YOLOv8 output decoding and NMS
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import cv2
+
+
+class Letterbox:
+    """
+    letterbox缩放到预分配的输入张量
+
+    保持宽高比缩放后居中填充到 (H, W)。画布与 (B, 3, H, W) 输入张量只分配一次
+    (批量超过容量时扩容), 每个批次位置记住自己的几何参数,
+    源图尺寸不变时填充区域也不会重复写入。
+    TFLite等NHWC布局的模型使用 layout="nhwc", 张量为 (B, H, W, 3)。
+    输入为uint8的量化模型使用 normalize=False, 直接传入0-255像素值。
+    """
+
+    LAYOUTS = ("nchw", "nhwc")
+
+    def __init__(
+        self,
+        input_size: Tuple[int, int] = (640, 640),
+        pad_value: int = 114,
+        dtype=np.float32,
+        batch_size: int = 1,
+        layout: str = "nchw",
+        normalize: bool = True
+    ):
+        """
+        Args:
+            input_size: 模型输入尺寸 (height, width)
+            pad_value: 填充灰度值
+            dtype: 输入张量类型
+            batch_size: 初始批量容量
+            layout: 输入张量布局 nchw / nhwc
+            normalize: 是否把像素值缩放到0-1
+        """
+        if layout not in self.LAYOUTS:
+            raise ValueError(f"不支持的张量布局: {layout}")
+
+        self.input_size = tuple(input_size)
+        self.pad_value = pad_value
+        self.dtype = np.dtype(dtype)
+        self.layout = layout
+        self.normalize = normalize
+        self._scale = np.array(1.0 / 255.0, dtype=self.dtype)
+
+        self.canvas: Optional[np.ndarray] = None
+        self.tensor: Optional[np.ndarray] = None
+        # 每个批次位置的几何参数: (源图尺寸, 缩放比例, (left, top), (left, top, new_w, new_h))
+        self._geometry: List[Optional[tuple]] = []
+        self._allocate(max(1, batch_size))
+
+    def _allocate(self, batch_size: int):
+        """分配 (或扩容) 画布与输入张量"""
+        height, width = self.input_size
+        self.canvas = np.full((batch_size, height, width, 3), self.pad_value, dtype=np.uint8)
+        if self.layout == "nhwc":
+            self.tensor = np.zeros((batch_size, height, width, 3), dtype=self.dtype)
+        else:
+            self.tensor = np.zeros((batch_size, 3, height, width), dtype=self.dtype)
+        self._geometry = [None] * batch_size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._geometry)
+
+    def _update_geometry(self, index: int, shape: Tuple[int, int]):
+        """源图尺寸变化时重新计算缩放与填充"""
+        height, width = self.input_size
+        src_h, src_w = shape
+        ratio = min(height / src_h, width / src_w)
+        new_w = int(round(src_w * ratio))
+        new_h = int(round(src_h * ratio))
+        left = (width - new_w) // 2
+        top = (height - new_h) // 2
+
+        self.canvas[index] = self.pad_value
+        self._geometry[index] = (shape, ratio, (left, top), (left, top, new_w, new_h))
+
+    def _fill(self, index: int, image: np.ndarray):
+        """把一帧写入批次中的index位置"""
+        geometry = self._geometry[index]
+        if geometry is None or geometry[0] != image.shape[:2]:
+            self._update_geometry(index, image.shape[:2])
+            geometry = self._geometry[index]
+
+        left, top, new_w, new_h = geometry[3]
+        target = self.canvas[index, top:top + new_h, left:left + new_w]
+        if (new_w, new_h) == (image.shape[1], image.shape[0]):
+            np.copyto(target, image)
+        else:
+            target[:] = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        """
+        预处理一帧
+
+        Args:
+            image: BGR图像
+
+        Returns:
+            (1, 3, H, W) RGB归一化张量 (预分配缓冲区, 下一次调用会被覆盖)
+        """
+        return self.batch([image])
+
+    def batch(self, images: Sequence[np.ndarray]) -> np.ndarray:
+        """
+        预处理一批尺寸可以不同的帧
+
+        Args:
+            images: BGR图像列表
+
+        Returns:
+            (N, 3, H, W) 或 (N, H, W, 3) RGB归一化张量 (预分配缓冲区的视图)
+        """
+        count = len(images)
+        if count > self.capacity:
+            self._allocate(count)
+
+        for i, image in enumerate(images):
+            self._fill(i, image)
+
+        # BGR -> RGB, HWC -> CHW, /255 一次完成
+        rgb = self.canvas[:count, :, :, ::-1]
+        if self.layout == "nchw":
+            rgb = rgb.transpose(0, 3, 1, 2)
+        if self.normalize:
+            np.multiply(rgb, self._scale, out=self.tensor[:count], casting='unsafe')
+        else:
+            np.copyto(self.tensor[:count], rgb, casting='unsafe')
+        return self.tensor[:count]
+
+    def scale_boxes(
+        self,
+        boxes: np.ndarray,
+        image_shape: Tuple[int, int],
+        index: int = 0
+    ) -> np.ndarray:
+        """
+        把模型输入坐标系下的框映射回原图 (原地修改)
+
+        Args:
+            boxes: (N, 4) xyxy
+            image_shape: 原图 (height, width)
+            index: 该图在批次中的位置
+        """
+        _, ratio, (left, top), _ = self._geometry[index]
+        boxes[:, [0, 2]] -= left
+        boxes[:, [1, 3]] -= top
+        boxes /= ratio
+        boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, image_shape[1])
+        boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, image_shape[0])
+        return boxes
+
+
+def decode_yolov8(
+    output: np.ndarray,
+    conf_threshold: float = 0.25,
+    class_mask: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    解码YOLOv8检测头输出
+
+    Args:
+        output: 模型输出 (1, 4 + nc, N) 或 (1, N, 4 + nc), 框为 cx, cy, w, h
+        conf_threshold: 置信度阈值
+        class_mask: (nc,) 布尔数组, 只保留为True的类别 (可选)
+
+    Returns:
+        (boxes (M, 4) xyxy float32, scores (M,), class_ids (M,))
+    """
+    pred = output.reshape(output.shape[-2:])
+    # 锚点数远大于通道数, 据此判断布局
+    if pred.shape[0] < pred.shape[1]:
+        pred = pred.T
+
+    scores_all = pred[:, 4:]
+    if class_mask is not None:
+        scores_all = np.where(class_mask, scores_all, 0)
+
+    class_ids = scores_all.argmax(axis=1)
+    scores = np.take_along_axis(scores_all, class_ids[:, None], axis=1)[:, 0]
+
+    keep = scores > conf_threshold
+    xywh = pred[keep, :4].astype(np.float32)
+    scores = scores[keep].astype(np.float32)
+    class_ids = class_ids[keep]
+
+    boxes = np.empty_like(xywh)
+    half_w = xywh[:, 2] / 2
+    half_h = xywh[:, 3] / 2
+    boxes[:, 0] = xywh[:, 0] - half_w
+    boxes[:, 1] = xywh[:, 1] - half_h
+    boxes[:, 2] = xywh[:, 0] + half_w
+    boxes[:, 3] = xywh[:, 1] + half_h
+    return boxes, scores, class_ids
+
+
+def box_iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    两组框的两两IoU
+
+    Args:
+        boxes_a: (N, 4) xyxy
+        boxes_b: (M, 4) xyxy
+
+    Returns:
+        (N, M) IoU矩阵
+    """
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+
+    x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-9)
+
+
+def nms(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    iou_threshold: float = 0.45,
+    class_ids: Optional[np.ndarray] = None,
+    max_det: int = 300
+) -> np.ndarray:
+    """
+    非极大值抑制
+
+    贪心过程只在保留下来的框上循环, 每次用一次向量运算抑制其余所有候选框;
+    传入class_ids时按类别分别抑制 (给不同类别的框加上互不重叠的偏移)。
+
+    Args:
+        boxes: (N, 4) xyxy
+        scores: (N,)
+        iou_threshold: IoU阈值
+        class_ids: (N,) 类别ID (可选)
+        max_det: 最多保留的框数
+
+    Returns:
+        保留框的索引 (按分数降序)
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    candidates = boxes
+    if class_ids is not None:
+        offset = boxes.max() - boxes.min() + 1
+        candidates = boxes + class_ids[:, None].astype(boxes.dtype) * offset
+
+    x1, y1, x2, y2 = candidates.T
+    areas = (x2 - x1) * (y2 - y1)
+
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        if len(keep) >= max_det:
+            break
+        rest = order[1:]
+        w = np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest])
+        h = np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest])
+        inter = np.maximum(w, 0) * np.maximum(h, 0)
+        iou = inter / np.maximum(areas[best] + areas[rest] - inter, 1e-9)
+        order = rest[iou <= iou_threshold]
+
+    return np.asarray(keep, dtype=np.int64)
@@ -0,0 +1,143 @@
+"""
+自适应输入分辨率 - 按帧耗时与FPS预算升降检测分辨率
+Resolution QoS - Step the inference resolution down under load and back up with headroom
+"""
+
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class ResolutionController:
+    """
+    输入分辨率QoS控制器
+
+    每帧记录处理耗时 (不含FPS限制的休眠), 窗口内的p90耗时与帧预算之比为负载:
+        负载 > high_water: 降一级分辨率 (如 640 -> 480 -> 320)
+        负载 < low_water:  升一级分辨率
+    每次调整后清空窗口, 至少经过cooldown帧才能再次调整, 避免来回抖动。
+    low_water应低于 high_water / (相邻两级边长比)^2, 否则升级后会立即超载再降回去。
+    min_sizes为各游戏状态允许的最低分辨率 (如战斗中需要看清小目标),
+    进入该状态时低于下限会立即升到下限。
+    """
+
+    def __init__(
+        self,
+        detectors: Sequence,
+        budget: float,
+        sizes: Sequence[int] = (640, 480, 320),
+        high_water: float = 0.9,
+        low_water: float = 0.5,
+        window: int = 15,
+        cooldown: int = 30,
+        min_sizes: Optional[Dict[str, int]] = None
+    ):
+        """
+        Args:
+            detectors: 要调整的YOLODetector列表 (不支持调整输入尺寸的会被忽略)
+            budget: 每帧耗时预算(秒), 通常为 1 / fps_limit
+            sizes: 可选的输入边长
+            high_water: 降低分辨率的负载阈值
+            low_water: 提高分辨率的负载阈值
+            window: 负载统计窗口(帧)
+            cooldown: 两次调整之间的最少帧数
+            min_sizes: 各游戏状态的最低分辨率 {状态名: 边长}
+        """
+        self.detectors = [d for d in detectors if getattr(d, 'supports_input_size', False)]
+        self.budget = budget
+        self.sizes: List[int] = sorted(set(sizes), reverse=True)
+        self.high_water = high_water
+        self.low_water = low_water
+        self.cooldown = cooldown
+        self.min_sizes = dict(min_sizes or {})
+
+        self.level = 0
+        self.state: Optional[str] = None
+        self._latencies = deque(maxlen=max(1, window))
+        self._since_change = 0
+
+        # 统计信息
+        self.frames = 0
+        self.step_downs = 0
+        self.step_ups = 0
+        self.state_raises = 0
+        self.frames_at: Dict[int, int] = {size: 0 for size in self.sizes}
+        self.load = 0.0
+
+        self._apply()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.detectors) and self.budget > 0 and len(self.sizes) > 1
+
+    @property
+    def size(self) -> int:
+        return self.sizes[self.level]
+
+    def _max_level(self) -> int:
+        """当前状态允许的最低分辨率对应的级别"""
+        minimum = self.min_sizes.get(self.state, 0)
+        allowed = [i for i, size in enumerate(self.sizes) if size >= minimum]
+        return allowed[-1] if allowed else 0
+
+    def _apply(self):
+        for detector in self.detectors:
+            detector.set_input_size(self.size)
+
+    def _change(self, level: int):
+        self.level = level
+        self._latencies.clear()
+        self._since_change = 0
+        self._apply()
+
+    def update(self, latency: float, state: Optional[str] = None) -> int:
+        """
+        记录一帧的处理耗时
+
+        Args:
+            latency: 本帧处理耗时(秒)
+            state: 当前游戏状态名
+
+        Returns:
+            下一帧使用的输入边长
+        """
+        if not self.enabled:
+            return self.size
+
+        self.frames += 1
+        self.frames_at[self.size] += 1
+        self._since_change += 1
+        self._latencies.append(latency)
+
+        if state != self.state:
+            self.state = state
+            if self.level > self._max_level():
+                self.state_raises += 1
+                self._change(self._max_level())
+                return self.size
+
+        if len(self._latencies) < self._latencies.maxlen:
+            return self.size
+        self.load = float(np.percentile(self._latencies, 90)) / self.budget
+        if self._since_change < self.cooldown:
+            return self.size
+
+        if self.load > self.high_water and self.level < self._max_level():
+            self.step_downs += 1
+            self._change(self.level + 1)
+        elif self.load < self.low_water and self.level > 0:
+            self.step_ups += 1
+            self._change(self.level - 1)
+        return self.size
+
+    def get_stats(self) -> dict:
+        """获取QoS统计"""
+        return {
+            'size': self.size,
+            'load': self.load,
+            'step_downs': self.step_downs,
+            'step_ups': self.step_ups,
+            'state_raises': self.state_raises,
+            'frames_at': dict(self.frames_at),
+        }
@@ -0,0 +1,125 @@
+"""
+按状态调度检测 - 每个类别按各自的轮询频率检测, 没有到期类别时不推理
+Detection Schedule - Poll each class at its own rate and skip inference when nothing is due
+"""
+
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .wrapper import DetectorWrapper
+from .yolo_detector import DetectionSet
+
+
+# 调度表中代表"其余全部类别"的键
+ALL_CLASSES = '*'
+
+
+class ScheduledDetector(DetectorWrapper):
+    """
+    类别轮询调度检测器
+
+    调度表为 {类别名: 轮询频率(Hz)}, 频率0表示每帧检测, '*' 为其余全部类别的频率,
+    没有出现在表中的类别不再检测, 也不会出现在结果中。
+    有类别到期时运行内层检测器, filter_classes固定为调度表中的全部类别 (解码阶段直接屏蔽其他类别;
+    过滤条件不随到期类别变化, 内层的跟踪/光流包装不会因此重新开始), 顺带刷新所有类别的结果;
+    没有到期的类别时直接返回各类别最近一次的结果, 不做推理。
+    调度表为None时不做调度, 每帧检测全部类别。
+    """
+
+    def __init__(self, detector, clock=time.monotonic):
+        """
+        Args:
+            detector: 被包装的检测器
+            clock: 计时函数 (秒)
+        """
+        super().__init__(detector)
+        self.clock = clock
+
+        self.schedule: Optional[Dict[str, float]] = None
+        self._rates: Dict[str, float] = {}
+        self._results: Dict[str, DetectionSet] = {}
+        self._polled: Dict[str, float] = {}
+
+        # 统计信息
+        self.frames = 0
+        self.inference_frames = 0
+        self.class_polls = 0
+
+    def set_schedule(self, schedule: Optional[Dict[str, float]]):
+        """
+        切换调度表 (通常随游戏状态变化)
+
+        新表中的类别沿用已有的结果和轮询时间, 不在新表中的类别结果被丢弃。
+        """
+        schedule = dict(schedule) if schedule else None
+        if schedule == self.schedule:
+            return
+        self.schedule = schedule
+
+        if schedule is None:
+            self._rates = {}
+        else:
+            default = schedule.get(ALL_CLASSES)
+            rates = {name: default for name in self.detector.class_names} if default is not None else {}
+            rates.update((name, rate) for name, rate in schedule.items() if name != ALL_CLASSES)
+            self._rates = rates
+
+        for name in list(self._results):
+            if name not in self._rates:
+                del self._results[name]
+                self._polled.pop(name, None)
+
+    def _due_classes(self, now: float, requested: Optional[List[str]]) -> List[str]:
+        due = []
+        for name, rate in self._rates.items():
+            if requested and name not in requested:
+                continue
+            last = self._polled.get(name)
+            if last is None or not rate or now - last >= 1.0 / rate:
+                due.append(name)
+        return due
+
+    def detect(
+        self,
+        image: np.ndarray,
+        filter_classes: Optional[List[str]] = None
+    ) -> DetectionSet:
+        self.frames += 1
+        if self.schedule is None:
+            self.inference_frames += 1
+            return self.detector.detect(image, filter_classes)
+
+        now = self.clock()
+        due = self._due_classes(now, filter_classes)
+        names = [name for name in self._rates if not filter_classes or name in filter_classes]
+        if due:
+            self.inference_frames += 1
+            self.class_polls += len(due)
+            # 调度表覆盖全部类别时不做类别过滤, 解码更快
+            full = set(names) >= set(self.detector.class_names)
+            detections = self.detector.detect(image, None if full else names)
+            for name in names:
+                self._results[name] = detections.by_class(name)
+                self._polled[name] = now
+
+        return DetectionSet.concatenate(
+            [self._results[name] for name in names if name in self._results], self.detector.class_names
+        )
+
+    def reset(self):
+        """丢弃所有类别的结果, 下一帧全部重新检测"""
+        self._results.clear()
+        self._polled.clear()
+
+    def get_stats(self) -> dict:
+        """获取调度统计"""
+        return {
+            'frames': self.frames,
+            'inference_frames': self.inference_frames,
+            'skipped_frames': self.frames - self.inference_frames,
+            'skip_ratio': 1.0 - self.inference_frames / self.frames if self.frames else 0.0,
+            'class_polls': self.class_polls,
+            'schedule': dict(self.schedule) if self.schedule else None,
+        }
@@ -0,0 +1,437 @@
+"""
+检测服务 - 独立进程加载模型, 多个机器人通过共享内存提交画面并跨进程批量推理
+Detector Server - One process owns the model; clients send frames through shared memory
+"""
+
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from multiprocessing import shared_memory
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .batcher import MicroBatcher
+from .yolo_detector import YOLODetector, DetectionSet
+
+
+def parse_address(address: Union[str, tuple]):
+    """
+    "host:port" -> (host, port) TCP地址; 其他字符串视为Unix套接字路径 (Windows为命名管道)
+    """
+    if isinstance(address, (tuple, list)):
+        return tuple(address)
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and '/' not in address and '\\' not in address:
+        return host or '127.0.0.1', int(port)
+    return address
+
+
+# 未配置authkey时使用的密钥文件 (首次使用时生成随机密钥, 只有当前用户可读)
+DEFAULT_KEY_FILE = "~/.cl-dnfm/detector_server.key"
+
+
+def load_authkey(authkey: Optional[str] = None, key_file: Optional[str] = None) -> bytes:
+    """
+    获取连接认证密钥
+
+    连接消息会被反序列化 (pickle), 知道密钥就能在服务端执行任意代码, 所以不使用固定的默认密钥:
+    配置了authkey时直接使用; 否则读取key_file, 文件不存在时生成随机密钥并以0600权限写入。
+    同一用户在本机运行的服务端和客户端读取同一个文件, 不需要手动配置。
+
+    Args:
+        authkey: 配置中的密钥 (空表示使用密钥文件)
+        key_file: 密钥文件路径 (默认DEFAULT_KEY_FILE)
+    """
+    if authkey:
+        return authkey.encode() if isinstance(authkey, str) else bytes(authkey)
+
+    path = Path(os.path.expanduser(key_file or DEFAULT_KEY_FILE))
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    try:
+        fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        key = path.read_bytes().strip()
+        if not key:
+            raise ValueError(f"密钥文件为空: {path}")
+        return key
+
+    key = secrets.token_hex(32).encode()
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    print(f"✓ 已生成检测服务密钥: {path}")
+    return key
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    打开客户端创建的共享内存
+
+    共享内存由客户端负责释放; 服务端只打开, 不能让本进程的resource_tracker在退出时删除它。
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python 3.13之前没有track参数
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == 'posix':
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+class _ClientStats:
+    """单个客户端的统计"""
+
+    def __init__(self, window: int):
+        self.connected = time.time()
+        self.requests = 0
+        self.frames = 0
+        self.errors = 0
+        self.depth = 0
+        self.max_depth = 0
+        self.latencies = deque(maxlen=window)
+
+    def to_dict(self) -> dict:
+        latencies = np.array(self.latencies) * 1000
+        return {
+            'requests': self.requests,
+            'frames': self.frames,
+            'errors': self.errors,
+            'queue_depth': self.depth,
+            'max_queue_depth': self.max_depth,
+            'latency_p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+            'latency_p95_ms': float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+            'uptime': time.time() - self.connected,
+        }
+
+
+class DetectorServer:
+    """
+    检测服务
+
+    持有唯一的检测器, 每个客户端连接一个处理线程。客户端把画面写入自己的共享内存槽位,
+    通过连接只发送槽位名和形状; 服务端直接在共享内存上预处理, 不复制画面。
+    所有客户端的请求进入同一个MicroBatcher, 多帧同时等待时合并为一次detect_batch推理。
+
+    消息 (客户端 -> 服务端):
+        ('hello', 名称)                        -> ('info', 检测器信息)
+        ('detect', [(槽位名, 形状, 类型)], 过滤类别) -> ('result', [(boxes, scores, class_ids)])
+        ('release', 槽位名)                    释放槽位, 无回复
+        ('stats',)                             -> ('stats', 统计)
+    """
+
+    def __init__(
+        self,
+        detector: YOLODetector,
+        address: Union[str, tuple] = '127.0.0.1:6010',
+        authkey: Optional[bytes] = None,
+        max_batch: int = 8,
+        max_wait: float = 0.005,
+        window: int = 300
+    ):
+        """
+        Args:
+            detector: 检测器 (需支持detect_batch)
+            address: 监听地址 "host:port" 或Unix套接字路径
+            authkey: 连接认证密钥 (必须设置, 见load_authkey)
+            max_batch: 单批最大帧数
+            max_wait: 第一帧到达后凑批的最长等待时间(秒)
+            window: 延迟统计窗口 (每个客户端最近N次请求)
+        """
+        if not authkey:
+            raise ValueError("检测服务必须设置authkey (见load_authkey)")
+
+        self.detector = detector
+        self.address = parse_address(address)
+        self.authkey = authkey
+        self.window = window
+        self.batcher = MicroBatcher(detector, max_batch=max_batch, max_wait=max_wait)
+
+        self._listener: Optional[Listener] = None
+        self._running = False
+        self._lock = threading.Lock()
+        self.clients: Dict[str, _ClientStats] = {}
+
+    def _info(self) -> dict:
+        detector = self.detector
+        return {
+            'class_names': list(detector.class_names),
+            'model_path': str(getattr(detector, 'model_path', '')),
+            'model_type': getattr(detector, 'model_type', None),
+            'conf_threshold': getattr(detector, 'conf_threshold', None),
+            'iou_threshold': getattr(detector, 'iou_threshold', None),
+            'pid': os.getpid(),
+        }
+
+    def start(self):
+        """在后台线程中运行服务"""
+        self._listen()
+        threading.Thread(target=self._accept_loop, name="detector-server", daemon=True).start()
+
+    def serve_forever(self):
+        """在当前线程中运行服务 (Ctrl+C停止)"""
+        self._listen()
+        try:
+            self._accept_loop()
+        finally:
+            self.stop()
+
+    def _listen(self):
+        self._listener = Listener(self.address, authkey=self.authkey)
+        # 端口为0时使用系统分配的实际地址
+        self.address = self._listener.address
+        self._running = True
+        self.batcher.start()
+        print(f"✓ 检测服务已启动: {self.address}")
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError):
+                if not self._running:
+                    break
+                continue
+            threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+
+    def stop(self):
+        """停止服务"""
+        if not self._running:
+            return
+        self._running = False
+        # 阻塞在accept上的线程需要一个连接才能退出
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except OSError:
+            pass
+        self._listener.close()
+        self.batcher.stop()
+
+    def _serve_client(self, conn):
+        segments: Dict[str, shared_memory.SharedMemory] = {}
+        name = None
+        try:
+            while self._running:
+                message = conn.recv()
+                kind = message[0]
+
+                if kind == 'hello':
+                    name = self._register(message[1])
+                    conn.send(('info', self._info()))
+                elif kind == 'detect':
+                    conn.send(self._detect(name, segments, message[1], message[2]))
+                elif kind == 'release':
+                    segment = segments.pop(message[1], None)
+                    if segment is not None:
+                        try:
+                            segment.close()
+                        except BufferError:
+                            # 批处理线程还持有画面视图, 由垃圾回收关闭
+                            pass
+                elif kind == 'stats':
+                    conn.send(('stats', self.get_stats()))
+                elif kind == 'bye':
+                    break
+        except (EOFError, OSError):
+            pass
+        finally:
+            for segment in segments.values():
+                try:
+                    segment.close()
+                except BufferError:
+                    pass
+            conn.close()
+            if name is not None:
+                with self._lock:
+                    self.clients.pop(name, None)
+                print(f"客户端断开: {name}")
+
+    def _register(self, name: str) -> str:
+        with self._lock:
+            # 同名客户端加序号区分
+            unique = name
+            index = 1
+            while unique in self.clients:
+                index += 1
+                unique = f"{name}#{index}"
+            self.clients[unique] = _ClientStats(self.window)
+        print(f"客户端连接: {unique}")
+        return unique
+
+    def _detect(self, name, segments, frames: Sequence[tuple], filter_classes: Optional[List[str]]):
+        stats = self.clients.get(name)
+        if stats is None:
+            return ('error', "未发送hello")
+
+        start = time.perf_counter()
+        stats.requests += 1
+        stats.depth += len(frames)
+        stats.max_depth = max(stats.max_depth, stats.depth)
+        try:
+            images = []
+            for segment_name, shape, dtype in frames:
+                segment = segments.get(segment_name)
+                if segment is None:
+                    segment = _attach_shared_memory(segment_name)
+                    segments[segment_name] = segment
+                images.append(np.ndarray(shape, dtype=dtype, buffer=segment.buf))
+
+            # 逐帧提交, 与其他客户端同时等待的帧合并推理
+            futures = [self.batcher.submit(image, filter_classes) for image in images]
+            results = [future.result() for future in futures]
+            del images
+        except Exception as e:
+            stats.errors += 1
+            return ('error', f"{type(e).__name__}: {e}")
+        finally:
+            stats.depth -= len(frames)
+
+        stats.frames += len(frames)
+        stats.latencies.append(time.perf_counter() - start)
+        return ('result', [(r.boxes, r.scores, r.class_ids) for r in results])
+
+    def get_stats(self) -> dict:
+        """服务统计: 批处理统计 + 每个客户端的队列深度与延迟"""
+        with self._lock:
+            clients = {name: stats.to_dict() for name, stats in self.clients.items()}
+        return {'batcher': self.batcher.get_stats(), 'clients': clients}
+
+
+class RemoteDetector(YOLODetector):
+    """
+    检测服务客户端
+
+    接口与YOLODetector相同 (detect / detect_batch / draw_detections 等), 可以直接替换本地检测器,
+    外层的缓存、跟踪等包装照常使用。画面写入本进程创建的共享内存槽位 (尺寸变大时重新分配),
+    每帧只通过连接发送槽位名; 返回的检测结果很小, 直接序列化传输。
+    """
+
+    def __init__(
+        self,
+        address: Union[str, tuple] = '127.0.0.1:6010',
+        authkey: Optional[bytes] = None,
+        name: Optional[str] = None,
+        timeout: float = 10.0,
+        window: int = 300
+    ):
+        """
+        Args:
+            address: 服务地址 "host:port" 或Unix套接字路径
+            authkey: 连接认证密钥
+            name: 客户端名称 (服务端统计用, 默认为进程号)
+            timeout: 等待结果的超时时间(秒)
+            window: 延迟统计窗口
+        """
+        self.address = parse_address(address)
+        self.timeout = timeout
+        self.conn = Client(self.address, authkey=authkey)
+        self.conn.send(('hello', name or f"pid-{os.getpid()}"))
+        info = self._receive('info')
+
+        self.class_names: List[str] = info['class_names']
+        self.model_path = info['model_path']
+        self.model_type = 'remote'
+        self.conf_threshold = info['conf_threshold']
+        self.iou_threshold = info['iou_threshold']
+        self.imgsz = None
+        self.model = None
+        self.server_pid = info['pid']
+
+        self._slots: List[shared_memory.SharedMemory] = []
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.requests = 0
+
+        print(f"✓ 已连接检测服务: {self.address} (pid {self.server_pid})")
+        print(f"  类别列表: {self.class_names}")
+
+    def _receive(self, expected: str):
+        if not self.conn.poll(self.timeout):
+            raise TimeoutError("检测服务响应超时")
+        kind, payload = self.conn.recv()
+        if kind == 'error':
+            raise RuntimeError(f"检测服务错误: {payload}")
+        if kind != expected:
+            raise RuntimeError(f"检测服务返回了意外的消息: {kind}")
+        return payload
+
+    def _write_slot(self, index: int, image: np.ndarray) -> Tuple[str, tuple, str]:
+        """把画面写入第index个共享内存槽位"""
+        if index < len(self._slots) and self._slots[index].size < image.nbytes:
+            old = self._slots[index]
+            self.conn.send(('release', old.name))
+            old.close()
+            old.unlink()
+            self._slots[index] = shared_memory.SharedMemory(create=True, size=image.nbytes)
+        elif index >= len(self._slots):
+            self._slots.append(shared_memory.SharedMemory(create=True, size=image.nbytes))
+
+        slot = self._slots[index]
+        np.copyto(np.ndarray(image.shape, dtype=image.dtype, buffer=slot.buf), image)
+        return slot.name, image.shape, image.dtype.str
+
+    @property
+    def supports_input_size(self) -> bool:
+        return False
+
+    def detect(
+        self,
+        image: np.ndarray,
+        filter_classes: Optional[List[str]] = None
+    ) -> DetectionSet:
+        return self.detect_batch([image], filter_classes)[0]
+
+    def detect_batch(
+        self,
+        images: List[np.ndarray],
+        filter_classes: Optional[List[str]] = None
+    ) -> List[DetectionSet]:
+        """多帧写入各自的槽位后一次提交, 服务端可以合并为一次推理"""
+        if not images:
+            return []
+
+        with self._lock:
+            start = time.perf_counter()
+            frames = [self._write_slot(i, np.ascontiguousarray(image)) for i, image in enumerate(images)]
+            self.conn.send(('detect', frames, list(filter_classes) if filter_classes else None))
+            results = self._receive('result')
+            self._latencies.append(time.perf_counter() - start)
+            self.requests += 1
+
+        return [
+            DetectionSet(boxes, scores, class_ids, self.class_names)
+            for boxes, scores, class_ids in results
+        ]
+
+    def get_server_stats(self) -> dict:
+        """获取服务端统计 (所有客户端)"""
+        with self._lock:
+            self.conn.send(('stats',))
+            return self._receive('stats')
+
+    def get_stats(self) -> dict:
+        """获取本客户端的往返延迟统计"""
+        latencies = np.array(self._latencies) * 1000
+        return {
+            'requests': self.requests,
+            'latency_p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+            'latency_p95_ms': float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+        }
+
+    def close(self):
+        """断开连接并释放共享内存"""
+        with self._lock:
+            try:
+                self.conn.send(('bye',))
+            except OSError:
+                pass
+            self.conn.close()
+            for slot in self._slots:
+                slot.close()
+                slot.unlink()
+            self._slots = []
@@ -0,0 +1,228 @@
+"""
+模板匹配快速路径 - 固定UI元素用模板匹配代替YOLO推理
+Template Fast Path - Match static UI elements with cv2.matchTemplate instead of YOLO
+"""
+
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from .ops import box_iou
+from .wrapper import DetectorWrapper
+from .yolo_detector import DetectionSet
+
+
+class _Template:
+    """一个已学习的UI元素模板"""
+
+    __slots__ = ('class_id', 'patch', 'box')
+
+    def __init__(self, class_id: int, patch: np.ndarray, box: np.ndarray):
+        self.class_id = class_id
+        self.patch = patch    # 缩放后的灰度图块
+        self.box = box        # 原图坐标 xyxy
+
+
+class TemplateDetector(DetectorWrapper):
+    """
+    模板匹配检测器
+
+    YOLO运行时, 从高置信度的静态类别检测结果中自动截取模板并记录位置;
+    之后请求的静态类别在各模板原位置附近的小搜索窗口内做 cv2.matchTemplate,
+    请求中的动态类别 (例如enemy) 仍由YOLO检测 (filter_classes只包含动态类别), 两者结果合并。
+    以下情况静态类别也交给YOLO (与动态类别一次推理, 结果同时用于更新模板):
+        - 某个请求的静态类别还没有模板或没有匹配上 (最多每fallback_interval帧回退一次,
+          期间视为该元素不在画面上)
+        - 距上次YOLO检测静态类别超过refresh_interval帧 (发现新出现的同类元素)
+    """
+
+    def __init__(
+        self,
+        detector,
+        template_classes: List[str],
+        scale: float = 0.5,
+        match_threshold: float = 0.8,
+        learn_confidence: float = 0.7,
+        search_margin: float = 0.5,
+        max_templates: int = 4,
+        fallback_interval: int = 10,
+        refresh_interval: int = 60
+    ):
+        """
+        Args:
+            detector: 被包装的检测器
+            template_classes: 使用模板匹配的静态类别
+            scale: 匹配时的图像缩放比例
+            match_threshold: 归一化相关系数阈值 (0-1)
+            learn_confidence: 学习模板所需的最低YOLO置信度
+            search_margin: 搜索窗口向四周扩展的比例 (相对框尺寸)
+            max_templates: 每个类别最多保存的模板数
+            fallback_interval: 未匹配时两次YOLO回退的最小间隔(帧)
+            refresh_interval: 最多连续多少帧不运行YOLO
+        """
+        super().__init__(detector)
+        self.template_classes = list(template_classes)
+        self.scale = scale
+        self.match_threshold = match_threshold
+        self.learn_confidence = learn_confidence
+        self.search_margin = search_margin
+        self.max_templates = max(1, max_templates)
+        self.fallback_interval = max(1, fallback_interval)
+        self.refresh_interval = max(1, refresh_interval)
+
+        self.templates: Dict[str, List[_Template]] = {}
+        # 初始值保证第一帧运行YOLO
+        self._since_inference = self.refresh_interval
+
+        # 统计信息
+        self.frames = 0
+        self.template_frames = 0
+        self.fallbacks = 0
+        self.matches = 0
+        self.match_failures = 0
+
+    def _gray(self, image: np.ndarray) -> np.ndarray:
+        if self.scale != 1.0:
+            image = cv2.resize(image, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return image
+
+    def _match(self, gray: np.ndarray, template: _Template):
+        """在模板上次位置附近搜索, 返回 (原图坐标框, 分数) 或None"""
+        patch_h, patch_w = template.patch.shape
+        box = template.box * self.scale
+        margin_x = (box[2] - box[0]) * self.search_margin + 2
+        margin_y = (box[3] - box[1]) * self.search_margin + 2
+        x1 = max(0, int(box[0] - margin_x))
+        y1 = max(0, int(box[1] - margin_y))
+        x2 = min(gray.shape[1], int(box[2] + margin_x) + 1)
+        y2 = min(gray.shape[0], int(box[3] + margin_y) + 1)
+        if x2 - x1 < patch_w or y2 - y1 < patch_h:
+            return None
+
+        result = cv2.matchTemplate(gray[y1:y2, x1:x2], template.patch, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (dx, dy) = cv2.minMaxLoc(result)
+        if not np.isfinite(score) or score < self.match_threshold:
+            return None
+
+        left = (x1 + dx) / self.scale
+        top = (y1 + dy) / self.scale
+        return [left, top, left + patch_w / self.scale, top + patch_h / self.scale], score
+
+    def _match_classes(self, gray: np.ndarray, class_names: List[str]):
+        """
+        匹配指定类别的所有模板
+
+        Returns:
+            (检测结果, 是否有类别缺少匹配)
+        """
+        boxes = []
+        scores = []
+        class_ids = []
+        missing = False
+        for name in class_names:
+            found = False
+            for template in self.templates.get(name, []):
+                match = self._match(gray, template)
+                if match is None:
+                    self.match_failures += 1
+                    continue
+                box, score = match
+                boxes.append(box)
+                scores.append(score)
+                class_ids.append(template.class_id)
+                found = True
+                self.matches += 1
+            missing = missing or not found
+
+        detections = DetectionSet(
+            np.array(boxes, dtype=np.float32).reshape(-1, 4), scores, class_ids, self.detector.class_names
+        )
+        return detections, missing
+
+    def _learn(self, gray: np.ndarray, detections: DetectionSet):
+        """从高置信度检测结果更新模板"""
+        for name in self.template_classes:
+            subset = detections.by_class(name)
+            subset = subset[subset.scores >= self.learn_confidence]
+            if not len(subset):
+                # YOLO也没看到, 保留旧模板 (元素可能只是暂时不在画面上)
+                continue
+
+            learned = []
+            order = np.argsort(-subset.scores)[:self.max_templates]
+            for i in order:
+                box = subset.boxes[i]
+                x1, y1, x2, y2 = (box * self.scale).astype(int)
+                if x2 - x1 < 4 or y2 - y1 < 4:
+                    continue
+                patch = gray[y1:y2, x1:x2].copy()
+                learned.append(_Template(int(subset.class_ids[i]), patch, box.copy()))
+
+            # 保留YOLO这次没有检测到的旧模板位置 (不与新模板重叠的), 直到数量上限
+            if learned and name in self.templates:
+                new_boxes = np.array([t.box for t in learned])
+                for old in self.templates[name]:
+                    if len(learned) >= self.max_templates:
+                        break
+                    if box_iou(old.box[None], new_boxes).max() < 0.5:
+                        learned.append(old)
+
+            if learned:
+                self.templates[name] = learned
+
+    def _inference(self, image, gray, filter_classes) -> DetectionSet:
+        detections = self.detector.detect(image, filter_classes)
+        self._since_inference = 0
+        self._learn(gray, detections)
+        return detections
+
+    def detect(
+        self,
+        image: np.ndarray,
+        filter_classes: Optional[List[str]] = None
+    ) -> DetectionSet:
+        self.frames += 1
+        self._since_inference += 1
+
+        requested = filter_classes or self.detector.class_names
+        static = [name for name in requested if name in self.template_classes]
+        if not static:
+            return self.detector.detect(image, filter_classes)
+
+        gray = self._gray(image)
+        if self._since_inference > self.refresh_interval:
+            self.fallbacks += 1
+            return self._inference(image, gray, filter_classes)
+
+        matched, missing = self._match_classes(gray, static)
+        if missing and self._since_inference > self.fallback_interval:
+            self.fallbacks += 1
+            return self._inference(image, gray, filter_classes)
+
+        self.template_frames += 1
+        dynamic = [name for name in requested if name not in self.template_classes]
+        if not dynamic:
+            return matched
+        return DetectionSet.concatenate(
+            [matched, self.detector.detect(image, dynamic)], self.detector.class_names
+        )
+
+    def reset(self):
+        """清除所有模板"""
+        self.templates.clear()
+        self._since_inference = self.refresh_interval
+
+    def get_stats(self) -> dict:
+        """获取模板匹配统计"""
+        return {
+            'frames': self.frames,
+            'template_frames': self.template_frames,
+            'template_ratio': self.template_frames / self.frames if self.frames else 0.0,
+            'fallbacks': self.fallbacks,
+            'matches': self.matches,
+            'match_failures': self.match_failures,
+            'templates': sum(len(t) for t in self.templates.values()),
+        }
@@ -0,0 +1,453 @@
+"""
+多目标跟踪 - IoU关联 + 匀速卡尔曼滤波, 支持隔帧检测
+Multi-Object Tracking - IoU association with constant-velocity Kalman filters
+"""
+
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .ops import box_iou
+from .wrapper import DetectorWrapper
+from .yolo_detector import Detection, DetectionSet
+
+
+ASSIGNMENT_METHODS = ("greedy", "hungarian")
+
+
+def _xyxy_to_cxcywh(boxes: np.ndarray) -> np.ndarray:
+    out = np.empty((len(boxes), 4), dtype=np.float64)
+    out[:, 0] = (boxes[:, 0] + boxes[:, 2]) / 2
+    out[:, 1] = (boxes[:, 1] + boxes[:, 3]) / 2
+    out[:, 2] = boxes[:, 2] - boxes[:, 0]
+    out[:, 3] = boxes[:, 3] - boxes[:, 1]
+    return out
+
+
+def _cxcywh_to_xyxy(boxes: np.ndarray) -> np.ndarray:
+    out = np.empty((len(boxes), 4), dtype=np.float32)
+    half_w = boxes[:, 2] / 2
+    half_h = boxes[:, 3] / 2
+    out[:, 0] = boxes[:, 0] - half_w
+    out[:, 1] = boxes[:, 1] - half_h
+    out[:, 2] = boxes[:, 0] + half_w
+    out[:, 3] = boxes[:, 1] + half_h
+    return out
+
+
+def greedy_assignment(iou: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    按IoU从大到小贪心匹配
+
+    Returns:
+        (K, 2) 匹配对 (行下标, 列下标)
+    """
+    rows, cols = np.nonzero(iou >= threshold)
+    if len(rows) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    order = np.argsort(-iou[rows, cols], kind='stable')
+    used_rows = set()
+    used_cols = set()
+    matches = []
+    for k in order:
+        r, c = rows[k], cols[k]
+        if r in used_rows or c in used_cols:
+            continue
+        used_rows.add(r)
+        used_cols.add(c)
+        matches.append((r, c))
+    return np.array(matches, dtype=np.int64)
+
+
+def hungarian_assignment(iou: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    总IoU最大的最优匹配 (匈牙利算法)
+
+    Returns:
+        (K, 2) 匹配对 (行下标, 列下标)
+    """
+    try:
+        from scipy.optimize import linear_sum_assignment
+    except ImportError:
+        raise ImportError("请安装scipy: pip install scipy")
+
+    rows, cols = linear_sum_assignment(-iou)
+    keep = iou[rows, cols] >= threshold
+    return np.stack([rows[keep], cols[keep]], axis=1).astype(np.int64)
+
+
+class KalmanBoxFilter:
+    """
+    匀速卡尔曼滤波 (所有轨迹一起向量化计算)
+
+    状态为 (cx, cy, w, h, vx, vy, vw, vh), 观测为 (cx, cy, w, h), 时间步长为一帧。
+    噪声标准差与框的宽高成比例, 大小目标的平滑程度一致。
+    """
+
+    def __init__(self, std_position: float = 1.0 / 20, std_velocity: float = 1.0 / 160):
+        """
+        Args:
+            std_position: 位置噪声相对框尺寸的比例
+            std_velocity: 速度噪声相对框尺寸的比例
+        """
+        self.std_position = std_position
+        self.std_velocity = std_velocity
+
+        self._F = np.eye(8)
+        self._F[:4, 4:] = np.eye(4)
+
+    @staticmethod
+    def _size(mean: np.ndarray) -> np.ndarray:
+        """每个分量对应的尺寸 (w, h, w, h)"""
+        w = np.maximum(mean[:, 2], 1.0)
+        h = np.maximum(mean[:, 3], 1.0)
+        return np.stack([w, h, w, h], axis=1)
+
+    def initiate(self, measurements: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """由观测 (N, 4) 初始化状态 (N, 8) 与协方差 (N, 8, 8), 初速度为0"""
+        count = len(measurements)
+        mean = np.zeros((count, 8))
+        mean[:, :4] = measurements
+
+        size = self._size(mean)
+        std = np.concatenate([2 * self.std_position * size, 10 * self.std_velocity * size], axis=1)
+        cov = np.zeros((count, 8, 8))
+        idx = np.arange(8)
+        cov[:, idx, idx] = std ** 2
+        return mean, cov
+
+    def predict(self, mean: np.ndarray, cov: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """前进一帧"""
+        size = self._size(mean)
+        std = np.concatenate([self.std_position * size, self.std_velocity * size], axis=1)
+
+        mean = mean @ self._F.T
+        cov = self._F @ cov @ self._F.T
+        idx = np.arange(8)
+        cov[:, idx, idx] += std ** 2
+        # 宽高不能外推成负数
+        mean[:, 2:4] = np.maximum(mean[:, 2:4], 1.0)
+        return mean, cov
+
+    def update(
+        self,
+        mean: np.ndarray,
+        cov: np.ndarray,
+        measurements: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """用观测 (N, 4) 校正对应的N条轨迹"""
+        std = self.std_position * self._size(mean)
+        innovation_cov = cov[:, :4, :4].copy()
+        idx = np.arange(4)
+        innovation_cov[:, idx, idx] += std ** 2
+
+        # K = P H^T S^-1, H只取前4维
+        gain = cov[:, :, :4] @ np.linalg.inv(innovation_cov)
+        residual = measurements - mean[:, :4]
+        mean = mean + np.einsum('nij,nj->ni', gain, residual)
+        cov = cov - gain @ cov[:, :4, :]
+        return mean, cov
+
+
+class DetectionTracker:
+    """
+    检测目标跟踪器 - 用于多帧目标关联
+
+    每次update()/predict()代表一帧:
+        update:  先预测再用检测结果校正。预测框与检测框的IoU矩阵一次向量化算出,
+                 按类别隔离后做贪心或最优匹配; 未匹配的检测新建轨迹
+    新轨迹只被检测到一次, 还没有速度估计, 预测框停在原地; 快速移动的小目标在下一次检测时
+    与它不再重叠。这类轨迹在IoU匹配之后再按中心距离 (以轨迹框对角线为单位) 补充匹配,
+    允许的距离随距上次检测的帧数增长。
+        predict: 没有检测结果的帧, 只用卡尔曼模型外推上次检测到的目标
+    超过max_frames帧未匹配的轨迹被删除。
+    """
+
+    def __init__(
+        self,
+        max_frames: int = 30,
+        iou_threshold: float = 0.3,
+        assignment: str = "greedy",
+        class_aware: bool = True,
+        center_gate: float = 0.5
+    ):
+        """
+        Args:
+            max_frames: 目标最大丢失帧数 (包括只做预测的帧)
+            iou_threshold: 关联所需的最小IoU
+            assignment: 匹配方式 greedy (贪心) / hungarian (最优, 需要scipy)
+            class_aware: 只关联同一类别的检测
+            center_gate: 新轨迹每帧允许移动的中心距离 (轨迹框对角线的倍数, 0表示只用IoU匹配)
+        """
+        if assignment not in ASSIGNMENT_METHODS:
+            raise ValueError(f"不支持的匹配方式: {assignment}")
+
+        self.max_frames = max_frames
+        self.iou_threshold = iou_threshold
+        self.assignment = assignment
+        self.class_aware = class_aware
+        self.center_gate = center_gate
+        self.kalman = KalmanBoxFilter()
+        self.next_id = 0
+        self.class_names: List[str] = []
+
+        self.reset()
+
+    def reset(self):
+        """清空所有轨迹"""
+        self._mean = np.zeros((0, 8))
+        self._cov = np.zeros((0, 8, 8))
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._class_ids = np.zeros(0, dtype=np.int64)
+        self._scores = np.zeros(0, dtype=np.float32)
+        self._hits = np.zeros(0, dtype=np.int64)
+        # 连续多少次检测未匹配 / 距上次匹配的帧数
+        self._misses = np.zeros(0, dtype=np.int64)
+        self._since_update = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _advance(self):
+        """所有轨迹前进一帧并删除过期轨迹"""
+        if len(self):
+            self._mean, self._cov = self.kalman.predict(self._mean, self._cov)
+            self._since_update += 1
+        self._prune()
+
+    def _prune(self):
+        keep = self._since_update <= self.max_frames
+        if keep.all():
+            return
+        self._mean = self._mean[keep]
+        self._cov = self._cov[keep]
+        self._ids = self._ids[keep]
+        self._class_ids = self._class_ids[keep]
+        self._scores = self._scores[keep]
+        self._hits = self._hits[keep]
+        self._misses = self._misses[keep]
+        self._since_update = self._since_update[keep]
+
+    def _associate(self, detections: DetectionSet) -> np.ndarray:
+        """预测框与检测框匹配, 返回 (K, 2) (轨迹下标, 检测下标)"""
+        if not len(self) or not len(detections):
+            return np.empty((0, 2), dtype=np.int64)
+
+        iou = box_iou(_cxcywh_to_xyxy(self._mean[:, :4]), detections.boxes)
+        if self.class_aware:
+            iou[self._class_ids[:, None] != detections.class_ids[None, :]] = 0
+
+        if self.assignment == "hungarian":
+            matches = hungarian_assignment(iou, self.iou_threshold)
+        else:
+            matches = greedy_assignment(iou, self.iou_threshold)
+
+        if self.center_gate > 0:
+            matches = np.concatenate([matches, self._associate_new(detections, matches)])
+        return matches
+
+    def _associate_new(self, detections: DetectionSet, matches: np.ndarray) -> np.ndarray:
+        """只被检测到一次的轨迹 (没有速度估计) 按归一化中心距离匹配剩余的检测"""
+        tracks = self._hits == 1
+        tracks[matches[:, 0]] = False
+        remaining = np.ones(len(detections), dtype=bool)
+        remaining[matches[:, 1]] = False
+        if not tracks.any() or not remaining.any():
+            return np.empty((0, 2), dtype=np.int64)
+
+        t_idx = np.nonzero(tracks)[0]
+        d_idx = np.nonzero(remaining)[0]
+        mean = self._mean[t_idx]
+        centers = _xyxy_to_cxcywh(detections.boxes[d_idx])[:, :2]
+        diagonal = np.maximum(np.hypot(mean[:, 2], mean[:, 3]), 1e-6)
+        distance = np.linalg.norm(mean[:, None, :2] - centers[None], axis=2) / diagonal[:, None]
+
+        # 1 - 距离/允许距离, 越近越大, 超出范围为负
+        gate = self.center_gate * np.maximum(self._since_update[t_idx], 1)
+        score = 1.0 - distance / gate[:, None]
+        if self.class_aware:
+            score[self._class_ids[t_idx][:, None] != detections.class_ids[d_idx][None, :]] = -1.0
+
+        pairs = greedy_assignment(score, 0.0)
+        if not len(pairs):
+            return pairs
+        return np.stack([t_idx[pairs[:, 0]], d_idx[pairs[:, 1]]], axis=1)
+
+    def update_set(self, detections: Union[DetectionSet, List[Detection]]) -> DetectionSet:
+        """
+        用当前帧的检测结果更新轨迹
+
+        Args:
+            detections: 当前帧的检测结果
+
+        Returns:
+            带track_ids的检测结果 (框为检测器原始输出)
+        """
+        if not isinstance(detections, DetectionSet):
+            detections = DetectionSet.from_detections(detections)
+        if detections.class_names:
+            self.class_names = detections.class_names
+
+        self._advance()
+        matches = self._associate(detections)
+        track_ids = np.empty(len(detections), dtype=np.int64)
+
+        measurements = _xyxy_to_cxcywh(detections.boxes)
+        if len(matches):
+            t, d = matches[:, 0], matches[:, 1]
+            self._mean[t], self._cov[t] = self.kalman.update(self._mean[t], self._cov[t], measurements[d])
+            self._class_ids[t] = detections.class_ids[d]
+            self._scores[t] = detections.scores[d]
+            self._hits[t] += 1
+            self._since_update[t] = 0
+            track_ids[d] = self._ids[t]
+
+        unmatched_tracks = np.ones(len(self), dtype=bool)
+        unmatched_tracks[matches[:, 0]] = False
+        self._misses[unmatched_tracks] += 1
+        self._misses[~unmatched_tracks] = 0
+
+        new = np.ones(len(detections), dtype=bool)
+        new[matches[:, 1]] = False
+        count = int(new.sum())
+        if count:
+            mean, cov = self.kalman.initiate(measurements[new])
+            ids = np.arange(self.next_id, self.next_id + count, dtype=np.int64)
+            self.next_id += count
+            track_ids[new] = ids
+
+            self._mean = np.concatenate([self._mean, mean])
+            self._cov = np.concatenate([self._cov, cov])
+            self._ids = np.concatenate([self._ids, ids])
+            self._class_ids = np.concatenate([self._class_ids, detections.class_ids[new]])
+            self._scores = np.concatenate([self._scores, detections.scores[new]])
+            self._hits = np.concatenate([self._hits, np.ones(count, dtype=np.int64)])
+            self._misses = np.concatenate([self._misses, np.zeros(count, dtype=np.int64)])
+            self._since_update = np.concatenate([self._since_update, np.zeros(count, dtype=np.int64)])
+
+        return DetectionSet(
+            detections.boxes, detections.scores, detections.class_ids,
+            detections.class_names, track_ids
+        )
+
+    def update(self, detections: Union[DetectionSet, List[Detection]]) -> Dict[int, Detection]:
+        """
+        更新跟踪器
+
+        Args:
+            detections: 当前帧的检测结果
+
+        Returns:
+            跟踪ID到检测结果的映射
+        """
+        tracked = self.update_set(detections)
+        return {det.track_id: det for det in tracked}
+
+    def predict(self, image_shape: Optional[Tuple[int, int]] = None) -> DetectionSet:
+        """
+        没有检测结果的帧: 外推上一次检测到的目标
+
+        Args:
+            image_shape: 画面 (height, width), 用于裁剪外推框 (可选)
+
+        Returns:
+            外推得到的检测结果 (带track_ids)
+        """
+        self._advance()
+        return self.tracks(image_shape)
+
+    def tracks(self, image_shape: Optional[Tuple[int, int]] = None) -> DetectionSet:
+        """当前的轨迹估计 (只包含上一次检测时仍被匹配到的目标)"""
+        active = self._misses == 0
+        boxes = _cxcywh_to_xyxy(self._mean[active, :4])
+        if image_shape is not None:
+            boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, image_shape[1])
+            boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, image_shape[0])
+        return DetectionSet(
+            boxes, self._scores[active], self._class_ids[active],
+            self.class_names, self._ids[active]
+        )
+
+    def get_stats(self) -> dict:
+        """获取跟踪统计"""
+        return {
+            'tracks': len(self),
+            'active_tracks': int((self._misses == 0).sum()),
+            'total_tracks': self.next_id,
+        }
+
+
+class TrackingDetector(DetectorWrapper):
+    """
+    隔帧检测 - 检测器每detect_interval帧运行一次, 中间帧由跟踪器外推
+
+    过滤类别变化时立即重新检测 (跟踪器只知道上次检测过的类别)。
+    """
+
+    def __init__(
+        self,
+        detector,
+        tracker: Optional[DetectionTracker] = None,
+        detect_interval: int = 3
+    ):
+        """
+        Args:
+            detector: 被包装的检测器
+            tracker: 跟踪器 (None时使用默认参数创建)
+            detect_interval: 每N帧运行一次检测器 (1表示每帧都检测, 只做ID关联)
+        """
+        super().__init__(detector)
+        self.tracker = tracker or DetectionTracker()
+        self.detect_interval = max(1, detect_interval)
+
+        self._since_keyframe = 0
+        self._filter_key: Optional[tuple] = None
+        self._need_keyframe = True
+
+        # 统计信息
+        self.frames = 0
+        self.inference_calls = 0
+
+    def detect(
+        self,
+        image: np.ndarray,
+        filter_classes: Optional[List[str]] = None
+    ) -> DetectionSet:
+        self.frames += 1
+        filter_key = tuple(filter_classes) if filter_classes else None
+
+        if (
+            self._need_keyframe
+            or self._since_keyframe + 1 >= self.detect_interval
+            or filter_key != self._filter_key
+        ):
+            detections = self.detector.detect(image, filter_classes)
+            self.inference_calls += 1
+            self._since_keyframe = 0
+            self._filter_key = filter_key
+            self._need_keyframe = False
+            return self.tracker.update_set(detections)
+
+        self._since_keyframe += 1
+        return self.tracker.predict(image.shape[:2]).filter_classes(filter_classes)
+
+    def reset(self):
+        """清空轨迹, 下一帧重新检测"""
+        self.tracker.reset()
+        self._need_keyframe = True
+
+    @property
+    def inferences_saved(self) -> int:
+        return self.frames - self.inference_calls
+
+    def get_stats(self) -> dict:
+        """获取跳帧统计"""
+        stats = self.tracker.get_stats()
+        stats.update({
+            'frames': self.frames,
+            'inference_calls': self.inference_calls,
+            'inferences_saved': self.inferences_saved,
+            'saved_ratio': self.inferences_saved / self.frames if self.frames else 0.0,
+        })
+        return stats
@@ -0,0 +1,47 @@
+"""
+检测器包装 - 在YOLODetector外层叠加跳帧、缓存等加速手段
+Detector Wrapper - Base class for layers that sit in front of YOLODetector
+"""
+
+from typing import List, Optional
+
+import numpy as np
+
+from .yolo_detector import DetectionSet
+
+
+class DetectorWrapper:
+    """
+    检测器包装基类
+
+    子类实现 detect(), 接口与 YOLODetector.detect 相同, 因此包装可以层层叠加。
+    其余属性 (class_names、draw_detections 等) 转发给被包装的检测器。
+    """
+
+    def __init__(self, detector):
+        """
+        Args:
+            detector: 被包装的检测器 (YOLODetector或另一个包装)
+        """
+        self.detector = detector
+
+    def detect(
+        self,
+        image: np.ndarray,
+        filter_classes: Optional[List[str]] = None
+    ) -> DetectionSet:
+        return self.detector.detect(image, filter_classes)
+
+    def detect_batch(
+        self,
+        images: List[np.ndarray],
+        filter_classes: Optional[List[str]] = None
+    ) -> List[DetectionSet]:
+        """逐帧调用detect (包装通常带有按帧的状态)"""
+        return [self.detect(image, filter_classes) for image in images]
+
+    def __getattr__(self, name):
+        # 只有在自身找不到属性时才会调用
+        if name == 'detector':
+            raise AttributeError(name)
+        return getattr(self.detector, name)
@@ -3,12 +3,17 @@ YOLO目标检测模块 - 游戏元素识别
 YOLO Object Detection Module - Game Element Recognition
 """
 
+import ast
+import platform
+import zipfile
 import cv2
 import numpy as np
 from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 import time
 
+from .ops import Letterbox, decode_yolov8, nms
+
 
 class Detection:
     """检测结果类"""
@@ -19,7 +24,8 @@ class Detection:
         class_name: str,
         confidence: float,
         bbox: Tuple[int, int, int, int],
-        center: Tuple[int, int]
+        center: Tuple[int, int],
+        track_id: Optional[int] = None
     ):
         """
         Args:
@@ -28,18 +34,212 @@ class Detection:
             confidence: 置信度
             bbox: 边界框 (x1, y1, x2, y2)
             center: 中心点 (cx, cy)
+            track_id: 跟踪ID (经过DetectionTracker时才有)
         """
         self.class_id = class_id
         self.class_name = class_name
         self.confidence = confidence
         self.bbox = bbox
         self.center = center
+        self.track_id = track_id
 
     def __repr__(self):
+        track = f", id={self.track_id}" if self.track_id is not None else ""
         return (f"Detection(class={self.class_name}, "
                 f"conf={self.confidence:.2f}, "
                 f"bbox={self.bbox}, "
-                f"center={self.center})")
+                f"center={self.center}{track})")
+
+
+class DetectionSet:
+    """
+    检测结果集合 - 连续数组存储 (struct-of-arrays)
+
+    boxes (N, 4) xyxy / scores (N,) / class_ids (N,) 一次性向量化构建,
+    类别过滤、取子集都直接在数组上完成。迭代或下标访问时才按需生成
+    Detection 视图 (生成后缓存), 因此现有按 List[Detection] 编写的策略可以直接使用。
+    """
+
+    def __init__(
+        self,
+        boxes: np.ndarray,
+        scores: np.ndarray,
+        class_ids: np.ndarray,
+        class_names: List[str],
+        track_ids: Optional[np.ndarray] = None
+    ):
+        """
+        Args:
+            boxes: (N, 4) 边界框 xyxy
+            scores: (N,) 置信度
+            class_ids: (N,) 类别ID
+            class_names: 类别名称列表 (与检测器共享, 不复制)
+            track_ids: (N,) 跟踪ID (可选)
+        """
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        self.scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+        self.class_ids = np.asarray(class_ids, dtype=np.int64).reshape(-1)
+        self.class_names = class_names
+        self.track_ids = None if track_ids is None else np.asarray(track_ids, dtype=np.int64).reshape(-1)
+
+        self._int_boxes: Optional[np.ndarray] = None
+        self._centers: Optional[np.ndarray] = None
+        self._views: Optional[List[Optional[Detection]]] = None
+
+    @classmethod
+    def empty(cls, class_names: Optional[List[str]] = None) -> "DetectionSet":
+        """空集合"""
+        return cls(np.empty((0, 4)), np.empty(0), np.empty(0), class_names or [])
+
+    @classmethod
+    def concatenate(cls, sets: List["DetectionSet"], class_names: List[str]) -> "DetectionSet":
+        """合并多个集合 (跟踪ID只在所有集合都有时保留)"""
+        sets = [s for s in sets if len(s)]
+        if not sets:
+            return cls.empty(class_names)
+        if len(sets) == 1:
+            return sets[0]
+        track_ids = None
+        if all(s.track_ids is not None for s in sets):
+            track_ids = np.concatenate([s.track_ids for s in sets])
+        return cls(
+            np.concatenate([s.boxes for s in sets]),
+            np.concatenate([s.scores for s in sets]),
+            np.concatenate([s.class_ids for s in sets]),
+            class_names,
+            track_ids
+        )
+
+    @classmethod
+    def from_detections(
+        cls,
+        detections: List[Detection],
+        class_names: Optional[List[str]] = None
+    ) -> "DetectionSet":
+        """由Detection列表构建"""
+        if class_names is None:
+            class_names = []
+            for det in detections:
+                while len(class_names) <= det.class_id:
+                    class_names.append(str(len(class_names)))
+                class_names[det.class_id] = det.class_name
+        if not detections:
+            return cls.empty(class_names)
+        track_ids = [det.track_id for det in detections]
+        return cls(
+            [det.bbox for det in detections],
+            [det.confidence for det in detections],
+            [det.class_id for det in detections],
+            class_names,
+            None if None in track_ids else track_ids
+        )
+
+    @property
+    def int_boxes(self) -> np.ndarray:
+        """整数边界框 (N, 4), 与Detection.bbox一致"""
+        if self._int_boxes is None:
+            self._int_boxes = self.boxes.astype(np.int64)
+        return self._int_boxes
+
+    @property
+    def centers(self) -> np.ndarray:
+        """中心点 (N, 2), 与Detection.center一致"""
+        if self._centers is None:
+            boxes = self.int_boxes
+            self._centers = np.stack(
+                [(boxes[:, 0] + boxes[:, 2]) // 2, (boxes[:, 1] + boxes[:, 3]) // 2], axis=1
+            )
+        return self._centers
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def __bool__(self) -> bool:
+        return len(self.scores) > 0
+
+    def _view(self, index: int) -> Detection:
+        """第index个结果的Detection视图 (首次访问时生成)"""
+        if self._views is None:
+            self._views = [None] * len(self)
+        view = self._views[index]
+        if view is None:
+            x1, y1, x2, y2 = self.int_boxes[index].tolist()
+            cx, cy = self.centers[index].tolist()
+            class_id = int(self.class_ids[index])
+            class_name = self.class_names[class_id] if class_id < len(self.class_names) else str(class_id)
+            view = Detection(
+                class_id=class_id,
+                class_name=class_name,
+                confidence=float(self.scores[index]),
+                bbox=(x1, y1, x2, y2),
+                center=(cx, cy),
+                track_id=int(self.track_ids[index]) if self.track_ids is not None else None
+            )
+            self._views[index] = view
+        return view
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._view(i)
+
+    def __getitem__(self, index):
+        """整数下标返回Detection; 切片/布尔掩码/索引数组返回子集"""
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError("检测结果下标越界")
+            return self._view(int(index))
+        return DetectionSet(
+            self.boxes[index], self.scores[index], self.class_ids[index], self.class_names,
+            self.track_ids[index] if self.track_ids is not None else None
+        )
+
+    def class_mask(self, class_names: List[str]) -> np.ndarray:
+        """属于指定类别的布尔掩码"""
+        wanted_names = set(class_names)
+        wanted = [i for i, name in enumerate(self.class_names) if name in wanted_names]
+        return np.isin(self.class_ids, wanted)
+
+    def filter_classes(self, class_names: Optional[List[str]]) -> "DetectionSet":
+        """只保留指定类别 (None或空列表表示不过滤)"""
+        if not class_names:
+            return self
+        return self[self.class_mask(class_names)]
+
+    def by_class(self, class_name: str) -> "DetectionSet":
+        """指定类别的子集"""
+        return self.filter_classes([class_name])
+
+    def has_class(self, class_name: str) -> bool:
+        """是否包含指定类别"""
+        return bool(self.class_mask([class_name]).any())
+
+    def to_list(self) -> List[Detection]:
+        """转换为Detection列表"""
+        return list(self)
+
+    def __repr__(self):
+        return f"DetectionSet(n={len(self)})"
+
+
+# 后端 -> 模型文件后缀 (OpenVINO IR 也可以直接给出 ultralytics 导出的 *_openvino_model 目录)
+BACKENDS = {
+    'ultralytics': ('.pt',),
+    'onnx': ('.onnx',),
+    'tflite': ('.tflite',),
+    'openvino': ('.xml',),
+}
+
+# 走 letterbox -> 张量推理 -> 解码/NMS 流程的后端
+TENSOR_BACKENDS = ('onnx', 'tflite', 'openvino')
+
+# ONNX输入类型 -> (输入张量类型, 是否归一化到0-1)
+ONNX_INPUT_TYPES = {
+    'tensor(float)': (np.float32, True),
+    'tensor(float16)': (np.float16, True),
+    'tensor(uint8)': (np.uint8, False),
+}
 
 
 class YOLODetector:
@@ -50,37 +250,70 @@ class YOLODetector:
         model_path: str,
         conf_threshold: float = 0.25,
         iou_threshold: float = 0.45,
-        use_gpu: bool = True
+        use_gpu: bool = True,
+        class_names: Optional[List[str]] = None,
+        optimized_cache: bool = False,
+        backend: Optional[str] = None,
+        num_threads: int = 0
     ):
         """
         初始化YOLO检测器
 
         Args:
-            model_path: 模型路径 (.pt 或 .onnx)
+            model_path: 模型路径 (.pt / .onnx / .tflite / OpenVINO .xml或导出目录)
             conf_threshold: 置信度阈值
             iou_threshold: NMS的IOU阈值
             use_gpu: 是否使用GPU
+            class_names: 类别名称列表 (模型元数据中没有类别名时使用, 通常来自配置文件classes)
+            optimized_cache: ONNX模型图优化结果保存到模型旁边, 之后启动直接加载 (跳过图优化)
+            backend: 推理后端 ultralytics / onnx / tflite / openvino (None表示按文件后缀判断)
+            num_threads: CPU推理线程数 (0表示由后端决定, ultralytics不使用)
         """
         self.model_path = Path(model_path)
         self.conf_threshold = conf_threshold
         self.iou_threshold = iou_threshold
         self.use_gpu = use_gpu
+        self.optimized_cache = optimized_cache
+        self.num_threads = num_threads
 
         self.model = None
         self.class_names: List[str] = []
-        self.model_type = self._detect_model_type()
+        self.model_type = self._detect_model_type(backend)
+        # 推理输入尺寸 (正方形边长), None表示使用模型默认尺寸
+        self.imgsz: Optional[int] = None
+
+        # 张量推理状态 (onnx / tflite / openvino)
+        self._fallback_class_names = list(class_names) if class_names else []
+        self._input_name = None
+        self._input_batch: Optional[int] = None
+        self._letterbox: Optional[Letterbox] = None
+        # 动态输入尺寸的ONNX模型: 各输入尺寸的letterbox (第一个为模型默认尺寸)
+        self._dynamic_input = False
+        self._letterboxes: Dict[tuple, Letterbox] = {}
+        self._class_masks: Dict[tuple, np.ndarray] = {}
+        self._infer = None
+
+        # TFLite量化参数 (scale, zero_point) 与输出坐标是否归一化
+        self._input_quant: Optional[tuple] = None
+        self._output_quant: Optional[tuple] = None
+        self._normalized_boxes: Optional[bool] = None
 
         self._load_model()
 
-    def _detect_model_type(self) -> str:
+    def _detect_model_type(self, backend: Optional[str] = None) -> str:
         """检测模型类型"""
+        if backend:
+            if backend not in BACKENDS:
+                raise ValueError(f"不支持的推理后端: {backend}")
+            return backend
+
+        if self.model_path.is_dir():
+            return 'openvino'
         suffix = self.model_path.suffix.lower()
-        if suffix == '.pt':
-            return 'ultralytics'
-        elif suffix == '.onnx':
-            return 'onnx'
-        else:
-            raise ValueError(f"不支持的模型格式: {suffix}")
+        for name, suffixes in BACKENDS.items():
+            if suffix in suffixes:
+                return name
+        raise ValueError(f"不支持的模型格式: {suffix}")
 
     def _load_model(self):
         """加载模型"""
@@ -93,6 +326,10 @@ class YOLODetector:
             self._load_ultralytics_model()
         elif self.model_type == 'onnx':
             self._load_onnx_model()
+        elif self.model_type == 'tflite':
+            self._load_tflite_model()
+        elif self.model_type == 'openvino':
+            self._load_openvino_model()
 
         print(f"✓ 模型加载成功")
         print(f"  类别数量: {len(self.class_names)}")
@@ -130,102 +367,425 @@ class YOLODetector:
             # 设置会话选项
             providers = ['CUDAExecutionProvider', 'CPUExecutionProvider'] if self.use_gpu else ['CPUExecutionProvider']
 
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if self.num_threads:
+                options.intra_op_num_threads = self.num_threads
+            model_file = self.model_path
+
+            if self.optimized_cache:
+                cache_path = self._optimized_cache_path(ort.__version__, providers)
+                if cache_path.exists() and cache_path.stat().st_mtime >= self.model_path.stat().st_mtime:
+                    # 已经优化过的图, 不再重复优化
+                    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+                    model_file = cache_path
+                    print(f"  使用已优化的模型: {cache_path.name}")
+                else:
+                    options.optimized_model_filepath = str(cache_path)
+
             self.model = ort.InferenceSession(
-                str(self.model_path),
+                str(model_file),
+                sess_options=options,
                 providers=providers
             )
 
             print(f"  使用提供者: {self.model.get_providers()}")
 
-            # TODO: 从配置文件加载类别名称
-            self.class_names = []
-
         except ImportError:
             raise ImportError("请安装onnxruntime: pip install onnxruntime-gpu")
 
+        # 输入尺寸 (动态维度时按640处理); 批量维度固定时按该大小分批推理
+        model_input = self.model.get_inputs()[0]
+        self._input_name = model_input.name
+        batch, _, height, width = model_input.shape
+        self._input_batch = batch if isinstance(batch, int) else None
+        self._dynamic_input = not isinstance(height, int) or not isinstance(width, int)
+        input_size = (
+            height if isinstance(height, int) else 640,
+            width if isinstance(width, int) else 640,
+        )
+        # 输入类型: 量化模型可能是uint8 (直接输入0-255像素值) 或float16
+        dtype, normalize = ONNX_INPUT_TYPES.get(model_input.type, (np.float32, True))
+        self._letterbox = Letterbox(
+            input_size, dtype=dtype, batch_size=self._input_batch or 1, normalize=normalize
+        )
+        self._letterboxes = {input_size: self._letterbox}
+        self._infer = self._infer_onnx
+        batch_text = self._input_batch if self._input_batch else "动态"
+        print(f"  输入尺寸: {input_size[1]}x{input_size[0]}  批量: {batch_text}  输入类型: {np.dtype(dtype).name}")
+
+        # 输出为 (1, 4 + nc, N), 较小的维度是通道数
+        output_shape = self.model.get_outputs()[0].shape
+        dims = [d for d in output_shape[1:] if isinstance(d, int)]
+        num_classes = min(dims) - 4 if len(output_shape) == 3 and len(dims) == 2 else None
+
+        names = self.model.get_modelmeta().custom_metadata_map.get('names')
+        self.class_names = self._resolve_class_names(names, num_classes)
+
+    def _infer_onnx(self, tensor: np.ndarray) -> np.ndarray:
+        output = self.model.run(None, {self._input_name: tensor})[0]
+        return output if output.dtype == np.float32 else output.astype(np.float32)
+
+    def _load_tflite_model(self):
+        """
+        加载TFLite模型
+
+        CPU上默认使用XNNPACK委托 (浮点模型与int8量化模型都支持)。
+        ultralytics导出的模型为NHWC输入, 输出坐标按输入尺寸归一化。
+        """
+        interpreter_class = None
+        for module_name in ('tflite_runtime.interpreter', 'ai_edge_litert.interpreter', 'tensorflow.lite'):
+            try:
+                module = __import__(module_name, fromlist=['Interpreter'])
+                interpreter_class = module.Interpreter
+                break
+            except ImportError:
+                continue
+        if interpreter_class is None:
+            raise ImportError("请安装tflite-runtime: pip install tflite-runtime (或 tensorflow)")
+
+        self.model = interpreter_class(
+            model_path=str(self.model_path),
+            num_threads=self.num_threads or None
+        )
+        self.model.allocate_tensors()
+
+        input_detail = self.model.get_input_details()[0]
+        output_detail = self.model.get_output_details()[0]
+        self._input_name = input_detail['index']
+        batch, height, width, _ = (int(d) for d in input_detail['shape'])
+        self._input_batch = batch
+
+        input_dtype = np.dtype(input_detail['dtype'])
+        if input_dtype.kind in 'iu':
+            self._input_quant = (input_detail['quantization'], input_dtype)
+        output_scale, output_zero = output_detail['quantization']
+        if np.dtype(output_detail['dtype']).kind in 'iu' and output_scale:
+            self._output_quant = (output_scale, output_zero)
+
+        self._letterbox = Letterbox((height, width), batch_size=batch, layout="nhwc")
+        self._infer = self._infer_tflite
+        quant_text = f"  输入量化: {input_dtype.name}" if self._input_quant else ""
+        print(f"  输入尺寸: {width}x{height}  批量: {batch}  线程: {self.num_threads or '默认'}{quant_text}")
+
+        shape = output_detail['shape']
+        num_classes = int(min(shape[1:])) - 4 if len(shape) == 3 else None
+        self.class_names = self._resolve_class_names(self._read_tflite_metadata(), num_classes)
+
+    def _read_tflite_metadata(self) -> Optional[str]:
+        """ultralytics把元数据以zip形式追加在.tflite文件末尾"""
+        try:
+            with zipfile.ZipFile(self.model_path) as archive:
+                metadata = ast.literal_eval(archive.read(archive.namelist()[0]).decode('utf-8'))
+            names = metadata.get('names')
+            return repr(names) if names else None
+        except (zipfile.BadZipFile, IndexError, ValueError, SyntaxError, AttributeError):
+            return None
+
+    def _infer_tflite(self, tensor: np.ndarray) -> np.ndarray:
+        if self._input_quant is not None:
+            (scale, zero_point), dtype = self._input_quant
+            info = np.iinfo(dtype)
+            tensor = np.clip(np.round(tensor / scale + zero_point), info.min, info.max).astype(dtype)
+
+        output_index = self.model.get_output_details()[0]['index']
+        self.model.set_tensor(self._input_name, tensor)
+        self.model.invoke()
+        output = self.model.get_tensor(output_index)
+
+        if self._output_quant is not None:
+            scale, zero_point = self._output_quant
+            output = (output.astype(np.float32) - zero_point) * scale
+
+        # 归一化坐标 -> 输入像素坐标。锚点中心覆盖整幅输入, 据此判断一次即可
+        channels_first = output.shape[-2] < output.shape[-1]
+        if self._normalized_boxes is None:
+            centers_x = output[..., 0, :] if channels_first else output[..., 0]
+            self._normalized_boxes = bool(centers_x.max() <= 2.0)
+        if self._normalized_boxes:
+            output = np.array(output, dtype=np.float32)
+            height, width = self._letterbox.input_size
+            if channels_first:
+                output[..., [0, 2], :] *= width
+                output[..., [1, 3], :] *= height
+            else:
+                output[..., [0, 2]] *= width
+                output[..., [1, 3]] *= height
+        return output
+
+    def _load_openvino_model(self):
+        """加载OpenVINO IR模型 (.xml + .bin, 或ultralytics导出的 *_openvino_model 目录)"""
+        try:
+            import openvino as ov
+        except ImportError:
+            raise ImportError("请安装openvino: pip install openvino")
+
+        xml_path = self.model_path
+        if xml_path.is_dir():
+            candidates = sorted(xml_path.glob('*.xml'))
+            if not candidates:
+                raise FileNotFoundError(f"目录中没有OpenVINO模型(.xml): {xml_path}")
+            xml_path = candidates[0]
+
+        core = ov.Core()
+        network = core.read_model(str(xml_path))
+        config = {'PERFORMANCE_HINT': 'LATENCY'}
+        if self.num_threads:
+            config['INFERENCE_NUM_THREADS'] = self.num_threads
+        self.model = core.compile_model(network, 'CPU', config)
+        self._request = self.model.create_infer_request()
+
+        shape = network.input(0).get_partial_shape()
+        batch, _, height, width = (d.get_length() if d.is_static else None for d in shape)
+        self._input_batch = batch
+        input_size = (height or 640, width or 640)
+        self._letterbox = Letterbox(input_size, batch_size=batch or 1)
+        self._infer = self._infer_openvino
+        batch_text = batch if batch else "动态"
+        print(f"  输入尺寸: {input_size[1]}x{input_size[0]}  批量: {batch_text}  线程: {self.num_threads or '默认'}")
+
+        output_shape = network.output(0).get_partial_shape()
+        dims = [d.get_length() for d in output_shape if d.is_static][1:]
+        num_classes = min(dims) - 4 if len(output_shape) == 3 and len(dims) == 2 else None
+
+        # ultralytics导出时在模型旁边写入metadata.yaml
+        names = None
+        metadata_path = xml_path.parent / 'metadata.yaml'
+        if metadata_path.exists():
+            import yaml
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                metadata = yaml.safe_load(f) or {}
+            if metadata.get('names'):
+                names = repr(metadata['names'])
+        self.class_names = self._resolve_class_names(names, num_classes)
+
+    def _infer_openvino(self, tensor: np.ndarray) -> np.ndarray:
+        self._request.infer({0: tensor})
+        return self._request.get_output_tensor(0).data
+
+    def _optimized_cache_path(self, ort_version: str, providers: List[str]) -> Path:
+        """
+        图优化结果的缓存路径
+
+        ORT_ENABLE_ALL的优化结果与硬件和执行提供者相关, 文件名中带上这些信息,
+        换机器、升级onnxruntime或切换GPU/CPU时会重新优化。
+        """
+        device = 'gpu' if 'CUDAExecutionProvider' in providers else 'cpu'
+        tag = f"ort{ort_version}-{platform.machine().lower()}-{device}"
+        return self.model_path.with_name(f"{self.model_path.stem}.{tag}.optimized.onnx")
+
+    @property
+    def supports_input_size(self) -> bool:
+        """能否在运行时调整输入尺寸 (ultralytics模型, 或以dynamic=True导出的ONNX模型)"""
+        return self.model_type == 'ultralytics' or (self.model_type == 'onnx' and self._dynamic_input)
+
+    def set_input_size(self, size: Optional[int]) -> bool:
+        """
+        设置推理输入尺寸
+
+        Args:
+            size: 正方形输入边长, 向上取整到32的倍数 (None恢复模型默认尺寸)
+
+        Returns:
+            是否生效 (模型不支持调整时返回False)
+        """
+        if not self.supports_input_size:
+            return False
+        if size:
+            size = int(np.ceil(size / 32) * 32)
+
+        if self.model_type == 'onnx':
+            # 每个尺寸的letterbox只创建一次, 切换时复用预分配的缓冲区
+            default = next(iter(self._letterboxes.values()))
+            key = (size, size) if size else default.input_size
+            letterbox = self._letterboxes.get(key)
+            if letterbox is None:
+                letterbox = Letterbox(
+                    key, dtype=default.dtype, batch_size=default.capacity, normalize=default.normalize
+                )
+                self._letterboxes[key] = letterbox
+            self._letterbox = letterbox
+
+        self.imgsz = size or None
+        return True
+
+    def warmup(self, runs: int = 1, image_shape: Tuple[int, int] = (640, 640)):
+        """
+        预热推理 - 在加载阶段完成首次推理的图初始化/显存分配, 避免第一帧卡顿
+
+        Args:
+            runs: 预热次数
+            image_shape: 预热画面尺寸 (height, width), 与实际画面一致时letterbox参数也一并就绪
+        """
+        if runs <= 0:
+            return
+        image = np.zeros((image_shape[0], image_shape[1], 3), dtype=np.uint8)
+        start = time.time()
+        for _ in range(runs):
+            self.detect(image)
+        print(f"✓ 模型预热完成 ({runs}次, {(time.time() - start) * 1000:.0f}ms)")
+
+    def _resolve_class_names(self, names: Optional[str], num_classes: Optional[int]) -> List[str]:
+        """
+        类别名称: 模型元数据 (ultralytics导出时写入) > 配置文件 > 按输出通道数生成
+
+        Args:
+            names: 元数据中的类别名称字符串, 如 "{0: 'enemy', 1: 'skill_button'}"
+            num_classes: 由输出形状推断的类别数 (未知为None)
+        """
+        if names:
+            try:
+                parsed = ast.literal_eval(names)
+                if isinstance(parsed, dict):
+                    return [str(parsed[k]) for k in sorted(parsed)]
+                return [str(n) for n in parsed]
+            except (ValueError, SyntaxError):
+                print(f"  无法解析模型元数据中的类别名称: {names[:50]}")
+
+        if self._fallback_class_names:
+            if num_classes is not None and num_classes != len(self._fallback_class_names):
+                print(f"  警告: 配置的类别数({len(self._fallback_class_names)})与模型输出({num_classes})不一致")
+            return list(self._fallback_class_names)
+
+        return [f"class_{i}" for i in range(num_classes or 0)]
+
     def detect(
         self,
         image: np.ndarray,
         filter_classes: Optional[List[str]] = None
-    ) -> List[Detection]:
+    ) -> DetectionSet:
         """
         检测图像中的目标
 
         Args:
             image: 输入图像 (BGR格式)
-            filter_classes: 过滤特定类别 (可选)
+            filter_classes: 过滤特定类别 (可选, 在推理/解码阶段直接过滤)
 
         Returns:
-            检测结果列表
+            检测结果集合 (可按List[Detection]使用)
         """
         if self.model is None:
             raise RuntimeError("模型未加载")
 
         if self.model_type == 'ultralytics':
             return self._detect_ultralytics(image, filter_classes)
-        elif self.model_type == 'onnx':
-            return self._detect_onnx(image, filter_classes)
+        elif self.model_type in TENSOR_BACKENDS:
+            return self._detect_tensor_batch([image], filter_classes)[0]
 
-    def _detect_ultralytics(
+    def detect_batch(
         self,
-        image: np.ndarray,
+        images: List[np.ndarray],
         filter_classes: Optional[List[str]] = None
-    ) -> List[Detection]:
-        """使用Ultralytics模型检测"""
-        # 推理
-        results = self.model(
-            image,
-            conf=self.conf_threshold,
-            iou=self.iou_threshold,
-            verbose=False
-        )[0]
-
-        detections = []
+    ) -> List[DetectionSet]:
+        """
+        批量检测 - 多帧 (尺寸可以不同) 合并为一次前向推理
 
-        # 解析结果
-        for box in results.boxes:
-            class_id = int(box.cls)
-            class_name = self.class_names[class_id]
-            confidence = float(box.conf)
+        Args:
+            images: 输入图像列表 (BGR格式)
+            filter_classes: 过滤特定类别 (可选)
 
-            # 过滤类别
-            if filter_classes and class_name not in filter_classes:
-                continue
+        Returns:
+            与images一一对应的检测结果列表, 坐标已映射回各自原图
+        """
+        if self.model is None:
+            raise RuntimeError("模型未加载")
+        if not images:
+            return []
 
-            # 边界框
-            x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
-            bbox = (x1, y1, x2, y2)
+        if self.model_type == 'ultralytics':
+            results = self.model(list(images), **self._ultralytics_args(filter_classes))
+            return [self._parse_ultralytics(result) for result in results]
+        elif self.model_type in TENSOR_BACKENDS:
+            return self._detect_tensor_batch(images, filter_classes)
 
-            # 中心点
-            cx = (x1 + x2) // 2
-            cy = (y1 + y2) // 2
-            center = (cx, cy)
+    def _detect_ultralytics(
+        self,
+        image: np.ndarray,
+        filter_classes: Optional[List[str]] = None
+    ) -> DetectionSet:
+        """使用Ultralytics模型检测 (类别过滤交给模型的NMS阶段)"""
+        # 推理
+        results = self.model(image, **self._ultralytics_args(filter_classes))[0]
 
-            detection = Detection(
-                class_id=class_id,
-                class_name=class_name,
-                confidence=confidence,
-                bbox=bbox,
-                center=center
-            )
-            detections.append(detection)
+        return self._parse_ultralytics(results)
 
-        return detections
+    def _ultralytics_args(self, filter_classes: Optional[List[str]]) -> dict:
+        """Ultralytics推理参数 (未设置imgsz时使用模型默认尺寸)"""
+        args = dict(
+            conf=self.conf_threshold,
+            iou=self.iou_threshold,
+            classes=self._get_class_ids(filter_classes),
+            verbose=False
+        )
+        if self.imgsz:
+            args['imgsz'] = self.imgsz
+        return args
+
+    def _parse_ultralytics(self, results) -> DetectionSet:
+        """解析单张图的Ultralytics结果 - 一次拷贝 (N, 6) 数组"""
+        data = results.boxes.data.cpu().numpy()
+        return DetectionSet(data[:, :4], data[:, 4], data[:, 5], self.class_names)
+
+    def _get_class_ids(self, filter_classes: Optional[List[str]]) -> Optional[List[int]]:
+        """类别名称 -> 类别ID列表 (None表示不过滤)"""
+        if not filter_classes:
+            return None
+        wanted = set(filter_classes)
+        return [i for i, name in enumerate(self.class_names) if name in wanted]
 
-    def _detect_onnx(
+    def _detect_tensor_batch(
         self,
-        image: np.ndarray,
+        images: List[np.ndarray],
         filter_classes: Optional[List[str]] = None
-    ) -> List[Detection]:
-        """使用ONNX模型检测"""
-        # TODO: 实现ONNX推理
-        raise NotImplementedError("ONNX推理尚未实现")
+    ) -> List[DetectionSet]:
+        """使用ONNX/TFLite/OpenVINO模型批量检测 (批量维度固定的模型按固定大小分批)"""
+        chunk = self._input_batch or len(images)
+        results = []
+
+        for start in range(0, len(images), chunk):
+            batch = images[start:start + chunk]
+            tensor = self._letterbox.batch(batch)
+            if self._input_batch and len(batch) < self._input_batch:
+                # 固定批量的模型需要完整批次, 多出的位置沿用上次的数据, 结果丢弃
+                tensor = self._letterbox.tensor[:self._input_batch]
+            output = self._infer(tensor)
+            class_mask = self._get_class_mask(filter_classes, output)
+
+            for i, image in enumerate(batch):
+                boxes, scores, class_ids = decode_yolov8(output[i], self.conf_threshold, class_mask)
+                keep = nms(boxes, scores, self.iou_threshold, class_ids)
+                boxes = self._letterbox.scale_boxes(boxes[keep], image.shape[:2], index=i)
+                results.append(DetectionSet(boxes, scores[keep], class_ids[keep], self.class_names))
+
+        return results
+
+    def _get_class_mask(
+        self,
+        filter_classes: Optional[List[str]],
+        output: np.ndarray
+    ) -> Optional[np.ndarray]:
+        """类别过滤掩码 - 在解码阶段直接屏蔽不需要的类别"""
+        if not filter_classes:
+            return None
+
+        key = tuple(filter_classes)
+        mask = self._class_masks.get(key)
+        if mask is None:
+            num_classes = min(output.shape[-2:]) - 4
+            wanted = set(filter_classes)
+            mask = np.array(
+                [i < len(self.class_names) and self.class_names[i] in wanted for i in range(num_classes)],
+                dtype=bool
+            )
+            self._class_masks[key] = mask
+        return mask
 
     def draw_detections(
         self,
         image: np.ndarray,
         detections: List[Detection],
-        show_conf: bool = True
+        show_conf: bool = True,
+        out: Optional[np.ndarray] = None
     ) -> np.ndarray:
         """
         在图像上绘制检测结果
@@ -234,11 +794,16 @@ class YOLODetector:
             image: 原始图像
             detections: 检测结果
             show_conf: 是否显示置信度
+            out: 复用的输出缓冲区 (可选, 尺寸需与image一致), 避免每帧分配新图像
 
         Returns:
             绘制后的图像
         """
-        result_image = image.copy()
+        if out is not None and out.shape == image.shape and out.dtype == image.dtype:
+            np.copyto(out, image)
+            result_image = out
+        else:
+            result_image = image.copy()
 
         for det in detections:
             x1, y1, x2, y2 = det.bbox
@@ -291,6 +856,8 @@ class YOLODetector:
         class_name: str
     ) -> List[Detection]:
         """获取指定类别的检测结果"""
+        if isinstance(detections, DetectionSet):
+            return detections.by_class(class_name)
         return [det for det in detections if det.class_name == class_name]
 
     def find_nearest_detection(
@@ -302,6 +869,10 @@ class YOLODetector:
         if not detections:
             return None
 
+        if isinstance(detections, DetectionSet):
+            dist = np.hypot(*(detections.centers - np.asarray(point)).T)
+            return detections[int(dist.argmin())]
+
         min_dist = float('inf')
         nearest = None
 
@@ -318,35 +889,23 @@ class YOLODetector:
         return nearest
 
 
-class DetectionTracker:
-    """检测目标跟踪器 - 用于多帧目标关联"""
+def model_source(model_config: dict) -> Tuple[str, Optional[str]]:
+    """
+    根据配置选择模型文件和推理后端
 
-    def __init__(self, max_frames: int = 30):
-        """
-        Args:
-            max_frames: 目标最大丢失帧数
-        """
-        self.max_frames = max_frames
-        self.tracked_objects: Dict[int, List[Detection]] = {}
-        self.next_id = 0
+    backend为auto时按path的后缀判断; 指定后端时优先使用backends中该后端的模型路径。
 
-    def update(self, detections: List[Detection]) -> Dict[int, Detection]:
-        """
-        更新跟踪器
-
-        Args:
-            detections: 当前帧的检测结果
+    Args:
+        model_config: 配置文件中的model部分
 
-        Returns:
-            跟踪ID到检测结果的映射
-        """
-        # TODO: 实现简单的IOU跟踪算法
-        # 这里提供一个简化版本
-        tracked = {}
-        for det in detections:
-            tracked[self.next_id] = det
-            self.next_id += 1
-        return tracked
+    Returns:
+        (模型路径, 后端名称或None)
+    """
+    backend = model_config.get('backend', 'auto') or 'auto'
+    if backend == 'auto':
+        return model_config['path'], None
+    path = (model_config.get('backends') or {}).get(backend, model_config['path'])
+    return path, backend
 
 
 # 测试代码
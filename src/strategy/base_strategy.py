@@ -8,7 +8,7 @@ from typing import List, Dict, Any, Optional
 from enum import Enum
 import time
 
-from ..detector.yolo_detector import Detection
+from ..detector.yolo_detector import Detection, DetectionSet
 
 
 class GameState(Enum):
@@ -36,6 +36,10 @@ class BaseStrategy(ABC):
         self.last_action_time = 0
         self.action_cooldown = 0.5  # 操作冷却时间(秒)
 
+        # 各状态需要检测的类别及轮询频率 {状态: {类别名: Hz}}
+        # 频率0表示每帧检测, '*' 表示其余全部类别; 未声明的状态每帧检测全部类别
+        self.detection_schedule: Dict[GameState, Dict[str, float]] = {}
+
     @abstractmethod
     def analyze_state(self, frame, detections: List[Detection]) -> GameState:
         """
@@ -70,6 +74,18 @@ class BaseStrategy(ABC):
         """
         pass
 
+    def get_detection_schedule(self, state: Optional[GameState] = None) -> Optional[Dict[str, float]]:
+        """
+        获取状态对应的检测调度表
+
+        Args:
+            state: 游戏状态 (默认为当前状态)
+
+        Returns:
+            {类别名: 轮询频率(Hz)}, None表示每帧检测全部类别
+        """
+        return self.detection_schedule.get(state or self.current_state)
+
     def update(self, frame, detections: List[Detection]) -> Optional[Dict[str, Any]]:
         """
         更新策略 - 主循环调用
@@ -105,10 +121,14 @@ class BaseStrategy(ABC):
         class_name: str
     ) -> List[Detection]:
         """获取指定类别的检测结果"""
+        if isinstance(detections, DetectionSet):
+            return detections.by_class(class_name)
         return [det for det in detections if det.class_name == class_name]
 
     def has_detection(self, detections: List[Detection], class_name: str) -> bool:
         """检查是否存在某类检测目标"""
+        if isinstance(detections, DetectionSet):
+            return detections.has_class(class_name)
         return any(det.class_name == class_name for det in detections)
 
 
@@ -126,6 +146,16 @@ class SimpleStrategy(BaseStrategy):
             GameState.LOADING: ["loading_icon"],
         }
 
+        # 每个状态只检测判断状态和决策用到的类别;
+        # 这些类别全部消失后状态变为UNKNOWN, 重新检测全部类别
+        self.detection_schedule = {
+            GameState.MENU: {"start_button": 2.0, "menu_bg": 1.0},
+            GameState.BATTLE: {"enemy": 0, "hp_bar": 5.0, "skill_button": 5.0},
+            GameState.REWARD: {"claim_button": 2.0, "reward_icon": 1.0},
+            GameState.LOADING: {"loading_icon": 1.0},
+            GameState.UNKNOWN: {"*": 5.0},
+        }
+
     def analyze_state(self, frame, detections: List[Detection]) -> GameState:
         """分析游戏状态"""
 
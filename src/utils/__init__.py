@@ -1,3 +1,4 @@
 from .logger import setup_logger, get_logger
+from .profiler import StartupProfiler
 
-__all__ = ['setup_logger', 'get_logger']
+__all__ = ['setup_logger', 'get_logger', 'StartupProfiler']
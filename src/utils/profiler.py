@@ -0,0 +1,49 @@
+"""
+启动耗时分析 - 统计从进程启动到第一帧决策的各阶段耗时
+Startup Profiler - Break down the time to the first processed frame
+"""
+
+import time
+from typing import List, Optional, Tuple
+
+
+class StartupProfiler:
+    """
+    启动阶段计时器
+
+    依次调用 mark(阶段名), 每个阶段的耗时为与上一次mark的间隔。
+    """
+
+    def __init__(self, start: Optional[float] = None):
+        """
+        Args:
+            start: 计时起点 (time.perf_counter()的值, 默认为创建时刻)
+        """
+        self.start = time.perf_counter() if start is None else start
+        self._last = self.start
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, name: str):
+        """记录一个阶段结束"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    @property
+    def total(self) -> float:
+        return self._last - self.start
+
+    def report(self) -> str:
+        """生成耗时分解报告"""
+        total = self.total
+        width = max([len(name) for name, _ in self.phases] + [4])
+        lines = ["启动耗时分解:"]
+        elapsed = 0.0
+        for name, duration in self.phases:
+            elapsed += duration
+            share = duration / total if total > 0 else 0.0
+            lines.append(
+                f"  {name:<{width}} {duration * 1000:>9.1f}ms {share:>6.1%}  (累计 {elapsed * 1000:.1f}ms)"
+            )
+        lines.append(f"  {'总计':<{width}} {total * 1000:>9.1f}ms")
+        return "\n".join(lines)
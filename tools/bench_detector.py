@@ -0,0 +1,281 @@
+"""
+检测器延迟对比 - 在同一批画面上比较ultralytics、ONNX Runtime、TFLite与OpenVINO推理
+Detector Latency Comparison - Ultralytics / ONNX Runtime / TFLite / OpenVINO on the same frames
+"""
+
+import time
+import argparse
+import threading
+from pathlib import Path
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.detector.yolo_detector import YOLODetector
+from src.detector.batcher import MicroBatcher
+from src.detector.flow import OpticalFlowDetector
+from src.detector.tracker import TrackingDetector
+from src.detector.ops import box_iou
+
+
+def load_frames(source: str = None, count: int = 50) -> list:
+    """
+    读取测试画面
+
+    Args:
+        source: 图片目录、视频文件或.npy帧归档 (None时生成合成画面)
+        count: 最多读取的帧数
+    """
+    if source is None:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, (1080, 2400, 3), dtype=np.uint8) for _ in range(min(count, 10))]
+
+    path = Path(source)
+    if path.is_dir():
+        files = sorted(p for p in path.iterdir() if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))
+        frames = [cv2.imread(str(p)) for p in files[:count]]
+        return [f for f in frames if f is not None]
+
+    if path.suffix.lower() == '.npy':
+        archive = np.load(str(path), mmap_mode='r')
+        return [np.array(archive[i]) for i in range(min(count, len(archive)))]
+
+    frames = []
+    video = cv2.VideoCapture(str(path))
+    while len(frames) < count:
+        ok, frame = video.read()
+        if not ok:
+            break
+        frames.append(frame)
+    video.release()
+    return frames
+
+
+def run_detector(detector: YOLODetector, frames: list, warmup: int = 3) -> tuple:
+    """逐帧检测, 返回 (每帧耗时列表, 每帧检测结果)"""
+    for frame in frames[:warmup]:
+        detector.detect(frame)
+
+    latencies = []
+    results = []
+    for frame in frames:
+        start = time.perf_counter()
+        detections = detector.detect(frame)
+        latencies.append(time.perf_counter() - start)
+        results.append(detections)
+    return latencies, results
+
+
+def run_batched(detector: YOLODetector, frames: list, batch_size: int, max_wait: float = 0.01):
+    """
+    比较逐帧推理、detect_batch 与多生产者微批处理的吞吐
+
+    Args:
+        detector: 检测器
+        frames: 测试画面
+        batch_size: 批量大小 (同时也是模拟的设备数)
+        max_wait: 微批处理最长等待时间(秒)
+    """
+    total = len(frames) - len(frames) % batch_size
+    if total == 0:
+        print("✗ 测试帧数少于批量大小")
+        return
+    frames = frames[:total]
+    detector.detect_batch(frames[:batch_size])
+
+    start = time.perf_counter()
+    for frame in frames:
+        detector.detect(frame)
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(0, total, batch_size):
+        detector.detect_batch(frames[i:i + batch_size])
+    batched = time.perf_counter() - start
+
+    # 每个生产者线程模拟一台设备
+    batcher = MicroBatcher(detector, max_batch=batch_size, max_wait=max_wait)
+    batcher.start()
+
+    def producer(index: int):
+        for frame in frames[index::batch_size]:
+            batcher.detect(frame)
+
+    threads = [threading.Thread(target=producer, args=(i,)) for i in range(batch_size)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    micro = time.perf_counter() - start
+    stats = batcher.get_stats()
+    batcher.stop()
+
+    print(f"\n批量推理 (batch={batch_size}, {total} 帧):")
+    print(f"  逐帧 detect:      {total / sequential:>7.1f} FPS")
+    print(f"  detect_batch:     {total / batched:>7.1f} FPS")
+    print(
+        f"  MicroBatcher:     {total / micro:>7.1f} FPS "
+        f"(平均批量 {stats['avg_batch_size']:.1f}, 平均等待 {stats['avg_wait_ms']:.1f}ms)"
+    )
+
+
+def run_keyframe(detector: YOLODetector, frames: list, interval: int, reference: list):
+    """
+    比较逐帧检测与关键帧模式 (光流传播 / 卡尔曼外推) 的精度和吞吐
+
+    Args:
+        detector: 检测器
+        frames: 连续画面 (视频或录制的帧归档)
+        interval: 关键帧间隔
+        reference: 逐帧检测的结果 (作为精度基准)
+    """
+    print(f"\n关键帧模式 (间隔 {interval}, {len(frames)} 帧, 以逐帧检测为基准):")
+    print(f"{'模式':<12}{'平均(ms)':>9}{'FPS':>9}{'推理次数':>9}{'召回':>9}{'平均IoU':>9}")
+
+    modes = (
+        ('optical_flow', OpticalFlowDetector(detector, keyframe_interval=interval)),
+        ('kalman', TrackingDetector(detector, detect_interval=interval)),
+    )
+    for name, wrapper in modes:
+        latencies = []
+        results = []
+        for frame in frames:
+            start = time.perf_counter()
+            detections = wrapper.detect(frame)
+            latencies.append(time.perf_counter() - start)
+            results.append(detections)
+
+        stats = compare_results(reference, results)
+        recall = stats['matched'] / stats['total_a'] if stats['total_a'] else 1.0
+        ms = np.mean(latencies) * 1000
+        print(
+            f"{name:<12}{ms:>9.1f}{1000 / ms:>9.1f}{wrapper.get_stats()['inference_calls']:>9}"
+            f"{recall:>9.1%}{stats['mean_iou']:>9.3f}"
+        )
+
+
+def compare_results(results_a: list, results_b: list, iou_threshold: float = 0.5) -> dict:
+    """按类别贪心匹配两组检测结果"""
+    matched = 0
+    total_a = 0
+    total_b = 0
+    ious = []
+
+    for dets_a, dets_b in zip(results_a, results_b):
+        total_a += len(dets_a)
+        total_b += len(dets_b)
+        if not dets_a or not dets_b:
+            continue
+
+        boxes_a = np.array([d.bbox for d in dets_a], dtype=np.float32)
+        boxes_b = np.array([d.bbox for d in dets_b], dtype=np.float32)
+        iou = box_iou(boxes_a, boxes_b)
+        same_class = np.array([[a.class_id == b.class_id for b in dets_b] for a in dets_a])
+        iou = np.where(same_class, iou, 0)
+
+        while iou.size and iou.max() >= iou_threshold:
+            i, j = np.unravel_index(iou.argmax(), iou.shape)
+            ious.append(iou[i, j])
+            matched += 1
+            iou[i, :] = 0
+            iou[:, j] = 0
+
+    return {
+        'matched': matched,
+        'total_a': total_a,
+        'total_b': total_b,
+        'mean_iou': float(np.mean(ious)) if ious else 0.0,
+    }
+
+
+def print_latency(name: str, latencies: list):
+    ms = np.array(latencies) * 1000
+    print(
+        f"{name:<14}{ms.mean():>9.1f}{np.percentile(ms, 50):>9.1f}"
+        f"{np.percentile(ms, 95):>9.1f}{1000 / ms.mean():>9.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='检测器延迟对比')
+
+    parser.add_argument('--pt', type=str, default='models/best.pt', help='ultralytics模型路径')
+    parser.add_argument('--onnx', type=str, default='models/best.onnx', help='ONNX模型路径')
+    parser.add_argument('--tflite', type=str, default='models/best_int8.tflite', help='TFLite模型路径')
+    parser.add_argument('--openvino', type=str, default='models/best_openvino_model', help='OpenVINO IR目录或.xml路径')
+    parser.add_argument('--threads', type=int, default=0, help='CPU推理线程数 (0表示由后端决定)')
+    parser.add_argument('--source', type=str, default=None, help='图片目录/视频/.npy帧归档 (默认合成画面)')
+    parser.add_argument('--count', type=int, default=50, help='测试帧数')
+    parser.add_argument('--warmup', type=int, default=3, help='预热帧数')
+    parser.add_argument('--conf', type=float, default=0.25, help='置信度阈值')
+    parser.add_argument('--cpu', action='store_true', help='只使用CPU')
+    parser.add_argument('--batch', type=int, default=0, help='额外测试批量推理的批量大小 (0表示不测试)')
+    parser.add_argument('--keyframe', type=int, default=0, help='额外测试关键帧模式的间隔 (0表示不测试, 需要连续画面)')
+
+    args = parser.parse_args()
+
+    print("=== 检测器延迟对比 ===\n")
+
+    frames = load_frames(args.source, args.count)
+    if not frames:
+        print("✗ 没有可用的测试画面")
+        return
+    print(f"测试画面: {len(frames)} 帧, 尺寸 {frames[0].shape[1]}x{frames[0].shape[0]}\n")
+
+    runs = {}
+    detectors = {}
+    candidates = (
+        ('ultralytics', 'ultralytics', args.pt),
+        ('onnxruntime', 'onnx', args.onnx),
+        ('tflite', 'tflite', args.tflite),
+        ('openvino', 'openvino', args.openvino),
+    )
+    for name, backend, path in candidates:
+        if not path or not Path(path).exists():
+            print(f"跳过 {name}: 模型不存在 ({path})")
+            continue
+        try:
+            detector = YOLODetector(
+                path, conf_threshold=args.conf, use_gpu=not args.cpu,
+                backend=backend, num_threads=args.threads
+            )
+        except ImportError as e:
+            print(f"跳过 {name}: {e}")
+            continue
+        detectors[name] = detector
+        runs[name] = run_detector(detector, frames, args.warmup)
+
+    if not runs:
+        return
+
+    print(f"\n{'后端':<12}{'平均(ms)':>9}{'p50(ms)':>9}{'p95(ms)':>9}{'FPS':>9}")
+    for name, (latencies, _) in runs.items():
+        print_latency(name, latencies)
+
+    # 以第一个后端的结果为基准比较其他后端
+    names = list(runs)
+    for name in names[1:]:
+        stats = compare_results(runs[names[0]][1], runs[name][1])
+        print(
+            f"\n结果一致性 [{name}]: 匹配 {stats['matched']} 个 "
+            f"({names[0]} {stats['total_a']} / {name} {stats['total_b']}), "
+            f"平均IoU {stats['mean_iou']:.3f}"
+        )
+
+    if args.batch > 1:
+        for name, detector in detectors.items():
+            print(f"\n[{name}]", end="")
+            run_batched(detector, frames, args.batch)
+
+    if args.keyframe > 1:
+        for name, detector in detectors.items():
+            print(f"\n[{name}]", end="")
+            run_keyframe(detector, frames, args.keyframe, runs[name][1])
+
+
+if __name__ == "__main__":
+    main()
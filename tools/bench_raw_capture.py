@@ -0,0 +1,121 @@
+"""
+原始帧缓冲解析基准测试 - 离线对比 raw 与 PNG 截图路径
+Raw Framebuffer Benchmark - Compare raw parsing against PNG decoding offline
+"""
+
+import gzip
+import time
+import argparse
+import subprocess
+import tracemalloc
+from pathlib import Path
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.capture.raw_capture import RawFramebufferParser, make_raw_dump
+
+
+DEFAULT_FIXTURE = Path(__file__).parent / "fixtures" / "screencap_rgba_480x216.raw.gz"
+
+
+def load_fixture(path: Path) -> bytes:
+    """加载原始dump (支持.gz)"""
+    data = path.read_bytes()
+    if path.suffix == '.gz':
+        data = gzip.decompress(data)
+    return data
+
+
+def record_fixture(output: Path, device_id: str = None):
+    """从真机录制一帧原始dump"""
+    cmd = ['adb'] + (['-s', device_id] if device_id else []) + ['exec-out', 'screencap']
+    data = subprocess.run(cmd, stdout=subprocess.PIPE, check=True).stdout
+    output.parent.mkdir(parents=True, exist_ok=True)
+    if output.suffix == '.gz':
+        output.write_bytes(gzip.compress(data))
+    else:
+        output.write_bytes(data)
+    width, height, fmt, header = RawFramebufferParser.parse_header(data, len(data))
+    print(f"✓ 已录制: {output} ({width}x{height}, format={fmt}, header={header})")
+
+
+def _bench(func, iterations: int) -> tuple:
+    """返回 (平均耗时ms, 平均每帧分配字节)"""
+    func()  # 预热
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed / iterations * 1000, peak
+
+
+def run_benchmark(fixture: Path, iterations: int = 100, scale_to: tuple = (2400, 1080)):
+    """
+    对比原始帧解析与PNG解码
+
+    Args:
+        fixture: 原始dump文件
+        iterations: 迭代次数
+        scale_to: 放大到的目标分辨率 (模拟真机分辨率), None表示使用原尺寸
+    """
+    print("=== 原始帧缓冲解析基准 ===\n")
+
+    raw = load_fixture(fixture)
+    parser = RawFramebufferParser()
+    image = parser.decode(raw).copy()
+    print(f"fixture: {fixture.name} {parser.width}x{parser.height} (header={parser.header_size}字节)")
+
+    if scale_to:
+        image = cv2.resize(image, scale_to, interpolation=cv2.INTER_NEAREST)
+        raw = make_raw_dump(image)
+    print(f"测试分辨率: {image.shape[1]}x{image.shape[0]}\n")
+
+    png = cv2.imencode('.png', image)[1].tobytes()
+    jpg = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+
+    raw_parser = RawFramebufferParser()
+    raw_buf = bytearray(raw)
+
+    results = {
+        'raw (frombuffer+cvtColor dst)': _bench(lambda: raw_parser.decode(raw_buf), iterations),
+        'png (imdecode)': _bench(lambda: cv2.imdecode(np.frombuffer(png, np.uint8), cv2.IMREAD_COLOR), iterations),
+        'jpg (imdecode)': _bench(lambda: cv2.imdecode(np.frombuffer(jpg, np.uint8), cv2.IMREAD_COLOR), iterations),
+    }
+
+    print(f"{'路径':<32}{'耗时(ms)':>10}{'峰值分配(KB)':>16}")
+    for name, (ms, peak) in results.items():
+        print(f"{name:<32}{ms:>10.2f}{peak / 1024:>16.1f}")
+
+    print(f"\n传输字节: raw={len(raw) / 1024:.0f}KB png={len(png) / 1024:.0f}KB jpg={len(jpg) / 1024:.0f}KB")
+    print(f"raw解析器缓冲区分配次数: {raw_parser.allocations} (共解析 {raw_parser.frames_parsed} 帧)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='原始帧缓冲解析基准测试')
+
+    parser.add_argument('--fixture', type=str, default=str(DEFAULT_FIXTURE), help='原始dump文件')
+    parser.add_argument('--iterations', type=int, default=100, help='迭代次数')
+    parser.add_argument('--native', action='store_true', help='使用fixture原始分辨率 (不放大到2400x1080)')
+    parser.add_argument('--record', action='store_true', help='从已连接设备录制新的fixture')
+    parser.add_argument('--device', type=str, default=None, help='设备ID (录制时使用)')
+
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixture(Path(args.fixture), args.device)
+        return
+
+    run_benchmark(Path(args.fixture), args.iterations, None if args.native else (2400, 1080))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+检测服务启动工具 - 按配置文件加载模型, 供多个机器人进程共用
+Detector Server Launcher - Load the configured model once and serve all bot processes
+"""
+
+import time
+import argparse
+from pathlib import Path
+import sys
+
+import yaml
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.detector.yolo_detector import YOLODetector, model_source
+from src.detector.server import DetectorServer, load_authkey
+
+
+def main():
+    parser = argparse.ArgumentParser(description='检测服务')
+
+    parser.add_argument('--config', type=str, default='config/default_config.yaml', help='配置文件路径')
+    parser.add_argument('--address', type=str, default=None, help='监听地址 (默认使用配置中的model.server.address)')
+    parser.add_argument('--stats-interval', type=float, default=30.0, help='打印统计的间隔(秒, 0表示不打印)')
+
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    model_config = config['model']
+    server_config = model_config.get('server', {})
+
+    print("=== 检测服务 ===\n")
+
+    model_path, backend = model_source(model_config)
+
+    if not Path(model_path).exists():
+        print(f"✗ 模型文件不存在: {model_path}")
+        return
+
+    detector = YOLODetector(
+        model_path=model_path,
+        conf_threshold=model_config['conf_threshold'],
+        iou_threshold=model_config['iou_threshold'],
+        use_gpu=model_config['use_gpu'],
+        class_names=config.get('classes'),
+        optimized_cache=model_config.get('optimized_cache', True),
+        backend=backend,
+        num_threads=model_config.get('cpu_threads', 0)
+    )
+    detector.warmup(model_config.get('warmup', 1))
+
+    server = DetectorServer(
+        detector,
+        address=args.address or server_config.get('address', '127.0.0.1:6010'),
+        authkey=load_authkey(server_config.get('authkey'), server_config.get('key_file')),
+        max_batch=server_config.get('max_batch', 8),
+        max_wait=server_config.get('max_wait', 0.005)
+    )
+    server.start()
+    print("按 Ctrl+C 停止\n")
+
+    try:
+        while True:
+            time.sleep(args.stats_interval or 3600)
+            if not args.stats_interval:
+                continue
+            stats = server.get_stats()
+            batcher = stats['batcher']
+            print(
+                f"批处理 | 帧数: {batcher['frames']} | 平均批量: {batcher['avg_batch_size']:.1f} | "
+                f"推理: {batcher['avg_inference_ms']:.1f}ms"
+            )
+            for name, client in stats['clients'].items():
+                print(
+                    f"  {name:<16} 队列: {client['queue_depth']} (峰值 {client['max_queue_depth']}) | "
+                    f"帧数: {client['frames']} | p50: {client['latency_p50_ms']:.1f}ms | "
+                    f"p95: {client['latency_p95_ms']:.1f}ms"
+                )
+    except KeyboardInterrupt:
+        print("\n停止检测服务")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+模拟minicap流服务 - 无需手机即可测试流式捕获吞吐
+Fake Minicap Server - Test stream capture throughput without a phone
+"""
+
+import socket
+import struct
+import threading
+import time
+import argparse
+from typing import Optional
+from pathlib import Path
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.capture.stream_capture import MinicapStream, MINICAP_BANNER_SIZE
+
+
+class FakeMinicapServer:
+    """按minicap协议发送JPEG帧的本地服务"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        width: int = 2400,
+        height: int = 1080,
+        fps: float = 0,
+        quality: int = 80,
+        num_frames: int = 30
+    ):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口 (0表示随机端口)
+            width, height: 帧尺寸
+            fps: 发送帧率 (0表示尽可能快)
+            quality: JPEG质量
+            num_frames: 预先编码的帧数 (循环发送)
+        """
+        self.width = width
+        self.height = height
+        self.fps = fps
+
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((host, port))
+        self._server.listen(4)
+        self.host, self.port = self._server.getsockname()
+
+        self._frames = self._encode_frames(num_frames, quality)
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self.frames_sent = 0
+
+    def _encode_frames(self, count: int, quality: int) -> list:
+        """生成带移动方块的测试帧并预先编码"""
+        frames = []
+        for i in range(count):
+            image = np.full((self.height, self.width, 3), 40, dtype=np.uint8)
+            x = int(i * (self.width - 200) / max(count - 1, 1))
+            cv2.rectangle(image, (x, self.height // 3), (x + 200, self.height // 3 + 200), (0, 0, 255), -1)
+            cv2.putText(image, f"frame {i}", (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
+            ok, data = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            frames.append(data.tobytes())
+        return frames
+
+    def _banner(self) -> bytes:
+        """构造24字节banner"""
+        return struct.pack(
+            '<BBIIIIIBB',
+            1, MINICAP_BANNER_SIZE, 0,
+            self.width, self.height,
+            self.width, self.height,
+            0, 0
+        )
+
+    def start(self):
+        """启动服务线程"""
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止服务"""
+        self._running = False
+        self._server.close()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def _serve(self):
+        while self._running:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn: socket.socket):
+        interval = 1.0 / self.fps if self.fps > 0 else 0.0
+        try:
+            conn.sendall(self._banner())
+            i = 0
+            while self._running:
+                start = time.time()
+                data = self._frames[i % len(self._frames)]
+                conn.sendall(struct.pack('<I', len(data)) + data)
+                self.frames_sent += 1
+                i += 1
+                if interval:
+                    delay = interval - (time.time() - start)
+                    if delay > 0:
+                        time.sleep(delay)
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+
+def measure_throughput(
+    duration: float = 5.0,
+    width: int = 2400,
+    height: int = 1080,
+    fps: float = 0
+):
+    """
+    测量流式捕获吞吐
+
+    Args:
+        duration: 测试时长(秒)
+        width, height: 帧尺寸
+        fps: 服务端发送帧率 (0表示尽可能快)
+    """
+    print("=== minicap流吞吐测试 ===\n")
+
+    server = FakeMinicapServer(width=width, height=height, fps=fps)
+    server.start()
+    print(f"模拟服务: {server.host}:{server.port} ({width}x{height})")
+
+    stream = MinicapStream(host=server.host, port=server.port)
+    if not stream.start():
+        server.stop()
+        return
+
+    # 模拟主循环: 每次读取都不阻塞
+    reads = 0
+    new_frames = 0
+    last_seq = 0
+    read_time = 0.0
+    end_time = time.time() + duration
+
+    while time.time() < end_time:
+        t0 = time.perf_counter()
+        stream.read()
+        read_time += time.perf_counter() - t0
+        reads += 1
+        if stream.slot.seq != last_seq:
+            new_frames += 1
+            last_seq = stream.slot.seq
+        time.sleep(0.001)
+
+    stats = stream.get_stats()
+    stream.stop()
+    server.stop()
+
+    print(f"\n接收帧率: {stats['receive_fps']:.1f} FPS")
+    print(f"解码帧率: {stats['decode_fps']:.1f} FPS")
+    print(f"丢弃帧数: {stats['frames_dropped']}")
+    print(f"主循环读取: {reads} 次, 其中新帧 {new_frames} 次")
+    print(f"平均读取耗时: {read_time / max(reads, 1) * 1e6:.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='模拟minicap流服务')
+
+    parser.add_argument('--port', type=int, default=1313, help='监听端口')
+    parser.add_argument('--width', type=int, default=2400, help='帧宽度')
+    parser.add_argument('--height', type=int, default=1080, help='帧高度')
+    parser.add_argument('--fps', type=float, default=0, help='发送帧率 (0表示尽可能快)')
+    parser.add_argument('--benchmark', action='store_true', help='运行本地吞吐测试')
+    parser.add_argument('--duration', type=float, default=5.0, help='测试时长(秒)')
+
+    args = parser.parse_args()
+
+    if args.benchmark:
+        measure_throughput(args.duration, args.width, args.height, args.fps)
+        return
+
+    server = FakeMinicapServer(port=args.port, width=args.width, height=args.height, fps=args.fps)
+    server.start()
+    print(f"✓ 模拟minicap服务已启动: {server.host}:{server.port}")
+    print("按 Ctrl+C 停止")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+        print(f"\n已发送 {server.frames_sent} 帧")
+
+
+if __name__ == "__main__":
+    main()
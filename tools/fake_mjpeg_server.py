@@ -0,0 +1,273 @@
+"""
+模拟MJPEG流服务 - 无需iPhone/iPad即可测试WDA推流捕获
+Fake MJPEG Server - Test WebDriverAgent MJPEG capture without an iOS device
+"""
+
+import socket
+import threading
+import time
+import argparse
+from typing import Optional
+from pathlib import Path
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.capture.mjpeg_capture import MjpegStream, MultipartJpegParser
+
+
+class FakeMjpegServer:
+    """按WDA格式发送multipart/x-mixed-replace JPEG流的本地服务"""
+
+    # 与WDA一致: 声明的boundary自带"--", 分段行只有一组"--"
+    BOUNDARY = "--BoundaryString"
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        width: int = 1640,
+        height: int = 2360,
+        fps: float = 0,
+        quality: int = 80,
+        num_frames: int = 30,
+        content_length: bool = True,
+        chunk_size: int = 0
+    ):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口 (0表示随机端口)
+            width, height: 帧尺寸
+            fps: 发送帧率 (0表示尽可能快)
+            quality: JPEG质量
+            num_frames: 预先编码的帧数 (循环发送)
+            content_length: 分段是否带Content-Length头
+            chunk_size: 每次发送的字节数 (0表示整段发送, 用于测试任意切分)
+        """
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.content_length = content_length
+        self.chunk_size = chunk_size
+
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((host, port))
+        self._server.listen(4)
+        self.host, self.port = self._server.getsockname()
+
+        self._parts = [self._part(data) for data in self._encode_frames(num_frames, quality)]
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self.frames_sent = 0
+
+    def _encode_frames(self, count: int, quality: int) -> list:
+        """生成带移动方块的测试帧并预先编码"""
+        frames = []
+        for i in range(count):
+            image = np.full((self.height, self.width, 3), 40, dtype=np.uint8)
+            y = int(i * (self.height - 200) / max(count - 1, 1))
+            cv2.rectangle(image, (self.width // 3, y), (self.width // 3 + 200, y + 200), (0, 0, 255), -1)
+            cv2.putText(image, f"frame {i}", (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
+            ok, data = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            frames.append(data.tobytes())
+        return frames
+
+    def _part(self, data: bytes) -> bytes:
+        """构造一个multipart分段"""
+        header = "--BoundaryString\r\nContent-type: image/jpg\r\n"
+        if self.content_length:
+            header += f"Content-Length: {len(data)}\r\n"
+        return header.encode('latin-1') + b"\r\n" + data + b"\r\n\r\n"
+
+    def start(self):
+        """启动服务线程"""
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止服务"""
+        self._running = False
+        self._server.close()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def _serve(self):
+        while self._running:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _send(self, conn: socket.socket, data: bytes):
+        if not self.chunk_size:
+            conn.sendall(data)
+            return
+        for i in range(0, len(data), self.chunk_size):
+            conn.sendall(data[i:i + self.chunk_size])
+
+    def _handle(self, conn: socket.socket):
+        interval = 1.0 / self.fps if self.fps > 0 else 0.0
+        try:
+            # 读取请求头 (内容不重要)
+            request = b""
+            while b"\r\n\r\n" not in request:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    return
+                request += chunk
+
+            conn.sendall((
+                "HTTP/1.0 200 OK\r\n"
+                "Server: fake-mjpeg\r\n"
+                "Connection: close\r\n"
+                "Cache-Control: no-cache, private\r\n"
+                f"Content-Type: multipart/x-mixed-replace; boundary={self.BOUNDARY}\r\n\r\n"
+            ).encode('latin-1'))
+
+            i = 0
+            while self._running:
+                start = time.time()
+                self._send(conn, self._parts[i % len(self._parts)])
+                self.frames_sent += 1
+                i += 1
+                if interval:
+                    delay = interval - (time.time() - start)
+                    if delay > 0:
+                        time.sleep(delay)
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+
+def check_parser() -> bool:
+    """用随机切分的数据验证增量解析器"""
+    server = FakeMjpegServer(width=320, height=240, num_frames=5)
+    payloads = [server._part(b"\xff\xd8" + bytes([i]) * 1000 + b"\xff\xd9") for i in range(5)]
+    server.stop()
+    stream = b"".join(payloads)
+    rng = np.random.default_rng(0)
+
+    for content_length in (True, False):
+        if not content_length:
+            stream = stream.replace(b"Content-Length: 1004\r\n", b"")
+        parser = MultipartJpegParser(FakeMjpegServer.BOUNDARY.encode())
+        parts = []
+        pos = 0
+        while pos < len(stream):
+            step = int(rng.integers(1, 700))
+            parts += parser.feed(stream[pos:pos + step])
+            pos += step
+
+        # 没有Content-Length时, 最后一段要等到下一个分隔符才能确定结束
+        expected = 5 if content_length else 4
+        ok = len(parts) == expected and all(
+            p == b"\xff\xd8" + bytes([i]) * 1000 + b"\xff\xd9" for i, p in enumerate(parts)
+        )
+        print(f"{'✓' if ok else '✗'} 解析器 (Content-Length={content_length}): {len(parts)}/{expected} 帧")
+        if not ok:
+            return False
+    return True
+
+
+def measure_throughput(
+    duration: float = 5.0,
+    width: int = 1640,
+    height: int = 2360,
+    fps: float = 0,
+    chunk_size: int = 0
+):
+    """
+    测量MJPEG流捕获吞吐
+
+    Args:
+        duration: 测试时长(秒)
+        width, height: 帧尺寸
+        fps: 服务端发送帧率 (0表示尽可能快)
+        chunk_size: 服务端每次发送的字节数 (0表示整段发送)
+    """
+    print("=== MJPEG流吞吐测试 ===\n")
+
+    if not check_parser():
+        return
+
+    server = FakeMjpegServer(width=width, height=height, fps=fps, chunk_size=chunk_size)
+    server.start()
+    print(f"\n模拟服务: {server.host}:{server.port} ({width}x{height})")
+
+    stream = MjpegStream(host=server.host, port=server.port)
+    if not stream.start():
+        server.stop()
+        return
+
+    # 模拟主循环: 每次读取都不阻塞
+    reads = 0
+    new_frames = 0
+    last_seq = 0
+    read_time = 0.0
+    end_time = time.time() + duration
+
+    while time.time() < end_time:
+        t0 = time.perf_counter()
+        stream.read()
+        read_time += time.perf_counter() - t0
+        reads += 1
+        if stream.slot.seq != last_seq:
+            new_frames += 1
+            last_seq = stream.slot.seq
+        time.sleep(0.001)
+
+    stats = stream.get_stats()
+    stream.stop()
+    server.stop()
+
+    print(f"\n接收帧率: {stats['receive_fps']:.1f} FPS")
+    print(f"解码帧率: {stats['decode_fps']:.1f} FPS")
+    print(f"丢弃帧数: {stats['frames_dropped']}  重新同步: {stats.get('resyncs', 0)}")
+    print(f"主循环读取: {reads} 次, 其中新帧 {new_frames} 次")
+    print(f"平均读取耗时: {read_time / max(reads, 1) * 1e6:.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='模拟MJPEG流服务')
+
+    parser.add_argument('--port', type=int, default=9100, help='监听端口')
+    parser.add_argument('--width', type=int, default=1640, help='帧宽度')
+    parser.add_argument('--height', type=int, default=2360, help='帧高度')
+    parser.add_argument('--fps', type=float, default=0, help='发送帧率 (0表示尽可能快)')
+    parser.add_argument('--chunk-size', type=int, default=0, help='每次发送字节数 (0表示整段发送)')
+    parser.add_argument('--no-content-length', action='store_true', help='分段不带Content-Length')
+    parser.add_argument('--benchmark', action='store_true', help='运行本地吞吐测试')
+    parser.add_argument('--duration', type=float, default=5.0, help='测试时长(秒)')
+
+    args = parser.parse_args()
+
+    if args.benchmark:
+        measure_throughput(args.duration, args.width, args.height, args.fps, args.chunk_size)
+        return
+
+    server = FakeMjpegServer(
+        port=args.port, width=args.width, height=args.height, fps=args.fps,
+        content_length=not args.no_content_length, chunk_size=args.chunk_size
+    )
+    server.start()
+    print(f"✓ 模拟MJPEG服务已启动: http://{server.host}:{server.port}/")
+    print("按 Ctrl+C 停止")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+        print(f"\n已发送 {server.frames_sent} 帧")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+"""
+ONNX静态INT8量化工具 - 用验证集图片校准, 并对比fp32与int8模型的精度和延迟
+ONNX Static INT8 Quantization - Calibrate on data/val/images and report mAP / latency deltas
+"""
+
+import time
+import argparse
+import tempfile
+from pathlib import Path
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.detector.yolo_detector import YOLODetector
+from src.detector.ops import Letterbox, box_iou
+
+
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png')
+
+# COCO风格 mAP50-95 的IoU阈值
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+
+
+def list_images(images_dir: str, count: int = 0) -> list:
+    """列出目录中的图片 (count为0表示全部)"""
+    files = sorted(p for p in Path(images_dir).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    return files[:count] if count else files
+
+
+def input_spec(model_path: str):
+    """(输入名, (height, width)), 动态尺寸按640处理"""
+    import onnxruntime as ort
+
+    session = ort.InferenceSession(str(model_path), providers=['CPUExecutionProvider'])
+    model_input = session.get_inputs()[0]
+    _, _, height, width = model_input.shape
+    return model_input.name, (
+        height if isinstance(height, int) else 640,
+        width if isinstance(width, int) else 640,
+    )
+
+
+def make_calibration_reader(image_files: list, input_name: str, input_size: tuple):
+    """
+    创建校准数据读取器
+
+    预处理与YOLODetector推理时完全相同 (letterbox、RGB、/255), 校准得到的激活范围才有效。
+    """
+    from onnxruntime.quantization import CalibrationDataReader
+
+    class ImageCalibrationReader(CalibrationDataReader):
+        def __init__(self):
+            self.letterbox = Letterbox(input_size)
+            self.files = iter(image_files)
+
+        def get_next(self):
+            for path in self.files:
+                image = cv2.imread(str(path))
+                if image is not None:
+                    return {input_name: self.letterbox(image).copy()}
+            return None
+
+        def rewind(self):
+            self.files = iter(image_files)
+
+    return ImageCalibrationReader()
+
+
+def head_nodes(model) -> list:
+    """
+    输出解码部分的节点 (从模型输出向前直到卷积层)
+
+    YOLOv8把框坐标(像素值)和类别分数拼接在同一个输出里, 两者数值范围相差几百倍,
+    共用一组量化参数会让分数几乎全部变成0, 这部分保留fp32。
+    """
+    producers = {}
+    for node in model.graph.node:
+        for output in node.output:
+            producers[output] = node
+
+    names = []
+    visited = set()
+    pending = [output.name for output in model.graph.output]
+    while pending:
+        node = producers.get(pending.pop())
+        if node is None or node.name in visited or node.op_type == 'Conv':
+            continue
+        visited.add(node.name)
+        names.append(node.name)
+        pending.extend(node.input)
+    return names
+
+
+def add_uint8_input(model):
+    """
+    把float输入改为uint8 (0-255), 在图内做 Cast + /255
+
+    YOLODetector识别到uint8输入后直接送入像素值, 省去预处理中的浮点缩放。
+    """
+    from onnx import TensorProto, helper, numpy_helper
+
+    graph_input = model.graph.input[0]
+    float_name = graph_input.name
+    uint8_name = f"{float_name}_uint8"
+
+    graph_input.name = uint8_name
+    graph_input.type.tensor_type.elem_type = TensorProto.UINT8
+
+    # 量化器已经为输入的QuantizeLinear创建了 "<输入名>_scale", 新名称不能与之重复
+    scale = numpy_helper.from_array(np.array(1.0 / 255.0, dtype=np.float32), f"{uint8_name}_to_float_scale")
+    model.graph.initializer.append(scale)
+    nodes = [
+        helper.make_node(
+            'Cast', [uint8_name], [f"{uint8_name}_to_float"], to=TensorProto.FLOAT, name=f"{uint8_name}_cast"
+        ),
+        helper.make_node(
+            'Mul', [f"{uint8_name}_to_float", scale.name], [float_name], name=f"{uint8_name}_normalize"
+        ),
+    ]
+    for i, node in enumerate(nodes):
+        model.graph.node.insert(i, node)
+    return model
+
+
+def quantize_model(
+    fp32_path: str,
+    int8_path: str,
+    image_files: list,
+    method: str = 'minmax',
+    per_channel: bool = True,
+    keep_head: bool = True,
+    uint8_input: bool = False
+):
+    """
+    静态INT8量化 (QDQ格式, 激活uint8 / 权重int8)
+
+    Args:
+        fp32_path: 原始fp32 ONNX模型
+        int8_path: 输出的int8模型路径
+        image_files: 校准图片
+        method: 校准方法 minmax / entropy / percentile
+        per_channel: 权重是否按通道量化
+        keep_head: 输出解码部分是否保留fp32
+        uint8_input: 是否把模型输入改为uint8
+    """
+    try:
+        import onnx
+        from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    except ImportError:
+        raise ImportError("请安装onnx和onnxruntime: pip install onnx onnxruntime")
+
+    methods = {
+        'minmax': CalibrationMethod.MinMax,
+        'entropy': CalibrationMethod.Entropy,
+        'percentile': CalibrationMethod.Percentile,
+    }
+    input_name, input_size = input_spec(fp32_path)
+    reader = make_calibration_reader(image_files, input_name, input_size)
+    fp32_model = onnx.load(str(fp32_path))
+    exclude = head_nodes(fp32_model) if keep_head else []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 先做形状推断和图优化, 量化效果更好; 失败时直接量化原模型
+        source = str(fp32_path)
+        try:
+            from onnxruntime.quantization.shape_inference import quant_pre_process
+
+            prepared = str(Path(tmp) / "prepared.onnx")
+            quant_pre_process(source, prepared, skip_symbolic_shape=True)
+            source = prepared
+        except Exception as e:
+            print(f"  跳过预处理: {e}")
+
+        quantize_static(
+            source,
+            str(int8_path),
+            reader,
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=per_channel,
+            calibrate_method=methods[method],
+            nodes_to_exclude=exclude,
+        )
+
+    # 保留类别名称等元数据, 输入改为uint8
+    int8_model = onnx.load(str(int8_path))
+    existing = {prop.key for prop in int8_model.metadata_props}
+    for prop in fp32_model.metadata_props:
+        if prop.key not in existing:
+            int8_model.metadata_props.add(key=prop.key, value=prop.value)
+    if uint8_input:
+        add_uint8_input(int8_model)
+    onnx.checker.check_model(int8_model)
+    onnx.save(int8_model, str(int8_path))
+    return len(exclude)
+
+
+def load_labels(label_path: Path, image_shape: tuple):
+    """读取YOLO格式标注, 返回 (类别ID, 像素坐标xyxy)"""
+    if not label_path.exists():
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 4), dtype=np.float32)
+
+    rows = np.loadtxt(str(label_path), ndmin=2, dtype=np.float32)
+    if not len(rows):
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 4), dtype=np.float32)
+
+    height, width = image_shape[:2]
+    cx, cy, w, h = rows[:, 1] * width, rows[:, 2] * height, rows[:, 3] * width, rows[:, 4] * height
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    return rows[:, 0].astype(np.int64), boxes
+
+
+def match_predictions(pred_boxes, pred_classes, gt_boxes, gt_classes) -> np.ndarray:
+    """
+    按置信度从高到低把预测框匹配到同类别标注框
+
+    Returns:
+        (N, len(IOU_THRESHOLDS)) bool, 各IoU阈值下是否为正确检测
+    """
+    correct = np.zeros((len(pred_boxes), len(IOU_THRESHOLDS)), dtype=bool)
+    if not len(pred_boxes) or not len(gt_boxes):
+        return correct
+
+    iou = box_iou(pred_boxes, gt_boxes)
+    iou[pred_classes[:, None] != gt_classes[None, :]] = 0
+    for t, threshold in enumerate(IOU_THRESHOLDS):
+        taken = np.zeros(len(gt_boxes), dtype=bool)
+        for i in range(len(pred_boxes)):
+            candidates = np.where(~taken & (iou[i] >= threshold))[0]
+            if len(candidates):
+                j = candidates[iou[i, candidates].argmax()]
+                taken[j] = True
+                correct[i, t] = True
+    return correct
+
+
+def average_precision(correct: np.ndarray, scores: np.ndarray, num_gt: int) -> np.ndarray:
+    """101点插值AP, 每个IoU阈值一个值"""
+    if not num_gt:
+        return np.full(len(IOU_THRESHOLDS), np.nan)
+    if not len(scores):
+        return np.zeros(len(IOU_THRESHOLDS))
+
+    order = np.argsort(-scores, kind='stable')
+    tp = np.cumsum(correct[order], axis=0)
+    fp = np.cumsum(~correct[order], axis=0)
+    recall = tp / num_gt
+    precision = tp / np.maximum(tp + fp, 1)
+
+    points = np.linspace(0, 1, 101)
+    ap = np.zeros(len(IOU_THRESHOLDS))
+    for t in range(len(IOU_THRESHOLDS)):
+        # 精度包络: 从右向左取最大值
+        envelope = np.maximum.accumulate(precision[::-1, t])[::-1]
+        index = np.searchsorted(recall[:, t], points, side='left')
+        ap[t] = np.where(index < len(envelope), envelope[np.minimum(index, len(envelope) - 1)], 0).mean()
+    return ap
+
+
+def evaluate(detector: YOLODetector, image_files: list, labels_dir: Path) -> dict:
+    """
+    在验证集上计算 mAP50 / mAP50-95
+
+    Args:
+        detector: 检测器 (评估时置信度阈值应很低, 如0.001)
+        image_files: 验证集图片
+        labels_dir: YOLO格式标注目录
+    """
+    records = {}   # 类别ID -> ([correct], [scores])
+    num_gt = {}
+
+    for path in image_files:
+        image = cv2.imread(str(path))
+        if image is None:
+            continue
+        gt_classes, gt_boxes = load_labels(labels_dir / f"{path.stem}.txt", image.shape)
+        detections = detector.detect(image)
+        correct = match_predictions(detections.boxes, detections.class_ids, gt_boxes, gt_classes)
+
+        for class_id in np.unique(gt_classes):
+            num_gt[class_id] = num_gt.get(class_id, 0) + int((gt_classes == class_id).sum())
+        for class_id in np.unique(detections.class_ids):
+            mask = detections.class_ids == class_id
+            entry = records.setdefault(class_id, ([], []))
+            entry[0].append(correct[mask])
+            entry[1].append(detections.scores[mask])
+
+    aps = []
+    for class_id in set(num_gt) | set(records):
+        correct, scores = records.get(class_id, ([], []))
+        correct = np.concatenate(correct) if correct else np.zeros((0, len(IOU_THRESHOLDS)), dtype=bool)
+        scores = np.concatenate(scores) if scores else np.zeros(0)
+        aps.append(average_precision(correct, scores, num_gt.get(class_id, 0)))
+
+    aps = np.array(aps).reshape(-1, len(IOU_THRESHOLDS))
+    valid = ~np.isnan(aps[:, 0])
+    if not valid.any():
+        return {'map50': float('nan'), 'map': float('nan'), 'classes': 0}
+    return {
+        'map50': float(aps[valid, 0].mean()),
+        'map': float(aps[valid].mean()),
+        'classes': int(valid.sum()),
+    }
+
+
+def measure_latency(detector: YOLODetector, image_files: list, runs: int = 100, warmup: int = 5) -> dict:
+    """逐帧检测延迟 (循环使用验证集图片)"""
+    images = [img for img in (cv2.imread(str(p)) for p in image_files[:20]) if img is not None]
+    for image in images[:warmup]:
+        detector.detect(image)
+
+    latencies = []
+    for i in range(runs):
+        image = images[i % len(images)]
+        start = time.perf_counter()
+        detector.detect(image)
+        latencies.append(time.perf_counter() - start)
+
+    ms = np.array(latencies) * 1000
+    return {
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'mean_ms': float(ms.mean()),
+    }
+
+
+def benchmark(model_path: str, image_files: list, labels_dir: Path, conf: float, runs: int, threads: int) -> dict:
+    """评估一个模型的精度和延迟"""
+    detector = YOLODetector(
+        model_path, conf_threshold=0.001, use_gpu=False, optimized_cache=False, num_threads=threads
+    )
+    result = {'size_mb': Path(model_path).stat().st_size / 1e6}
+    if labels_dir.exists():
+        result.update(evaluate(detector, image_files, labels_dir))
+
+    # 延迟按运行时的置信度阈值测量 (低阈值会让NMS处理大量候选框)
+    detector.conf_threshold = conf
+    result.update(measure_latency(detector, image_files, runs))
+    return result
+
+
+def format_report(fp32: dict, int8: dict, names: tuple = ('fp32', 'int8')) -> str:
+    """fp32与int8的对比表"""
+    rows = [
+        ('mAP50', 'map50', '{:.4f}'),
+        ('mAP50-95', 'map', '{:.4f}'),
+        ('p50 (ms)', 'p50_ms', '{:.2f}'),
+        ('p99 (ms)', 'p99_ms', '{:.2f}'),
+        ('平均 (ms)', 'mean_ms', '{:.2f}'),
+        ('模型大小 (MB)', 'size_mb', '{:.2f}'),
+    ]
+    lines = [f"{'指标':<14}{names[0]:>12}{names[1]:>12}{'差值':>12}"]
+    for label, key, fmt in rows:
+        if key not in fp32 or key not in int8:
+            continue
+        a, b = fp32[key], int8[key]
+        lines.append(f"{label:<14}{fmt.format(a):>12}{fmt.format(b):>12}{('{:+' + fmt[2:]).format(b - a):>12}")
+    if 'p50_ms' in fp32 and int8.get('p50_ms'):
+        lines.append(f"\n加速比 (p50): {fp32['p50_ms'] / int8['p50_ms']:.2f}x")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ONNX静态INT8量化')
+
+    parser.add_argument('--model', type=str, default='models/best.onnx', help='fp32 ONNX模型路径')
+    parser.add_argument('--output', type=str, default=None, help='int8模型输出路径 (默认: <模型名>_int8.onnx)')
+    parser.add_argument('--data', type=str, default='data/val', help='验证集目录 (包含images和labels, split_dataset.py的输出)')
+    parser.add_argument('--calib-count', type=int, default=200, help='校准图片数 (0表示全部)')
+    parser.add_argument('--method', type=str, default='minmax', choices=['minmax', 'entropy', 'percentile'],
+                        help='校准方法')
+    parser.add_argument('--no-per-channel', action='store_true', help='权重按张量量化 (默认按通道)')
+    parser.add_argument('--quantize-head', action='store_true', help='输出解码部分也量化 (默认保留fp32)')
+    parser.add_argument('--uint8-input', action='store_true', help='模型输入改为uint8像素值')
+    parser.add_argument('--conf', type=float, default=0.25, help='测量延迟时的置信度阈值')
+    parser.add_argument('--runs', type=int, default=100, help='延迟测试次数')
+    parser.add_argument('--threads', type=int, default=0, help='CPU推理线程数 (0表示由后端决定)')
+    parser.add_argument('--report', type=str, default=None, help='对比报告保存路径')
+    parser.add_argument('--skip-quantize', action='store_true', help='int8模型已存在时只做对比')
+
+    args = parser.parse_args()
+
+    print("=== ONNX静态INT8量化 ===\n")
+
+    model_path = Path(args.model)
+    output_path = Path(args.output) if args.output else model_path.with_name(f"{model_path.stem}_int8.onnx")
+    images_dir = Path(args.data) / "images"
+    labels_dir = Path(args.data) / "labels"
+
+    if not model_path.exists():
+        print(f"✗ 模型文件不存在: {model_path}")
+        return
+    if not images_dir.exists():
+        print(f"✗ 图像目录不存在: {images_dir}")
+        print("  请先使用 tools/split_dataset.py 划分数据集")
+        return
+
+    image_files = list_images(images_dir)
+    if not image_files:
+        print("✗ 未找到图像文件")
+        return
+
+    if not args.skip_quantize or not output_path.exists():
+        calib_files = image_files[:args.calib_count] if args.calib_count else image_files
+        print(f"校准图片: {len(calib_files)} 张  方法: {args.method}")
+        excluded = quantize_model(
+            model_path, output_path, calib_files,
+            method=args.method,
+            per_channel=not args.no_per_channel,
+            keep_head=not args.quantize_head,
+            uint8_input=args.uint8_input
+        )
+        print(f"✓ 量化完成: {output_path} (保留fp32的节点: {excluded})\n")
+
+    if not labels_dir.exists():
+        print(f"未找到标注目录 {labels_dir}, 只对比延迟\n")
+
+    print(f"评估 {len(image_files)} 张验证集图片...\n")
+    fp32 = benchmark(model_path, image_files, labels_dir, args.conf, args.runs, args.threads)
+    int8 = benchmark(output_path, image_files, labels_dir, args.conf, args.runs, args.threads)
+
+    report = format_report(fp32, int8)
+    print(f"\n{report}")
+    if args.report:
+        Path(args.report).write_text(report + "\n", encoding='utf-8')
+        print(f"\n✓ 报告已保存: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
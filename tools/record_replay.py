@@ -0,0 +1,113 @@
+"""
+录制回放数据 - 把设备画面录制为帧归档, 供replay平台离线测试
+Record Replay Data - Record device frames into an archive for the replay platform
+"""
+
+import time
+import argparse
+from pathlib import Path
+import sys
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.capture.screen_capture import CaptureManager
+from src.capture.replay_capture import timestamps_path
+
+
+def record(
+    platform: str = "android",
+    device_id: str = None,
+    output: str = "data/replay/session.npy",
+    count: int = 300,
+    mode: str = "screenshot"
+):
+    """
+    录制帧归档
+
+    Args:
+        platform: 平台类型
+        device_id: 设备ID
+        output: 输出.npy路径
+        count: 录制帧数
+        mode: 截图模式
+    """
+    print("=== 回放数据录制工具 ===\n")
+
+    capture_manager = CaptureManager(platform=platform, device_id=device_id, mode=mode)
+    if not capture_manager.connect():
+        print("✗ 设备连接失败")
+        return
+
+    output_path = Path(output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    archive = None
+    timestamps = []
+
+    try:
+        while len(timestamps) < count:
+            frame = capture_manager.get_frame()
+            if frame is None:
+                time.sleep(0.2)
+                continue
+
+            # 按第一帧尺寸创建内存映射归档, 逐帧写入
+            if archive is None:
+                archive = np.lib.format.open_memmap(
+                    str(output_path), mode='w+', dtype=np.uint8, shape=(count,) + frame.shape
+                )
+            if frame.shape != archive.shape[1:]:
+                print(f"✗ 帧尺寸变化 {frame.shape}, 停止录制")
+                break
+
+            archive[len(timestamps)] = frame
+            timestamps.append(time.time())
+
+            if len(timestamps) % 30 == 0:
+                print(f"已录制 {len(timestamps)}/{count} 帧")
+
+    except KeyboardInterrupt:
+        print("\n用户中断")
+
+    finally:
+        capture_manager.disconnect()
+
+    if archive is None:
+        print("✗ 未录制到任何帧")
+        return
+
+    archive.flush()
+    recorded = len(timestamps)
+    del archive
+
+    # 中途停止时截断归档
+    if recorded < count:
+        data = np.array(np.load(str(output_path), mmap_mode='r')[:recorded])
+        np.save(str(output_path), data)
+
+    np.save(str(timestamps_path(output_path)), np.asarray(timestamps, dtype=np.float64))
+
+    duration = timestamps[-1] - timestamps[0] if recorded > 1 else 0.0
+    print(f"\n✓ 已保存 {recorded} 帧到 {output_path}")
+    if duration > 0:
+        print(f"  录制帧率: {(recorded - 1) / duration:.1f} FPS")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='录制回放数据')
+
+    parser.add_argument('--platform', type=str, default='android', choices=['android', 'ios'], help='平台类型')
+    parser.add_argument('--device', type=str, default=None, help='设备ID')
+    parser.add_argument('--output', type=str, default='data/replay/session.npy', help='输出.npy路径')
+    parser.add_argument('--count', type=int, default=300, help='录制帧数')
+    parser.add_argument('--mode', type=str, default='screenshot', help='截图模式')
+
+    args = parser.parse_args()
+
+    record(args.platform, args.device, args.output, args.count, args.mode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+本地WDA模拟服务 - 无需iPhone即可测量截图延迟与并发
+Stub WebDriverAgent Server - Measure screenshot latency and concurrency without an iPhone
+"""
+
+import asyncio
+import base64
+import json
+import time
+import argparse
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.capture.screen_capture import IOSCapture
+
+
+class StubWDAServer:
+    """模拟WDA的 /status, /window/size, /screenshot 接口 (HTTP/1.1 keep-alive)"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        width: int = 1170,
+        height: int = 2532,
+        latency: float = 0.05
+    ):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口 (0表示随机端口)
+            width, height: 屏幕尺寸
+            latency: 每次截图的模拟设备耗时(秒)
+        """
+        image = np.full((height, width, 3), 60, dtype=np.uint8)
+        cv2.putText(image, "stub wda", (50, 200), cv2.FONT_HERSHEY_SIMPLEX, 4, (255, 255, 255), 6)
+        png = cv2.imencode('.png', image)[1].tobytes()
+
+        responses = {
+            '/status': {'value': {'ready': True, 'message': 'stub'}},
+            '/window/size': {'value': {'width': width, 'height': height}},
+            '/screenshot': {'value': base64.b64encode(png).decode('ascii')},
+        }
+        bodies = {path: json.dumps(body).encode('utf-8') for path, body in responses.items()}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 头部与正文分两次写出, 关闭Nagle避免keep-alive连接上的延迟确认等待
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                body = bodies.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                if self.path == '/screenshot':
+                    stub.screenshots += 1
+                    if stub.latency > 0:
+                        time.sleep(stub.latency)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.latency = latency
+        self.screenshots = 0
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        """启动服务线程"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止服务"""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _percentile(values: list, q: float) -> float:
+    return float(np.percentile(values, q)) * 1000 if values else 0.0
+
+
+def bench_urllib(url: str, count: int) -> dict:
+    """每次新建连接的同步请求 (对照组)"""
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(count):
+        t0 = time.perf_counter()
+        with urllib.request.urlopen(url + '/screenshot') as resp:
+            data = base64.b64decode(json.loads(resp.read())['value'])
+        cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    return {'fps': count / elapsed, 'p50': _percentile(latencies, 50), 'p95': _percentile(latencies, 95)}
+
+
+async def bench_async(server: StubWDAServer, count: int, in_flight: int) -> dict:
+    """异步keep-alive会话, 保持in_flight个请求在途"""
+    capture = IOSCapture(wda_host=server.host, wda_port=server.port, max_in_flight=in_flight)
+    if not await capture.connect_async():
+        return {}
+
+    latencies = []
+    remaining = count
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            t0 = time.perf_counter()
+            frame = await capture.get_screenshot_async()
+            if frame is not None:
+                latencies.append(time.perf_counter() - t0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(in_flight)))
+    elapsed = time.perf_counter() - start
+    await capture.close_async()
+
+    return {
+        'fps': len(latencies) / elapsed,
+        'p50': _percentile(latencies, 50),
+        'p95': _percentile(latencies, 95),
+        'requests': capture.async_session.requests,
+    }
+
+
+def run_benchmark(count: int = 40, latency: float = 0.05, in_flight_levels=(1, 2, 4)):
+    """对比同步新建连接与异步keep-alive并发截图"""
+    print("=== WDA截图延迟/并发测试 ===\n")
+
+    server = StubWDAServer(latency=latency)
+    server.start()
+    print(f"模拟WDA: {server.url} (模拟设备耗时 {latency * 1000:.0f}ms)\n")
+
+    results = {'sync urllib (新建连接)': bench_urllib(server.url, count)}
+    for level in in_flight_levels:
+        results[f'async keep-alive x{level}'] = asyncio.run(bench_async(server, count, level))
+
+    server.stop()
+
+    print(f"{'方式':<28}{'FPS':>8}{'p50(ms)':>10}{'p95(ms)':>10}")
+    for name, r in results.items():
+        if r:
+            print(f"{name:<28}{r['fps']:>8.1f}{r['p50']:>10.1f}{r['p95']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地WDA模拟服务')
+
+    parser.add_argument('--port', type=int, default=8100, help='监听端口')
+    parser.add_argument('--latency', type=float, default=0.05, help='模拟截图耗时(秒)')
+    parser.add_argument('--benchmark', action='store_true', help='运行本地延迟/并发测试')
+    parser.add_argument('--count', type=int, default=40, help='测试截图次数')
+
+    args = parser.parse_args()
+
+    if args.benchmark:
+        run_benchmark(args.count, args.latency)
+        return
+
+    server = StubWDAServer(port=args.port, latency=args.latency)
+    server.start()
+    print(f"✓ 模拟WDA已启动: {server.url}")
+    print("按 Ctrl+C 停止")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+        print(f"\n共处理 {server.screenshots} 次截图")
+
+
+if __name__ == "__main__":
+    main()